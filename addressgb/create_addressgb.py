@@ -23,6 +23,40 @@ Geom = namedtuple('geom', 'osopenroads gb1900')
 geoms = Geom("osopenroads", "gb1900")
 
 output_suffix = "final"
+output_filetype = ".tsv"  # must match `output_filetype` in gen_config.yaml, e.g. ".tsv" or ".parquet"
+
+
+def read_output(file_path, usecols=None, nrows=None):
+    """Reads a CensusGeocoder output file written as tsv, parquet or feather (geometries in parquet and feather read as shapely geometries)."""
+
+    file_path = pathlib.Path(file_path)
+
+    if file_path.suffix in [".parquet", ".feather"]:
+        import geopandas as gpd
+
+        if file_path.suffix == ".parquet":
+            import pyarrow.parquet
+
+            if len(pyarrow.parquet.read_schema(file_path).names) == 0:
+                raise pd.errors.EmptyDataError(f"No columns in {file_path}")
+
+            try:
+                output_data = gpd.read_parquet(file_path, columns=usecols)
+            except ValueError:  # no geometry column
+                output_data = pd.read_parquet(file_path, columns=usecols)
+        else:
+            try:
+                output_data = gpd.read_feather(file_path, columns=usecols)
+            except ValueError:  # no geometry column
+                output_data = pd.read_feather(file_path, columns=usecols)
+
+        if nrows is not None:
+            output_data = output_data.head(nrows)
+
+        return output_data
+
+    return pd.read_csv(file_path, sep="\t", usecols=usecols, nrows=nrows)
+
 
 def set_blockcols(country, year, ):
 
@@ -92,7 +126,7 @@ for census in list_of_census:
                 col_order = ["street_uid", "nameTOID", "name1", "name1_alt", "merged_id", "conrd_town", "geometry"]
 
 
-        geom_data = pd.read_csv(geom_output_dir1 / f"{country}_{year}_{geom}{suffix}.tsv", sep = "\t", nrows = 10000) #remove row limiter
+        geom_data = read_output(geom_output_dir1 / f"{country}_{year}_{geom}{suffix}{output_filetype}", nrows = 10000) #remove row limiter
 
 
         geom_data[geom_icols] = geom_data[geom_icols].apply(pd.to_numeric, downcast = "integer" )
@@ -120,16 +154,14 @@ for census in list_of_census:
             if p.is_dir():
                 for file_p in p.iterdir():
                     partition = file_p.parent.name
-                    if file_p.stem == f"{country}_{year}_{geom}_matches_{partition}":
+                    if file_p.stem == f"{country}_{year}_{geom}_matches_{partition}" and file_p.suffix == output_filetype:
 
                         try:
                             if int(year) == 1911:
-                                linked_partion = pd.read_csv(file_p, 
-                                    sep="\t", 
+                                linked_partion = read_output(file_p, 
                                     usecols=cols_1911,)
                             else:
-                                linked_partion = pd.read_csv(file_p, 
-                                    sep="\t", 
+                                linked_partion = read_output(file_p, 
                                     usecols=cols_other,)
                             
                             blockcols = set_blockcols(country=country,
@@ -137,8 +169,7 @@ for census in list_of_census:
                             cols_to_read = []
                             cols_to_read.extend(["RecID", "address_uid", ])
                             cols_to_read.extend(blockcols)
-                            lkup = pd.read_csv(f"../data/output_{output_suffix}/{country}/{year}/{partition}/{country}_{year}_address_uid_{partition}.tsv", 
-                                                sep="\t",
+                            lkup = read_output(f"../data/output_{output_suffix}/{country}/{year}/{partition}/{country}_{year}_address_uid_{partition}{output_filetype}", 
                                                 usecols=["RecID", "address_uid"],)
                             
 
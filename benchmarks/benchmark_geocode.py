@@ -0,0 +1,399 @@
+"""Benchmarks `geocode.GeoCode` and the `utils.rapidfuzzy_*` scorers on synthetic census and target geometry data, writing a JSON report.
+
+Synthetic data is generated for each size (number of census records): street names are drawn from a vocabulary of common British street
+names and types, geo-blocking units have a skewed (log-normal) number of census records, and census addresses are target names with a
+house number, abbreviations and typos, or streets not in the target data. Data is generated with a fixed seed, so each size is the same
+in every run.
+
+`GeoCode` is timed end to end and by stage (`_create_candidate_links`, `_compare` and `_process_results`, timed by `telemetry`), for each
+comparison method in `MATCHERS`. Each scorer is timed on the candidate pairs of each size (at most `SCORER_MAX_PAIRS`). Each benchmark is
+repeated `REPEATS` times; the report gives the fastest and median times.
+
+If a baseline report is given, benchmarks whose fastest time is more than `TOLERANCE` slower than in the baseline are listed and the script
+exits with status 1, so regressions of matcher performance can be caught before production runs. Reports are only comparable when run on
+the same machine.
+
+Run from the repository root, e.g.
+
+    python benchmarks/benchmark_geocode.py --sizes 1000 10000 --output benchmark_report.json --baseline previous_report.json
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "censusgeocoder"))
+
+import geocode  # noqa: E402
+import telemetry  # noqa: E402
+import utils  # noqa: E402
+
+SIZES = [1000, 10000, 50000]
+"""Default numbers of census records of synthetic data."""
+
+REPEATS = 3
+"""Default number of times each benchmark is run."""
+
+TOLERANCE = 0.2
+"""Default fraction by which a benchmark may be slower than in the baseline report before it is reported as a regression."""
+
+SCORER_MAX_PAIRS = 200000
+"""Maximum number of candidate pairs each scorer is timed on."""
+
+SEED = 1851
+
+MATCHERS = {
+    "default": {
+        "comparers": {
+            "rapidfuzzy_wratio": "rapidfuzzy_wratio_s",
+            "rapidfuzzy_partial_ratio_alignment": "align",
+        },
+        "comparison_method": None,
+    },
+    "1911_bespoke": {
+        "comparers": {
+            "rapidfuzzy_wratio": "rapidfuzzy_wratio_s",
+            "rapidfuzzy_partial_ratio_alignment": "align",
+            "rapidfuzzy_get_src_start_pos": "src_start_pos",
+        },
+        "comparison_method": "1911_bespoke",
+    },
+}
+"""Comparison configurations `GeoCode` is benchmarked with, as in the census configuration files."""
+
+GEOCODE_STAGES = [
+    "GeoCode._create_candidate_links",
+    "GeoCode._compare",
+    "GeoCode._process_results",
+]
+
+STREET_NAMES = [
+    "HIGH", "CHURCH", "MILL", "STATION", "VICTORIA", "KING", "QUEEN", "ALBERT", "PARK", "NEW", "OLD", "MARKET", "BRIDGE",
+    "WATER", "SCHOOL", "CHAPEL", "NORTH", "SOUTH", "EAST", "WEST", "GEORGE", "JOHN", "WILLIAM", "UNION", "CASTLE", "GREEN",
+    "MANOR", "ABBEY", "GROVE", "HILL", "CROSS", "BACK", "FRONT", "WELLINGTON", "NELSON", "RAILWAY", "CANAL", "FACTORY", "PRINCES",
+    "REGENT", "COMMERCIAL", "ALEXANDRA", "BRUNSWICK", "CAMBRIDGE", "OXFORD", "YORK", "LONDON", "DUKE", "ELM", "OAK", "ASH",
+    "CHESTNUT", "CHAPEL HILL", "ST JOHNS", "ST MARYS", "HOLLY", "PROSPECT", "PLEASANT", "SPRING", "WELL", "FOUNTAIN", "TEMPLE",
+]
+"""Stems of synthetic street names."""
+
+STREET_TYPES = {
+    "STREET": "ST",
+    "ROAD": "RD",
+    "LANE": "LA",
+    "TERRACE": "TER",
+    "PLACE": "PL",
+    "SQUARE": "SQ",
+    "ROW": "ROW",
+    "COURT": "CT",
+    "YARD": "YD",
+    "GARDENS": "GDNS",
+    "WALK": "WALK",
+    "BUILDINGS": "BLDGS",
+}
+"""Types of synthetic street names and their abbreviations."""
+
+
+def generate_data(
+    size,
+    seed=SEED,
+):
+    """Generates synthetic census and target geometry data with `size` census records.
+
+    Parameters
+    ----------
+
+    size: int
+        Number of census records.
+
+    seed: int
+        Seed of random number generator.
+
+    Returns
+    -------
+
+    census_data: `pd.DataFrame`
+        Census data with an address uid (`address_uid`), address (`address`) and geo-blocking unit (`block_id`).
+
+    target_data: `pd.DataFrame`
+        Target geometry data with a uid (`street_uid`), street name (`street_name`) and geo-blocking unit (`block_id`).
+
+    Notes
+    -----
+
+    The number of census records in each geo-blocking unit is log-normal (a few units have many times more than most, as in cities),
+    and the number of streets grows with it less than proportionally. 80% of census addresses are a street of their unit, of which
+    a third are abbreviated and a third have a typo; the rest are streets not in the target data.
+
+    """
+
+    rng = np.random.default_rng(seed)
+    street_names = np.array(
+        [f"{x} {y}" for x in STREET_NAMES for y in STREET_TYPES]
+    )
+
+    block_sizes = rng.lognormal(mean=3.5, sigma=1.2, size=max(size // 20, 1))
+    block_sizes = np.maximum(
+        np.round(block_sizes / block_sizes.sum() * size), 1
+    ).astype(int)
+    block_sizes[0] += size - block_sizes.sum()  # make total size exact
+    block_sizes = np.maximum(block_sizes, 1)
+
+    target_blocks = []
+    census_blocks = []
+    for block_id, n_census in enumerate(block_sizes):
+        n_streets = min(int(np.ceil(2 * n_census**0.6)), len(street_names))
+        streets = rng.choice(street_names, n_streets, replace=False)
+        target_blocks.append(pd.DataFrame({"street_name": streets, "block_id": block_id}))
+
+        addresses = rng.choice(streets, n_census)
+        unmatched = rng.random(n_census) < 0.2
+        addresses[unmatched] = rng.choice(street_names, unmatched.sum())
+        census_blocks.append(pd.DataFrame({"address": addresses, "block_id": block_id}))
+
+    target_data = pd.concat(target_blocks, ignore_index=True)
+    target_data.insert(0, "street_uid", np.arange(len(target_data)))
+
+    census_data = pd.concat(census_blocks, ignore_index=True)
+    census_data["address"] = [
+        _vary_address(x, rng) for x in census_data["address"].to_numpy()
+    ]
+    census_data.insert(0, "address_uid", np.arange(len(census_data)))
+
+    return census_data, target_data
+
+
+def _vary_address(
+    address,
+    rng,
+):
+    """Returns census address of street `address`: with a house number, and abbreviated or with a typo."""
+
+    variation = rng.integers(3)
+    if variation == 1:
+        stem, street_type = address.rsplit(" ", 1)
+        address = f"{stem} {STREET_TYPES[street_type]}"
+    elif variation == 2:
+        i = rng.integers(len(address))
+        address = address[:i] + address[i + 1 :]
+
+    return f"{rng.integers(1, 200)} {address}"
+
+
+def time_geocode(
+    census_data,
+    target_data,
+    matcher,
+    repeats,
+):
+    """Times `GeoCode` on `census_data` and `target_data` with comparison configuration `matcher` (see `MATCHERS`), `repeats` times.
+    Returns dictionary of {benchmark: list of times (s)}, and the number of candidate pairs compared."""
+
+    times = {"GeoCode": [], **{x: [] for x in GEOCODE_STAGES}}
+
+    previous_log_file = os.environ.get(telemetry.LOG_ENV_VAR)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file = telemetry.start_run(tmp_dir)  # records times of GeoCode stages
+        try:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                geocoded = geocode.GeoCode(
+                    census_data=census_data,
+                    census_geocode_field="address",
+                    census_indexfield="address_uid",
+                    target_geometry_data=target_data,
+                    target_geometry_geocode_field="street_name",
+                    target_geometry_indexfield="street_uid",
+                    census_block=["block_id"],
+                    target_geom_block=["block_id"],
+                    comparers=matcher["comparers"],
+                    sim_thresh=0.9,
+                    align_thresh=7,
+                    comparison_method=matcher["comparison_method"],
+                    final_score_field="fs",
+                )
+                times["GeoCode"].append(time.perf_counter() - start)
+        finally:
+            if previous_log_file is None:
+                del os.environ[telemetry.LOG_ENV_VAR]
+            else:  # restores run log of caller
+                os.environ[telemetry.LOG_ENV_VAR] = previous_log_file
+
+        log = telemetry.read_log(log_file)
+
+    for stage in GEOCODE_STAGES:
+        times[stage] = log.loc[log["stage"] == stage, "wall_s"].tolist()
+
+    return times, len(geocoded.cand_links)
+
+
+def time_scorers(
+    census_data,
+    target_data,
+    repeats,
+):
+    """Times each `utils.rapidfuzzy_*` scorer on the candidate pairs of `census_data` and `target_data` (at most `SCORER_MAX_PAIRS`),
+    `repeats` times. Returns dictionary of {benchmark: list of times (s)}, and the number of pairs scored."""
+
+    pairs = census_data.merge(target_data, on="block_id")
+    pairs = pairs.sample(min(len(pairs), SCORER_MAX_PAIRS), random_state=SEED)
+
+    scorers = sorted(x for x in dir(utils) if x.startswith("rapidfuzzy_"))
+
+    times = {}
+    for scorer in scorers:
+        times[f"utils.{scorer}"] = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            getattr(utils, scorer)(pairs["address"], pairs["street_name"])
+            times[f"utils.{scorer}"].append(time.perf_counter() - start)
+
+    return times, len(pairs)
+
+
+def _result(
+    benchmark,
+    size,
+    times,
+    pairs,
+    **details,
+):
+    """Returns report entry of `benchmark` at `size` from its `times` (s) over `pairs` candidate pairs."""
+
+    return {
+        "benchmark": benchmark,
+        "size": size,
+        **details,
+        "pairs": pairs,
+        "repeats": len(times),
+        "min_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "min_us_per_pair": round(min(times) / pairs * 1e6, 4) if pairs else None,
+    }
+
+
+def run_benchmarks(
+    sizes,
+    repeats,
+):
+    """Runs all benchmarks at each of `sizes`, `repeats` times. Returns report as dictionary."""
+
+    import rapidfuzz
+    import recordlinkage
+
+    results = []
+    for size in sizes:
+        census_data, target_data = generate_data(size)
+        details = {
+            "census_records": len(census_data),
+            "target_records": len(target_data),
+            "blocks": int(census_data["block_id"].nunique()),
+        }
+        print(
+            f"Size {size}: {details['census_records']} census records, {details['target_records']} target records, "
+            f"{details['blocks']} geo-blocking units"
+        )
+
+        for matcher_name, matcher in MATCHERS.items():
+            times, pairs = time_geocode(census_data, target_data, matcher, repeats)
+            for benchmark, benchmark_times in times.items():
+                results.append(
+                    _result(
+                        f"{benchmark}[{matcher_name}]",
+                        size,
+                        benchmark_times,
+                        pairs,
+                        **details,
+                    )
+                )
+                print(f"  {results[-1]['benchmark']}: {results[-1]['min_s']} s")
+
+        times, pairs = time_scorers(census_data, target_data, repeats)
+        for benchmark, benchmark_times in times.items():
+            results.append(_result(benchmark, size, benchmark_times, pairs, **details))
+            print(f"  {benchmark}: {results[-1]['min_s']} s")
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "versions": {
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "recordlinkage": recordlinkage.__version__,
+            "rapidfuzz": rapidfuzz.__version__,
+        },
+        "seed": SEED,
+        "results": results,
+    }
+
+
+def compare_to_baseline(
+    report,
+    baseline,
+    tolerance,
+):
+    """Returns list of regressions: benchmarks in `report` whose fastest time is more than `tolerance` (fraction) slower than the same
+    benchmark and size in report `baseline`."""
+
+    baseline_times = {(x["benchmark"], x["size"]): x["min_s"] for x in baseline["results"]}
+
+    regressions = []
+    for result in report["results"]:
+        baseline_time = baseline_times.get((result["benchmark"], result["size"]))
+        if baseline_time and result["min_s"] > baseline_time * (1 + tolerance):
+            regressions.append(
+                {
+                    "benchmark": result["benchmark"],
+                    "size": result["size"],
+                    "baseline_min_s": baseline_time,
+                    "min_s": result["min_s"],
+                    "slowdown": round(result["min_s"] / baseline_time, 3),
+                }
+            )
+
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="numbers of census records")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="times each benchmark is run")
+    parser.add_argument("--output", default="benchmark_report.json", help="path of JSON report")
+    parser.add_argument("--baseline", help="path of JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="fraction slower than baseline reported as a regression")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.repeats)
+
+    exit_status = 0
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            report["baseline"] = args.baseline
+            report["regressions"] = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in report["regressions"]:
+            print(
+                f"REGRESSION {regression['benchmark']} size {regression['size']}: "
+                f"{regression['baseline_min_s']} s -> {regression['min_s']} s ({regression['slowdown']}x)"
+            )
+        exit_status = 1 if report["regressions"] else 0
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Written {args.output}")
+
+    sys.exit(exit_status)
@@ -1,11 +1,12 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from dataclasses import dataclass, field
+import pathlib
 
 import numpy as np
 import pandas as pd
 
+import telemetry
 import utils
-import geocode
-from geometry import TargetGeometry
 
 
 @dataclass
@@ -88,6 +89,36 @@ class Census_vars:
         Column name of subset field (over which the code will iterate and output
         for each subset group the processed census and results).
 
+    dtype_mode: str = "numpy"
+        "numpy" or "arrow". If "arrow", `field_to_geocode` and `field_to_clean` are stored as "string[pyarrow]" and `subset_field`
+        as the smallest integer dtype (or category if not numeric). See `utils.set_dtypes()`.
+
+    block_code_field: str = "block_id"
+        Column name of the integer code of each combination of `boundaries_field` values, see `Census._create_block_codes()`.
+
+    execution_mode: str = "pandas"
+        "pandas" or "dask". If "dask", census data is read, processed and geocoded as a partitioned `dask.dataframe.DataFrame`
+        on a `dask.distributed.LocalCluster`, using all cores and spilling to disk rather than running out of memory.
+
+    dask_cluster_params: dict = None
+        Dictionary of keyword arguments passed to `dask.distributed.LocalCluster` if `execution_mode` is "dask", e.g. `n_workers`, `memory_limit`.
+
+    dask_blocksize: str = "64MB"
+        Approximate size of each partition of census data read from `census_file` if `execution_mode` is "dask".
+
+    geocode_workers: int = 1
+        Number of worker processes geocoding subsets at once if `execution_mode` is "pandas". If more than 1, target geometry data
+        is published to shared memory once and attached to by each worker (see `sharedtable.SharedTable`).
+
+    work_units: int = None
+        If set, subsets are geocoded in this many work units of whole geo-blocking units of roughly equal comparison cost, instead of
+        one subset at a time, so one large subset doesn't take longer than all the others (see `Census._geocode_work_units()`).
+        Output files are still written by subset. Not supported if `execution_mode` is "dask".
+
+    block_stats: bool = False
+        If True, writes a `block_stats` file of matching statistics for each geo-blocking unit with the geocoded output files of
+        each subset (see `geocode.GeoCode._calc_block_stats()`).
+
     census_read_library: str = field(init=False)
         Read library for census data set by utils.get_readlibrary().
 
@@ -130,6 +161,20 @@ class Census_vars:
 
     subset_field: str = None
 
+    dtype_mode: str = "numpy"
+
+    block_code_field: str = "block_id"
+
+    execution_mode: str = "pandas"
+    dask_cluster_params: dict = None
+    dask_blocksize: str = "64MB"
+
+    geocode_workers: int = 1
+
+    work_units: int = None
+
+    block_stats: bool = False
+
     census_read_library: str = field(init=False)
 
     subsetlist: list = field(init=False)
@@ -139,6 +184,20 @@ class Census_vars:
             self.census_file, self.read_csv_params
         )
 
+        if self.execution_mode not in ["pandas", "dask"]:
+            raise ValueError(
+                f"execution_mode is {self.execution_mode} must be 'pandas' or 'dask'"
+            )
+
+        if self.work_units is not None:
+            if self.execution_mode == "dask":
+                raise ValueError(
+                    "work_units is not supported if execution_mode is 'dask'"
+                )
+            if self.work_units < 1:
+                raise ValueError(f"work_units is {self.work_units} must be at least 1")
+
+
 class Census:
     """A class for processing census data.
 
@@ -149,8 +208,12 @@ class Census:
         `Census_vars` class containing variables of census used throughout geocoding process.
         See `Census_vars` for more information.
 
-    data: pd.DataFrame
-        pd.DataFrame containing census data to be geo-coded.
+    data: pd.DataFrame | dask.dataframe.DataFrame
+        pd.DataFrame containing census data to be geo-coded (dask.dataframe.DataFrame if `vars.execution_mode` is "dask").
+
+    block_dictionary: pd.DataFrame
+        pd.DataFrame mapping each combination of `boundaries_field` values to an integer code (`block_code_field`),
+        shared with target geometry data (see `geometry.TargetGeometry.add_block_codes()`). `None` if census is not processed.
 
 
     Methods
@@ -171,6 +234,9 @@ class Census:
     `_read_census()`
         Reads census file to pd.DataFrame, assigns to data attribute.
 
+    `_read_census_for_linking()`
+        Reads census data written by `_create_censusforlinking()` (if `from_census_for_linking` is True), assigns to data attribute.
+
     `_gensubsetlist()`
         Creates list of subset values if `vars.subset_field` is not `None`.
 
@@ -185,6 +251,9 @@ class Census:
     `_add_lkup()`
         Add lookup values to census data by iterating over dictionary of lkup parameters in `lkups`.
 
+    `_create_block_codes()`
+        Creates `block_dictionary` and adds the code of each geo-blocking unit to census data. Writes `block_dictionary` to file.
+
     `_create_uid_of_geocode_field()`
         Creates uid of each `field_to_geocode` within each geo-blocking unit, assigns uid to census data.
         Writes census data to file with newly added address uids.
@@ -195,20 +264,46 @@ class Census:
     `_write_census_data()`
         Write census data to file(s), outputting each subset (if specified) to a separate file.
 
+    `_get_geocode_blocks()`
+        Returns census and target geometry fields to block on when geocoding, and census data to geocode.
+
+    `_geocode_in_parallel()`
+        Geocodes census data of each subset (or work unit) in a pool of worker processes.
+
+    `_get_work_units()`
+        Groups geo-blocking units into work units of roughly equal comparison cost.
+
+    `_geocode_work_units()`
+        Geocodes census data by work unit, writing output files by subset.
+
     """
 
     def __init__(
         self,
         vars,
+        from_census_for_linking=False,
     ):
 
         self._addcensusvars(vars)
-        self._read_census()
-        self._gensubsetlist()  # may need to deal with
+        self.block_dictionary = None
+
+        if from_census_for_linking is True:
+            self._read_census_for_linking()
+            self._gensubsetlist()
+
+        else:
+            with utils.dask_client(
+                self.vars.execution_mode, self.vars.dask_cluster_params
+            ):
+                self._read_census()
+                self._gensubsetlist()  # may need to deal with
 
-        if self.vars.process != False:
+                if self.vars.process != False:
 
-            self._process_census()
+                    self._process_census()
+
+            if self.vars.execution_mode == "dask" and self.vars.process != False:
+                self._read_census_for_linking()  # data persisted on the cluster is released when it closes
 
     def _addcensusvars(self, vars):
         """Checks vars is type Census_vars and assigns to self.vars. If not raise TypeError.
@@ -229,6 +324,7 @@ class Census:
                 f"vars is {vars.__class__.__name__} must be {Census_vars.__name__}"
             )
 
+    @telemetry.stage()
     def _read_census(
         self,
     ):
@@ -238,16 +334,119 @@ class Census:
         ----------
 
         `census_read_library` is the relevant pandas read library for the file type (.txt, .xlsx etc), set by `utils.get_readlibrary` in `Census.vars`.
+        Dtypes of text and subset fields are set according to `vars.dtype_mode`. If `vars.execution_mode` is "dask", census file is read
+        in partitions of `vars.dask_blocksize` (see `utils.read_file_dask()`) and the dtype of subset field is left unchanged, as it
+        must be the same in every partition.
 
         """
 
         print(f"Reading census {self.vars.country} {self.vars.year}")
 
-        self.data = self.vars.census_read_library(
-            self.vars.census_file,
-            **self.vars.read_csv_params,
+        string_fields = [self.vars.field_to_geocode, self.vars.field_to_clean]
+
+        read_csv_params = self.vars.read_csv_params
+        if self.vars.census_read_library is pd.read_csv:
+            read_csv_params = utils.get_read_dtypes(
+                self.vars.dtype_mode, string_fields, read_csv_params
+            )
+
+        if self.vars.execution_mode == "dask":
+            self.data = utils.read_file_dask(
+                self.vars.census_file, read_csv_params, self.vars.dask_blocksize
+            )
+            category_fields = None
+        else:
+            self.data = self.vars.census_read_library(
+                self.vars.census_file,
+                **read_csv_params,
+            )
+            category_fields = [self.vars.subset_field]
+
+        self.data = utils.set_dtypes(
+            self.data,
+            self.vars.dtype_mode,
+            string_fields=string_fields,
+            category_fields=category_fields,
         )
 
+    @telemetry.stage()
+    def _read_census_for_linking(
+        self,
+    ):
+        """Reads census data written by `_create_censusforlinking()` (and `block_dictionary`, if written), assigns to data attribute,
+        so that census data can be geocoded without re-processing it. If `vars.execution_mode` is "dask", each file (i.e. subset)
+        is read to one partition (see `utils.read_output_files_dask()`).
+
+        """
+
+        if self.vars.field_to_clean is not None:
+            self.vars.field_to_geocode = (
+                f"{self.vars.field_to_clean}{self.vars.cleaned_field_suffix}"
+            )
+
+        year_dir = pathlib.Path(
+            self.vars.output_path, self.vars.country, str(self.vars.year)
+        )
+        file_prefix = f"{self.vars.country}_{self.vars.year}"
+
+        if self.vars.subset_field is not None:
+            census_files = sorted(
+                year_dir.glob(
+                    f"*/{file_prefix}_census_for_linking_*{self.vars.output_filetype}"
+                )
+            )
+        else:
+            census_files = [
+                year_dir / f"{file_prefix}_census_for_linking{self.vars.output_filetype}"
+            ]
+
+        if not census_files or not census_files[0].exists():
+            raise FileNotFoundError(
+                f"No census_for_linking files for {self.vars.country} {self.vars.year} in {year_dir}"
+            )
+
+        print(f"Reading census for linking {self.vars.country} {self.vars.year}")
+
+        if self.vars.execution_mode == "dask":
+            self.data = utils.read_output_files_dask(
+                census_files,
+                self.vars.write_processed_csv_params_slim,
+                self.vars.dtype_mode,
+                [self.vars.field_to_geocode],
+            )
+        else:
+            self.data = pd.concat(
+                [
+                    utils.read_output_file(
+                        census_file,
+                        self.vars.write_processed_csv_params_slim,
+                        self.vars.dtype_mode,
+                        [self.vars.field_to_geocode],
+                    )
+                    for census_file in census_files
+                ],
+                ignore_index=True,
+            )
+            self.data = utils.set_dtypes(
+                self.data,
+                self.vars.dtype_mode,
+                category_fields=[self.vars.subset_field],
+            )
+
+        block_dictionary_file = (
+            year_dir / f"{file_prefix}_block_dictionary{self.vars.output_filetype}"
+        )
+        if block_dictionary_file.exists():
+            self.block_dictionary = utils.read_output_file(
+                block_dictionary_file, self.vars.write_processed_csv_params
+            )
+            self.block_dictionary[self.vars.block_code_field] = self.block_dictionary[
+                self.vars.block_code_field
+            ].astype(np.int32)
+
+            if self.vars.block_code_field not in self.data.columns:
+                self._add_block_codes()
+
     def _gensubsetlist(
         self,
     ):
@@ -261,15 +460,20 @@ class Census:
 
         """
         if self.vars.subset_field is not None:
-            self.vars.subsetlist = self.data[self.vars.subset_field].unique()
+            subsets = self.data[self.vars.subset_field].unique()
+            if self.vars.execution_mode == "dask":
+                subsets = subsets.compute()
+            self.vars.subsetlist = np.asarray(
+                subsets
+            )  # unique values of a categorical subset_field are not an ndarray
         else:
             self.vars.subsetlist is None
 
     def _process_census(
         self,
     ):
-        """Bundles pre-processing steps into one method, includes `_cleanaddressfield()`, `_add_lkup()`, `_create_uid_of_geocode_field()`, `_create_censusforlinking()`.
-        Only adds lkup if `vars.lkups` is not `None`.
+        """Bundles pre-processing steps into one method, includes `_cleanaddressfield()`, `_add_lkup()`, `_create_block_codes()`, `_create_uid_of_geocode_field()`,
+        `_create_censusforlinking()`. Only adds lkup if `vars.lkups` is not `None`.
 
         """
 
@@ -278,9 +482,11 @@ class Census:
         if self.vars.lkups is not None:
             self._add_lkup()
 
+        self._create_block_codes()
         self._create_uid_of_geocode_field()
         self._create_censusforlinking()
 
+    @telemetry.stage()
     def _cleanaddressfield(
         self,
     ):
@@ -292,8 +498,7 @@ class Census:
         """
 
         if self.vars.field_to_clean is not None:
-            self.data, field_to_clean_new = utils.clean_address_data(
-                self.data,
+            clean_args = (
                 self.vars.field_to_clean,
                 self.vars.standardisation_file,
                 self.vars.min_len,
@@ -301,6 +506,22 @@ class Census:
                 self.vars.convert_non_ascii,
             )
 
+            if self.vars.execution_mode == "dask":
+                field_to_clean_new = (
+                    f"{self.vars.field_to_clean}{self.vars.cleaned_field_suffix}"
+                )
+                meta = self.data.dtypes.to_dict()
+                meta[field_to_clean_new] = meta[self.vars.field_to_clean]
+
+                self.data = self.data.map_partitions(
+                    lambda df: utils.clean_address_data(df.copy(), *clean_args)[0],
+                    meta=meta,
+                )  # each partition is cleaned separately
+            else:
+                self.data, field_to_clean_new = utils.clean_address_data(
+                    self.data, *clean_args
+                )
+
             self.vars.field_to_geocode = field_to_clean_new
 
             self._write_census_data(
@@ -308,6 +529,7 @@ class Census:
                 self.vars.write_processed_csv_params,
             )
 
+    @telemetry.stage()
     def _add_lkup(
         self,
     ):
@@ -324,6 +546,73 @@ class Census:
                 right_on=lkup_settings["lkup_uid_field"],
             )
 
+    @telemetry.stage()
+    def _create_block_codes(
+        self,
+    ):
+        """Creates `block_dictionary`, mapping each combination of `boundaries_field` values to an int32 code, and adds the code
+        of each row to census data as `block_code_field`. Writes `block_dictionary` to file.
+
+        Notes
+        ----------
+
+        Geo-blocking units are identified by more than one field (e.g. ConParID and CEN_1851). Grouping, partitioning and blocking on one
+        integer field is faster and uses less memory than on several fields. The same codes are added to target geometry data in
+        `geometry.TargetGeometry.add_block_codes()`.
+
+        """
+
+        boundaries_field = list(utils.flatten(self.vars.boundaries_field))
+
+        blocks = self.data[boundaries_field]
+        if self.vars.execution_mode == "dask":
+            blocks = blocks.drop_duplicates().compute()
+
+        self.block_dictionary = utils.create_block_dictionary(
+            blocks, boundaries_field, self.vars.block_code_field
+        )
+        self._add_block_codes()
+
+        filename = f"{self.vars.country}_{self.vars.year}_block_dictionary{self.vars.output_filetype}"
+        output_path_components = [
+            str(x)
+            for x in [
+                self.vars.output_path,
+                self.vars.country,
+                self.vars.year,
+                filename,
+            ]
+        ]
+
+        utils.write_df_to_file(
+            self.block_dictionary,
+            output_path_components,
+            self.vars.write_processed_csv_params,
+        )
+
+    def _add_block_codes(
+        self,
+    ):
+        """Adds the code of each row's combination of `boundaries_field` values in `block_dictionary` to census data as `block_code_field`."""
+
+        add_block_code_args = (
+            list(utils.flatten(self.vars.boundaries_field)),
+            self.block_dictionary,
+            self.vars.block_code_field,
+        )
+
+        if self.vars.execution_mode == "dask":
+            meta = self.data.dtypes.to_dict()
+            meta[self.vars.block_code_field] = np.int32
+
+            self.data = self.data.map_partitions(
+                lambda df: utils.add_block_codes(df.copy(), *add_block_code_args),
+                meta=meta,
+            )
+        else:
+            self.data = utils.add_block_codes(self.data, *add_block_code_args)
+
+    @telemetry.stage()
     def _create_uid_of_geocode_field(
         self,
     ):
@@ -335,28 +624,39 @@ class Census:
         `unique_field_to_geocode_name` is used throughout CensusGeocoder pipeline to keep track of addresses and link geocoded outputs
         back to individuals at those addresses. Used as `census_indexfield` attribute in `Geocode()`.
 
+        If `vars.execution_mode` is "dask", uids are created from the unique combinations of block code and `field_to_geocode`
+        (computed from all partitions) and joined to each partition. Uids are the same as with pandas, as both number groups in sorted order.
+
         """
-        groupby_cols = []
-        groupby_cols.extend([x for x in utils.flatten(self.vars.boundaries_field)])
-        groupby_cols.append(self.vars.field_to_geocode)
+        groupby_cols = [self.vars.block_code_field, self.vars.field_to_geocode]
 
-        self.data[self.vars.unique_field_to_geocode_name] = self.data.groupby(
-            groupby_cols, dropna=False
-        ).ngroup()
+        if self.vars.execution_mode == "dask":
+            uids = self.data[groupby_cols].drop_duplicates().compute()
+            uids[self.vars.unique_field_to_geocode_name] = pd.to_numeric(
+                uids.groupby(groupby_cols, dropna=False).ngroup(), downcast="integer"
+            )
 
-        self.data = self.data.dropna(
-            subset=self.vars.unique_field_to_geocode_name
-        ).copy()
+            self.data = self.data.merge(uids, on=groupby_cols, how="left")
 
-        self.data[self.vars.unique_field_to_geocode_name] = pd.to_numeric(
-            self.data[self.vars.unique_field_to_geocode_name], downcast="integer"
-        )
+        else:
+            self.data[self.vars.unique_field_to_geocode_name] = self.data.groupby(
+                groupby_cols, dropna=False
+            ).ngroup()
+
+            self.data = self.data.dropna(
+                subset=self.vars.unique_field_to_geocode_name
+            ).copy()
+
+            self.data[self.vars.unique_field_to_geocode_name] = pd.to_numeric(
+                self.data[self.vars.unique_field_to_geocode_name], downcast="integer"
+            )
 
         self._write_census_data(
             "address_uid",  # specifies part of output name to identify this file
             self.vars.write_processed_csv_params,
         )
 
+    @telemetry.stage()
     def _create_censusforlinking(
         self,
     ):
@@ -367,10 +667,18 @@ class Census:
 
         Individuals can be linked back to their geocoded output using the address uid and the RecID output in `_create_uid_of_geocode_field()`.
 
+        If `vars.execution_mode` is "dask", the first entry of each uid is found across all partitions (see `utils.drop_duplicates_dask()`),
+        so the same entries are kept, in the same order, as with pandas.
+
         """
-        self.data = self.data.drop_duplicates(
-            subset=[self.vars.unique_field_to_geocode_name],
-        )
+        if self.vars.execution_mode == "dask":
+            self.data = utils.drop_duplicates_dask(
+                self.data, [self.vars.unique_field_to_geocode_name]
+            )
+        else:
+            self.data = self.data.drop_duplicates(
+                subset=[self.vars.unique_field_to_geocode_name]
+            )
 
         self._write_census_data(
             "census_for_linking",  # specifies part of output name to identify this file
@@ -393,8 +701,17 @@ class Census:
         params: dict
             Dictionary of parameters to be passed to `pd.to_csv` in `utils.write_df_to_file`.
 
+        Notes
+        ----------
+
+        If `vars.execution_mode` is "dask", census data is persisted on the cluster first, so that it is only computed once
+        rather than for each subset.
+
         """
 
+        if self.vars.execution_mode == "dask":
+            self.data = self.data.persist()
+
         if (
             type(self.vars.subsetlist) is np.ndarray
         ):  # checks for ndarray because subsetlist created used pd.unique which returns ndarray
@@ -413,6 +730,8 @@ class Census:
                 ]
 
                 output_df = self.data[self.data[self.vars.subset_field] == sub]
+                if self.vars.execution_mode == "dask":
+                    output_df = output_df.compute()
                 utils.write_df_to_file(output_df, output_path_components, params)
 
         else:
@@ -428,14 +747,60 @@ class Census:
                 ]
             ]
 
+            output_df = self.data
+            if self.vars.execution_mode == "dask":
+                output_df = output_df.compute()
             utils.write_df_to_file(output_df, output_path_components, params)
 
+    def _get_geocode_blocks(
+        self,
+        target_geometry,
+    ):
+        """Returns census and target geometry fields to block on when geocoding with `target_geometry`, and census data to geocode.
+        Blocks on one integer code field (`block_code_field`) if census and target geometry have block codes, otherwise on all
+        boundary fields.
+
+        Returns
+        -------
+
+        census_block: list
+            Names of census fields to block on.
+
+        target_geom_block: list
+            Names of target geometry fields to block on.
+
+        census_data: `pd.DataFrame`
+            Census data to geocode.
+
+        """
+
+        census_block = list(utils.flatten(self.vars.boundaries_field))
+        target_geom_block = list(utils.flatten(target_geometry.vars.blockcols))
+        census_data = self.data
+
+        if (
+            self.block_dictionary is not None
+            and target_geometry.vars.block_code_field == self.vars.block_code_field
+        ):  # block on one integer code field rather than all boundary fields
+            census_block = [self.vars.block_code_field]
+            target_geom_block = [target_geometry.vars.block_code_field]
+            census_data = self.data.dropna(
+                subset=list(utils.flatten(self.vars.boundaries_field))
+            )  # can't be blocked on missing boundary fields, but their combinations still have a code
+
+        return census_block, target_geom_block, census_data
+
+    @telemetry.stage()
     def geocode(
         self,
         target_geometry,
+        checkpoint=None,
+        resume=False,
     ):
         """Geocodes `field_to_geocode` using `geometry.GeoCode()`. Writes 3 types of output files (see `geometry.GeoCode.process_results()`).
         If subset list specified, iterates over subsets, geo-coding each subset and writing output files to their own directory.
+        Each subset is only passed the target geometry data in its geo-blocking units (see `TargetGeometry.get_blocks()`).
+        If `vars.block_stats` is True, also writes a `block_stats` file of matching statistics by geo-blocking unit.
 
         Parameters
         ----------
@@ -443,32 +808,72 @@ class Census:
         target_geometry: `geometry.TargetGeometry`
             Instance of `geometry.TargetGeometry`
 
+        checkpoint: `manifest.Checkpoint`, optional
+            Run manifest entry of geocoding, under which each subset is recorded once its output files are written (see `manifest.Checkpoint.subset()`).
+
+        resume: bool, optional
+            If True, subsets that are up to date in the run manifest are skipped, e.g. to resume geocoding after a crash.
+
+        Notes
+        ----------
+
+        `geocode` (which imports recordlinkage) and `geometry` (which imports geopandas) are imported here rather than when `census` is
+        imported, so that census data can be processed without loading them.
+
+        If `vars.execution_mode` is "dask" and subset list specified, subsets (one partition each, see `_read_census_for_linking()`)
+        are geocoded in parallel on the workers of a `dask.distributed.LocalCluster`, with target geometry data sent to each worker once.
+        Otherwise, if `vars.geocode_workers` is more than 1, subsets are geocoded in parallel by `_geocode_in_parallel()`.
+
+        If `vars.work_units` is set and subset list specified, census data is geocoded in work units of whole geo-blocking units of
+        roughly equal comparison cost rather than by subset, and output files are still written by subset (see `_geocode_work_units()`).
+
         """
+        import geocode
+        from geometry import TargetGeometry
 
         if type(target_geometry) is not TargetGeometry:
             raise TypeError(
                 f"vars is {target_geometry.__class__.__name__} must be {TargetGeometry.__name__}"
             )
 
+        census_block, target_geom_block, census_data_all = self._get_geocode_blocks(
+            target_geometry
+        )
+
+        subsets = self.vars.subsetlist
+        if type(subsets) is np.ndarray and checkpoint is not None and resume is True:
+            current = [x for x in subsets if checkpoint.subset(x).is_current()]
+            for subset in current:
+                print(f"Skipping subset {subset} (up to date)")
+            subsets = [x for x in subsets if x not in current]
+
+        def record(subset, outputs):
+            if checkpoint is not None:
+                checkpoint.subset(subset).record(outputs)
+
         if type(self.vars.subsetlist) is not np.ndarray:
 
+            if self.vars.execution_mode == "dask":
+                census_data_all = census_data_all.compute()
+
             geocoded = geocode.GeoCode(
-                census_data=self.data,
+                census_data=census_data_all,
                 census_geocode_field=self.vars.field_to_geocode,
                 census_indexfield=self.vars.unique_field_to_geocode_name,
                 target_geometry_data=target_geometry.data,
                 target_geometry_geocode_field=target_geometry.vars.blockcols,
                 target_geometry_indexfield=target_geometry.vars.item_per_unit_uid,
-                census_block=self.vars.boundaries_field,
-                target_geom_block=target_geometry.vars.blockcols,
+                census_block=census_block,
+                target_geom_block=target_geom_block,
                 comparers=self.vars.comparers,
                 sim_thresh=self.vars.sim_comp_thresh,
                 align_thresh=self.vars.align_thresh,
                 final_score_field=self.vars.final_score_field,
                 comparison_method=self.vars.comparison_method,
+                block_stats=self.vars.block_stats,
             )
 
-            for outputfiletype, outputdata in geocoded.rslts_dict.items():
+            for outputfiletype, outputdata in _geocode_outputs(geocoded).items():
 
                 filename = f"{self.vars.country}_{self.vars.year}_{target_geometry.vars.geom_name}_{outputfiletype}{self.vars.output_filetype}"
 
@@ -488,43 +893,591 @@ class Census:
                     self.vars.write_processed_csv_params,
                 )
 
+        elif self.vars.work_units is not None:
+
+            self._geocode_work_units(
+                census_data_all,
+                target_geometry,
+                census_block,
+                target_geom_block,
+                subsets,
+                record,
+            )
+
+        elif self.vars.execution_mode == "dask":
+            from dask.distributed import as_completed
+
+            with utils.dask_client(
+                self.vars.execution_mode, self.vars.dask_cluster_params
+            ) as client:
+                target_geometry_future = client.scatter(
+                    target_geometry, broadcast=True
+                )  # sent to each worker once rather than with each partition
+                partitions = client.compute(census_data_all.to_delayed())
+
+                for future in as_completed(
+                    client.map(
+                        _geocode_partition,
+                        partitions,
+                        target_geometry=target_geometry_future,
+                        census_vars=self.vars,
+                        census_block=census_block,
+                        target_geom_block=target_geom_block,
+                        subsets=subsets,
+                    )
+                ):
+                    for subset, outputs in future.result():
+                        record(subset, outputs)
+
+        elif self.vars.geocode_workers > 1:
+
+            self._geocode_in_parallel(
+                (
+                    (subset, census_data_all[census_data_all[self.vars.subset_field] == subset])
+                    for subset in subsets
+                ),
+                target_geometry,
+                census_block,
+                target_geom_block,
+                _geocode_shared_subset,
+                record,
+            )
+
         else:
 
-            for subset in self.vars.subsetlist:
-                census_data = self.data[self.data[self.vars.subset_field] == subset]
-                geocoded = geocode.GeoCode(
-                    census_data=census_data,
-                    census_geocode_field=self.vars.field_to_geocode,
-                    census_indexfield=self.vars.unique_field_to_geocode_name,
-                    target_geometry_data=target_geometry.data,
-                    target_geometry_geocode_field=target_geometry.vars.gis_geocode_field,
-                    target_geometry_indexfield=target_geometry.vars.item_per_unit_uid,
-                    census_block=self.vars.boundaries_field,
-                    target_geom_block=target_geometry.vars.blockcols,
-                    comparers=self.vars.comparers,
-                    sim_thresh=self.vars.sim_comp_thresh,
-                    align_thresh=self.vars.align_thresh,
-                    final_score_field=self.vars.final_score_field,
-                    comparison_method=self.vars.comparison_method,
+            for subset in subsets:
+                census_data = census_data_all[
+                    census_data_all[self.vars.subset_field] == subset
+                ]
+                outputs = _geocode_subset(
+                    census_data,
+                    target_geometry,
+                    self.vars,
+                    census_block,
+                    target_geom_block,
+                    subset,
                 )
+                record(subset, outputs)
+
+    def _geocode_in_parallel(
+        self,
+        units,
+        target_geometry,
+        census_block,
+        target_geom_block,
+        func,
+        done,
+    ):
+        """Geocodes the census data of each unit in `units` (e.g. subsets) in a pool of `vars.geocode_workers` worker processes.
+
+        Parameters
+        ----------
+
+        units: iterable
+            (key, `pd.DataFrame` of census data) of each unit to geocode, e.g. (subset, census data of subset).
+
+        target_geometry: `geometry.TargetGeometry`
+            Instance of `geometry.TargetGeometry`
+
+        census_block: list
+            Names of census fields to block on.
+
+        target_geom_block: list
+            Names of target geometry fields to block on.
+
+        func: callable
+            Function run by worker processes for each unit with its census data, `vars`, `census_block`, `target_geom_block` and key,
+            e.g. `_geocode_shared_subset()`.
+
+        done: callable
+            Function called with the key of each unit and the return value of `func` once it is geocoded.
+
+        Notes
+        ----------
+
+        Target geometry data is published once to shared memory as Arrow buffers (`sharedtable.SharedTable`); each worker attaches
+        to it when it starts, without copying, rather than target geometry data being pickled to each worker or with each unit.
+        Only the census data of each unit is sent with its task, at most 2 tasks per worker at a time.
+
+        """
+        from sharedtable import SharedTable
+
+        shared_target_data = SharedTable.publish(target_geometry.data)
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.vars.geocode_workers,
+                initializer=_init_geocode_worker,
+                initargs=(target_geometry.without_data(), shared_target_data),
+            ) as executor:
+                running = {}
+                for key, census_data in units:
+                    if len(running) >= 2 * self.vars.geocode_workers:
+                        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            done(running.pop(future), future.result())
+
+                    running[
+                        executor.submit(
+                            func,
+                            census_data,
+                            self.vars,
+                            census_block,
+                            target_geom_block,
+                            key,
+                        )
+                    ] = key
+
+                for future in wait(running).done:
+                    done(running[future], future.result())
+        finally:
+            shared_target_data.unlink()
+
+    def _get_work_units(
+        self,
+        census_data,
+        target_geometry,
+        census_block,
+        target_geom_block,
+    ):
+        """Groups the geo-blocking units of `census_data` into `vars.work_units` work units of roughly equal comparison cost (census
+        records × target geometry records in each geo-blocking unit, i.e. candidate pairs), see `utils.balance_work_units()`.
+
+        Returns
+        -------
+
+        work_units: `pd.Series`
+            Work unit of each row of `census_data`. Rows that can't be blocked (missing geo-blocking fields) have no work unit.
+
+        """
+
+        census_counts = census_data.groupby(census_block, observed=True).size()
+        target_counts = target_geometry.data.groupby(
+            target_geom_block, observed=True
+        ).size()
+        target_counts.index = target_counts.index.set_names(census_block)
+
+        costs = census_counts * target_counts.reindex(
+            census_counts.index, fill_value=0
+        )
+        block_units = pd.Series(
+            utils.balance_work_units(costs.to_numpy(), self.vars.work_units),
+            index=costs.index,
+            name="work_unit",
+        )
+
+        return (
+            census_data[census_block]
+            .merge(block_units.reset_index(), on=census_block, how="left")[
+                "work_unit"
+            ]
+            .set_axis(census_data.index)
+        )
+
+    def _geocode_work_units(
+        self,
+        census_data_all,
+        target_geometry,
+        census_block,
+        target_geom_block,
+        subsets,
+        record,
+    ):
+        """Geocodes the census data of `subsets` in work units of whole geo-blocking units of roughly equal comparison cost (see
+        `_get_work_units()`), rather than by subset, and writes the output files of each subset once all work units containing it are
+        geocoded.
+
+        Parameters
+        ----------
+
+        census_data_all: `pd.DataFrame`
+            Census data of all subsets.
+
+        target_geometry: `geometry.TargetGeometry`
+            Instance of `geometry.TargetGeometry`
+
+        census_block: list
+            Names of census fields to block on.
+
+        target_geom_block: list
+            Names of target geometry fields to block on.
+
+        subsets: list
+            Subsets to geocode.
+
+        record: callable
+            Function called with each subset and its output files once they are written.
 
-                for outputfiletype, outputdata in geocoded.rslts_dict.items():
+        Notes
+        ----------
+
+        Work units are geocoded in a pool of `vars.geocode_workers` worker processes (see `_geocode_in_parallel()`) if it is more
+        than 1, otherwise one at a time. Geocoded results of each unit are split by subset and each subset's results are sorted by
+        census and target geometry uid, so output files are the same as when geocoding by subset. If `vars.block_stats` is True,
+        statistics of all geo-blocking units are written to one `block_stats` file in the census year directory, as geo-blocking
+        units may contain records of more than one subset.
+
+        """
 
-                    filename = f"{self.vars.country}_{self.vars.year}_{target_geometry.vars.geom_name}_{outputfiletype}_{subset}{self.vars.output_filetype}"
+        subset_field = self.vars.subset_field
+        census_indexfield = self.vars.unique_field_to_geocode_name
+        target_indexfield = target_geometry.vars.item_per_unit_uid
+        geom_name = target_geometry.vars.geom_name
+
+        census_data_all = census_data_all[census_data_all[subset_field].isin(subsets)]
+        census_subsets = census_data_all.set_index(census_indexfield)[subset_field]
+
+        work_units = self._get_work_units(
+            census_data_all, target_geometry, census_block, target_geom_block
+        )
+        units = {
+            int(unit): census_data_all[work_units == unit]
+            for unit in work_units.dropna().unique()
+        }
+        print(
+            f"Geocoding {len(subsets)} subsets in {len(units)} work units of "
+            + ", ".join(f"{len(x)}" for x in units.values())
+            + " census records"
+        )
 
-                    output_path_components = [
-                        str(x)
-                        for x in [
-                            self.vars.output_path,
-                            self.vars.country,
-                            self.vars.year,
-                            subset,
-                            filename,
-                        ]
+        units_left = {
+            subset: set() for subset in subsets
+        }  # work units still to geocode containing each subset
+        for unit, census_data in units.items():
+            for subset in census_data[subset_field].unique():
+                units_left[subset].add(unit)
+
+        results = {
+            subset: {x: [] for x in ["matches", "competing_matches", "matches_lq"]}
+            for subset in subsets
+        }  # results of each subset from the work units geocoded so far
+        block_stats = []
+
+        def write_subset(subset):
+            subset_results = results.pop(subset)
+            no_results = next(
+                (x[0].iloc[:0] for x in subset_results.values() if x), pd.DataFrame()
+            )  # as GeoCode returns for a subset: with columns of results if it has any results, otherwise without
+            outputs = {
+                outputfiletype: (
+                    pd.concat(parts)
+                    .sort_values([census_indexfield, target_indexfield], kind="stable")
+                    .reset_index(drop=True)
+                    if parts
+                    else no_results
+                )
+                for outputfiletype, parts in subset_results.items()
+            }
+            record(
+                subset,
+                _write_geocode_outputs(outputs, self.vars, geom_name, subset),
+            )
+
+        def done(unit, outputs):
+            if "block_stats" in outputs:
+                block_stats.append(outputs.pop("block_stats"))
+
+            for outputfiletype, outputdata in outputs.items():
+                if outputdata.empty:
+                    continue
+                for subset, subset_data in outputdata.groupby(
+                    outputdata[census_indexfield].map(census_subsets), sort=False
+                ):
+                    results[subset][outputfiletype].append(subset_data)
+
+            for subset in list(units_left):
+                units_left[subset].discard(unit)
+                if not units_left[subset]:
+                    del units_left[subset]
+                    write_subset(subset)
+
+        for subset in [x for x, y in units_left.items() if not y]:
+            del units_left[subset]
+            write_subset(subset)  # no geo-blocking units, so no results
+
+        if self.vars.geocode_workers > 1:
+            self._geocode_in_parallel(
+                units.items(),
+                target_geometry,
+                census_block,
+                target_geom_block,
+                _geocode_shared_work_unit,
+                done,
+            )
+        else:
+            for unit, census_data in units.items():
+                done(
+                    unit,
+                    _geocode_census_data(
+                        census_data,
+                        target_geometry,
+                        self.vars,
+                        census_block,
+                        target_geom_block,
+                        work_unit=unit,
+                    ),
+                )
+
+        if block_stats:
+            filename = f"{self.vars.country}_{self.vars.year}_{geom_name}_block_stats{self.vars.output_filetype}"
+            utils.write_df_to_file(
+                pd.concat(block_stats, ignore_index=True).sort_values(
+                    "candidate_pairs", ascending=False
+                ),
+                [
+                    str(x)
+                    for x in [
+                        self.vars.output_path,
+                        self.vars.country,
+                        self.vars.year,
+                        filename,
                     ]
+                ],
+                self.vars.write_processed_csv_params,
+            )
 
-                    utils.write_df_to_file(
-                        outputdata,
-                        output_path_components,
-                        self.vars.write_processed_csv_params,
-                    )
+
+_worker_target_geometry = None
+"""`geometry.TargetGeometry` with data attached to shared memory in a worker process, set by `_init_geocode_worker()`."""
+
+_worker_shared_target_data = None
+"""`sharedtable.SharedTable` of target geometry data in a worker process, kept attached while `_worker_target_geometry` is in use."""
+
+
+def _init_geocode_worker(
+    target_geometry,
+    shared_target_data,
+):
+    """Sets target geometry of a worker process started by `Census._geocode_in_parallel()`: `target_geometry`
+    (see `geometry.TargetGeometry.without_data()`) with data from `shared_target_data`."""
+    global _worker_target_geometry, _worker_shared_target_data
+
+    target_geometry.data = shared_target_data.to_pandas()
+
+    _worker_target_geometry = target_geometry
+    _worker_shared_target_data = shared_target_data
+
+
+def _geocode_shared_subset(
+    census_data,
+    census_vars,
+    census_block,
+    target_geom_block,
+    subset,
+):
+    """Geocodes one subset against the target geometry of the worker process (see `_init_geocode_worker()`) using `_geocode_subset()`.
+    Returns list of paths of output files written."""
+
+    return _geocode_subset(
+        census_data,
+        _worker_target_geometry,
+        census_vars,
+        census_block,
+        target_geom_block,
+        subset,
+    )
+
+
+def _geocode_shared_work_unit(
+    census_data,
+    census_vars,
+    census_block,
+    target_geom_block,
+    work_unit,
+):
+    """Geocodes the census data of one work unit against the target geometry of the worker process (see `_init_geocode_worker()`)
+    using `_geocode_census_data()`. Returns dictionary of outputs."""
+
+    return _geocode_census_data(
+        census_data,
+        _worker_target_geometry,
+        census_vars,
+        census_block,
+        target_geom_block,
+        work_unit=work_unit,
+    )
+
+
+def _geocode_outputs(geocoded):
+    """Returns dictionary of output files of `geocode.GeoCode` `geocoded` to write, the 3 types of results and, if calculated, `block_stats`."""
+
+    if geocoded.block_stats is None:
+        return geocoded.rslts_dict
+
+    return {**geocoded.rslts_dict, "block_stats": geocoded.block_stats}
+
+
+def _geocode_census_data(
+    census_data,
+    target_geometry,
+    census_vars,
+    census_block,
+    target_geom_block,
+    **labels,
+):
+    """Geocodes census data against the target geometry data in its geo-blocking units. Returns dictionary of outputs
+    (see `_geocode_outputs()`).
+
+    Parameters
+    ----------
+
+    census_data: `pd.DataFrame`
+        Census data to geocode, e.g. of one subset.
+
+    target_geometry: `geometry.TargetGeometry`
+        Instance of `geometry.TargetGeometry`.
+
+    census_vars: `Census_vars`
+        Variables of census being geocoded.
+
+    census_block: list
+        Names of census fields to block on.
+
+    target_geom_block: list
+        Names of target geometry fields to block on.
+
+    **labels
+        Labels of telemetry records of geocoding, e.g. `subset=1` (see `telemetry.context()`).
+
+    """
+    import geocode
+
+    with telemetry.context(
+        country=census_vars.country,
+        year=census_vars.year,
+        geom_name=target_geometry.vars.geom_name,
+        **labels,
+    ):
+        target_geometry_data = target_geometry.get_blocks(census_data, census_block)
+        geocoded = geocode.GeoCode(
+            census_data=census_data,
+            census_geocode_field=census_vars.field_to_geocode,
+            census_indexfield=census_vars.unique_field_to_geocode_name,
+            target_geometry_data=target_geometry_data,
+            target_geometry_geocode_field=target_geometry.vars.gis_geocode_field,
+            target_geometry_indexfield=target_geometry.vars.item_per_unit_uid,
+            census_block=census_block,
+            target_geom_block=target_geom_block,
+            comparers=census_vars.comparers,
+            sim_thresh=census_vars.sim_comp_thresh,
+            align_thresh=census_vars.align_thresh,
+            final_score_field=census_vars.final_score_field,
+            comparison_method=census_vars.comparison_method,
+            block_stats=census_vars.block_stats,
+        )
+
+    return _geocode_outputs(geocoded)
+
+
+def _write_geocode_outputs(
+    outputs,
+    census_vars,
+    geom_name,
+    subset,
+):
+    """Writes geocoded `outputs` (see `_geocode_outputs()`) of `subset` against target geometry `geom_name` to the subset's directory.
+    Returns list of paths of output files written."""
+
+    output_files = []
+    for outputfiletype, outputdata in outputs.items():
+
+        filename = f"{census_vars.country}_{census_vars.year}_{geom_name}_{outputfiletype}_{subset}{census_vars.output_filetype}"
+
+        output_path_components = [
+            str(x)
+            for x in [
+                census_vars.output_path,
+                census_vars.country,
+                census_vars.year,
+                subset,
+                filename,
+            ]
+        ]
+
+        utils.write_df_to_file(
+            outputdata,
+            output_path_components,
+            census_vars.write_processed_csv_params,
+        )
+        output_files.append(str(pathlib.Path(*output_path_components)))
+
+    return output_files
+
+
+def _geocode_subset(
+    census_data,
+    target_geometry,
+    census_vars,
+    census_block,
+    target_geom_block,
+    subset,
+):
+    """Geocodes census data of one subset against the target geometry data in its geo-blocking units, writes output files to the subset's directory.
+    Returns list of paths of output files written.
+
+    Parameters
+    ----------
+
+    census_data: `pd.DataFrame`
+        Census data of `subset`.
+
+    target_geometry: `geometry.TargetGeometry`
+        Instance of `geometry.TargetGeometry`.
+
+    census_vars: `Census_vars`
+        Variables of census being geocoded.
+
+    census_block: list
+        Names of census fields to block on.
+
+    target_geom_block: list
+        Names of target geometry fields to block on.
+
+    subset: str | int
+        Value of `subset_field` of `census_data`.
+
+    """
+
+    outputs = _geocode_census_data(
+        census_data,
+        target_geometry,
+        census_vars,
+        census_block,
+        target_geom_block,
+        subset=subset,
+    )
+
+    return _write_geocode_outputs(
+        outputs, census_vars, target_geometry.vars.geom_name, subset
+    )
+
+
+def _geocode_partition(
+    census_data,
+    target_geometry,
+    census_vars,
+    census_block,
+    target_geom_block,
+    subsets,
+):
+    """Geocodes each subset in a partition of census data that is in `subsets` using `_geocode_subset()`, run on dask workers by `Census.geocode()`.
+    Returns list of (subset, list of paths of output files written)."""
+
+    outputs = []
+    for subset in census_data[census_vars.subset_field].unique():
+        if subset in subsets:
+            outputs.append(
+                (
+                    subset,
+                    _geocode_subset(
+                        census_data[census_data[census_vars.subset_field] == subset],
+                        target_geometry,
+                        census_vars,
+                        census_block,
+                        target_geom_block,
+                        subset,
+                    ),
+                )
+            )
+
+    return outputs
@@ -0,0 +1,54 @@
+import pandas as pd
+from recordlinkage.base import BaseCompareFeature
+from recordlinkage.utils import fillna as _fillna
+
+from utils import (
+    rapidfuzzy_wratio,
+    rapidfuzzy_partialratio,
+    rapidfuzzy_partialratioalignment,
+    rapidfuzzy_get_src_start_pos,
+)
+
+
+class rapidfuzzy_wratio_comparer(BaseCompareFeature):
+    """Provides funtionality for recordlinkage BaseCompareFeature to use
+    algorithm from rapidfuzz rather than fuzzywuzzy.
+    """
+
+    def __init__(
+        self,
+        left_on,
+        right_on,
+        method="rapidfuzzy_wratio",
+        threshold=None,
+        missing_value=0.0,
+        label=None,
+    ):
+        super(rapidfuzzy_wratio_comparer, self).__init__(left_on, right_on, label=label)
+
+        self.method = method
+        self.threshold = threshold
+        self.missing_value = missing_value
+
+    def _compute_vectorized(self, s_left, s_right):
+
+        if self.method == "rapidfuzzy_wratio":
+            str_sim_alg = rapidfuzzy_wratio
+        elif self.method == "rapidfuzzy_partial_ratio":
+            str_sim_alg = rapidfuzzy_partialratio
+        elif self.method == "rapidfuzzy_partial_ratio_alignment":
+            str_sim_alg = rapidfuzzy_partialratioalignment
+        elif self.method == "rapidfuzzy_get_src_start_pos":
+            str_sim_alg = rapidfuzzy_get_src_start_pos
+        else:
+            raise ValueError("The algorithm '{}' is not known.".format(self.method))
+
+        c = str_sim_alg(s_left, s_right)
+
+        if self.threshold is not None:
+            c = c.where((c < self.threshold) | (pd.isnull(c)), other=1.0)
+            c = c.where((c >= self.threshold) | (pd.isnull(c)), other=0.0)
+
+        c = _fillna(c, self.missing_value)
+
+        return c
@@ -0,0 +1,83 @@
+"""Converts boundary and target geometry input files to GeoParquet.
+
+Reads each input file listed in the configuration files once (including converting GB1900 lat/long columns to
+geometries) and writes a GeoParquet file alongside it with the same name and a `.parquet` suffix. To use the
+converted files, point `gis_file` at the `.parquet` file, set `gis_lat_long: False`, and replace csv or shapefile
+read parameters in `gis_read_params` with e.g. `columns: [...]` (and optionally `bbox: [...]`).
+
+Inputs that are already read as (Geo)Parquet, i.e. `.parquet` files and directories (partitioned datasets such as
+`osopenroads_parquet`), are skipped.
+"""
+import pathlib
+
+import yaml
+
+import utils
+
+
+def is_parquet_input(
+    gis_file,
+):
+    """Returns True if `gis_file` is read by `utils.read_file()` as (Geo)Parquet, i.e. it is a `.parquet` file or a directory
+    (a partitioned dataset, see `utils.get_readlibrary()`), so doesn't need converting."""
+
+    gis_file = pathlib.Path(gis_file)
+
+    return gis_file.is_dir() or gis_file.suffix == ".parquet"
+
+
+def convert_inputs(
+    geom_configs,
+):
+    """Converts the `gis_file` of each boundary or target geometry configuration in `geom_configs` to GeoParquet, skipping files
+    that are already (Geo)Parquet (see `is_parquet_input()`) and files shared between configurations after the first.
+    Returns list of files converted."""
+
+    converted = []
+
+    for geom_details in geom_configs:
+        gis_file = geom_details["gis_file"]
+        if gis_file in converted or is_parquet_input(gis_file):
+            continue
+
+        print(f"Converting {gis_file}")
+
+        read_params = {
+            k: v
+            for k, v in geom_details.get("gis_read_params", {}).items()
+            if k not in ["columns", "max_features", "nrows"]
+        }  # boundary files are shared between census years, so keep all columns
+
+        data = utils.read_file(gis_file, read_params)
+
+        if geom_details.get("gis_lat_long", False) is True:
+            data = utils.process_coords(
+                data,
+                geom_details["gis_long_field"],
+                geom_details["gis_lat_field"],
+                geom_details["gis_projection"],
+            )
+
+        utils.convert_to_geoparquet(data, pathlib.Path(gis_file).with_suffix(".parquet"))
+        converted.append(gis_file)
+
+    return converted
+
+
+if __name__ == "__main__":
+
+    with open("../configuration/targetgeom_config.yaml", "r") as f:
+        tg_config = yaml.load(f, Loader=yaml.FullLoader)
+
+    with open("../configuration/gen_config.yaml", "r") as f:
+        gen_config = yaml.load(f, Loader=yaml.FullLoader)
+
+    geom_configs = list(tg_config.values())
+
+    for cen_country, year_list in gen_config["census_years"].items():
+        for cen_year in year_list:
+            with open(f"../configuration/{cen_country}_{cen_year}_config.yaml", "r") as f:
+                config = yaml.load(f, Loader=yaml.FullLoader)
+            geom_configs.extend(config["boundaries"].values())
+
+    convert_inputs(geom_configs)
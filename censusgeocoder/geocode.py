@@ -1,5 +1,8 @@
+import time
+
 import pandas as pd
 import recordlinkage
+import telemetry
 import utils
 
 
@@ -53,6 +56,9 @@ class GeoCode:
     final_score_field: str
         Label to set name of pd.Series containing final comparison scores.
 
+    scoring_time: float
+        Time (s) spent computing string comparison scores of candidate links.
+
     cand_links: pd.MultiIndex
         A pd.MultiIndex of two records, one from `census_data` and one from `target_geometry_data`.
 
@@ -68,6 +74,10 @@ class GeoCode:
         }
         ```
 
+    block_stats: pd.DataFrame
+        If `block_stats` is True, a pd.DataFrame of matching statistics for each geo-blocking unit of `census_data`, see
+        `_calc_block_stats()`. Otherwise None.
+
     Notes
     -------
 
@@ -93,6 +103,15 @@ class GeoCode:
 
     `_calc_finalscore()`
         Calculates final comparison scores, returns matches_all `pd.DataFrame` with scores added.
+
+    `_calc_block_stats()`
+        Returns `pd.DataFrame` of matching statistics for each geo-blocking unit.
+
+    `_count_pairs()`
+        Counts candidate links by geo-blocking unit before and after each threshold, if `block_stats` is True.
+
+    `_count_by_block()`
+        Counts census records (or pairs) by geo-blocking unit.
     """
 
     def __init__(
@@ -110,6 +129,7 @@ class GeoCode:
         align_thresh: int,
         comparison_method: str,
         final_score_field: str,
+        block_stats: bool = False,
     ) -> None:
         self.census_data = census_data
         self.census_geocode_field = census_geocode_field
@@ -128,6 +148,11 @@ class GeoCode:
         self.comparison_method = comparison_method
         self.final_score_field = final_score_field
 
+        self.scoring_time = 0.0
+        self._pair_counts = (
+            {} if block_stats else None
+        )  # pairs by geo-blocking unit at each step of `_compare()`, only counted if `block_stats`
+
         self.census_data = self.census_data.set_index(
             self.census_indexfield
         )  # set index of census data to specified index field
@@ -142,6 +167,9 @@ class GeoCode:
 
         self.rslts_dict = self._process_results(self.tgt_rslts)
 
+        self.block_stats = self._calc_block_stats() if block_stats else None
+
+    @telemetry.stage(data_attr=None)
     def _create_candidate_links(
         self,
     ) -> pd.MultiIndex:
@@ -180,6 +208,7 @@ class GeoCode:
 
         return target_candidate_links
 
+    @telemetry.stage(data_attr=None)
     def _compare(
         self,
         target_candidate_links,
@@ -212,15 +241,21 @@ class GeoCode:
                 target_comparison,
             )
 
+            start = time.perf_counter()
             target_results = target_comparison.compute(
                 target_candidate_links, self.census_data, self.target_geometry_data
             )
+            self.scoring_time = time.perf_counter() - start
             target_results = target_results.sort_index()
 
+            if self._pair_counts is not None:
+                self._count_pairs(target_results)
+
             target_results = self._filterbythreshold(target_results)
 
         return target_results.reset_index()
 
+    @telemetry.stage(data_attr=None)
     def _process_results(
         self,
         target_results,
@@ -351,6 +386,141 @@ class GeoCode:
 
         return target_results.copy()
 
+    def _count_pairs(self, target_results):
+        """Counts candidate links in `target_results` by geo-blocking unit, and those meeting the `sim_thresh` and then `align_thresh`
+        thresholds (as filtered by `_filterbythreshold()`), adding the counts to `_pair_counts`.
+
+        Parameters
+        ----------
+
+        target_results: `pd.DataFrame`
+            `pd.DataFrame` of comparison scores of all candidate links, indexed by pairs of census and target geometry index values.
+
+        """
+
+        census_ids = target_results.index.get_level_values(0)
+        passed = pd.Series(True, index=target_results.index)
+
+        self._pair_counts["candidate_pairs"] = self._count_by_block(census_ids)
+
+        if self.sim_thresh is not None:
+            passed &= target_results[list(self.comparers.values())[0]] >= self.sim_thresh
+        self._pair_counts["pairs_sim_thresh"] = self._count_by_block(
+            census_ids[passed.to_numpy()]
+        )
+
+        if self.align_thresh is not None:
+            passed &= (
+                target_results[list(self.comparers.values())[1]] >= self.align_thresh
+            )
+        self._pair_counts["pairs_align_thresh"] = self._count_by_block(
+            census_ids[passed.to_numpy()]
+        )
+
+    def _count_by_block(self, census_ids) -> pd.Series:
+        """Counts `census_ids` (index values of `census_data`, repeated once per pair) by geo-blocking unit of `census_data`.
+
+        Parameters
+        ----------
+
+        census_ids: array-like
+            Index values of `census_data`.
+
+        Returns
+        ----------
+        counts: `pd.Series`
+            Number of `census_ids` in each geo-blocking unit, indexed by `census_block`.
+
+        """
+
+        census_block = list(utils.flatten(self.census_block))
+        counts = pd.Index(census_ids).value_counts()
+
+        return counts.groupby(
+            [self.census_data[x].reindex(counts.index) for x in census_block],
+            observed=True,
+        ).sum()
+
+    def _calc_block_stats(self) -> pd.DataFrame:
+        """Returns `pd.DataFrame` of matching statistics for each geo-blocking unit of `census_data`, e.g. to find blocks with
+        very many candidate links or few matches.
+
+        Returns
+        ----------
+        block_stats: `pd.DataFrame`
+            One row per geo-blocking unit (`census_block` fields), with columns:
+
+            - `census_addresses`: census records
+            - `target_names`: target geometry records
+            - `candidate_pairs`: candidate links compared
+            - `pairs_sim_thresh`: candidate links meeting `sim_thresh`
+            - `pairs_align_thresh`: candidate links meeting `sim_thresh` and `align_thresh`
+            - `scoring_s_est`: estimated time (s) spent computing comparison scores
+            - `matches`, `competing_matches`: census records in `matches` and `competing_matches`
+            - `matches_lq`: rows of `matches_lq`
+
+        Notes
+        -----
+
+        Comparison scores are computed for all candidate links at once, so `scoring_s_est` is `scoring_time` split between
+        geo-blocking units by their share of `candidate_pairs`, rather than measured per unit.
+
+        """
+
+        census_block = list(utils.flatten(self.census_block))
+        target_geom_block = list(utils.flatten(self.target_geom_block))
+        census_index = self.census_data.index.name
+        no_pairs = self._count_by_block([])
+
+        def count_results(results, unique=False):
+            if results.empty:
+                return no_pairs
+            census_ids = results[census_index]
+            return self._count_by_block(
+                census_ids.unique() if unique else census_ids
+            )
+
+        target_names = self.target_geometry_data.groupby(
+            target_geom_block, observed=True
+        ).size()
+        target_names.index = target_names.index.set_names(census_block)
+
+        block_stats = pd.concat(
+            {
+                "census_addresses": self._count_by_block(self.census_data.index),
+                "target_names": target_names,
+                "candidate_pairs": self._pair_counts.get("candidate_pairs", no_pairs),
+                "pairs_sim_thresh": self._pair_counts.get("pairs_sim_thresh", no_pairs),
+                "pairs_align_thresh": self._pair_counts.get(
+                    "pairs_align_thresh", no_pairs
+                ),
+                "matches": count_results(self.rslts_dict["matches"]),
+                "competing_matches": count_results(
+                    self.rslts_dict["competing_matches"], unique=True
+                ),
+                "matches_lq": count_results(self.rslts_dict["matches_lq"]),
+            },
+            axis=1,
+        )
+        block_stats = (
+            block_stats[block_stats["census_addresses"].notna()].fillna(0).astype(int)
+        )
+
+        total_pairs = block_stats["candidate_pairs"].sum()
+        block_stats.insert(
+            block_stats.columns.get_loc("matches"),
+            "scoring_s_est",
+            (
+                (block_stats["candidate_pairs"] / total_pairs * self.scoring_time).round(4)
+                if total_pairs > 0
+                else 0.0
+            ),
+        )
+
+        return block_stats.sort_values(
+            "candidate_pairs", ascending=False
+        ).reset_index()
+
     def _calc_finalscore(self, matches_all) -> pd.DataFrame:
         """Calculates final comparison scores, adding these to the matches_all dataframe.
 
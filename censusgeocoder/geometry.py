@@ -1,7 +1,14 @@
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import copy
+import dataclasses
 from dataclasses import dataclass, field
+import pathlib
+import shapely
+import telemetry
 import utils
+from geomstore import GeometryStore
 
 point = "point"
 line = "line"
@@ -67,6 +74,12 @@ class Geometry_vars:
     gis_projection: str
         CRS Projection of the geometry data, e.g. "EPSG:27700"
 
+    dissolve_method: str
+        Method used to dissolve geometries in `process()`, passed to `utils.dissolve_geometries()`. "unary_union" (default),
+        "coverage", which is faster for boundaries made up of adjacent, non-overlapping polygons, or "collect", which gathers
+        geometries into multi-part geometries without merging them. Also used to dissolve line target geometries
+        split by boundaries in `TargetGeometry.assigntoboundary()`.
+
     process
     ##############Need to add.
 
@@ -104,6 +117,8 @@ class Geometry_vars:
     gis_lat_field: str = None
     gis_projection: str = None
 
+    dissolve_method: str = "unary_union"
+
     process: bool = True
 
     geom_type: str = field(init=False)
@@ -159,6 +174,27 @@ class TargetGeometry_vars(Geometry_vars):
     blockcols: str | list
         Name or list of names of pd.Series columns containing the geo-blocking ids, e.g. ConParID, CEN_1851 etc
 
+    geometry_store: bool
+        Indicates whether to write geometries to a memory-mapped `geomstore.GeometryStore` keyed by `item_per_unit_uid`
+        in `TargetGeometry.create_tgforlinking()`.
+
+    gis_tile_pattern: str
+        Glob pattern (e.g. "*RoadLink.shp") of tile files in `gis_file` directory. If set, target geometry data is processed one tile
+        at a time by `TargetGeometry.process_by_tile()`.
+
+    tile_halo: float
+        Distance (in units of `gis_projection`) around each tile within which boundaries are used to assign the tile's entities.
+
+    tile: str
+        Id of tile being processed by `TargetGeometry.process_by_tile()`, added to output file names. Set internally.
+
+    dtype_mode: str
+        "numpy" or "arrow". If "arrow", `gis_field_to_clean` and `gis_geocode_field` are stored as "string[pyarrow]", see `utils.set_dtypes()`.
+
+    block_code_field: str
+        Name of pd.Series containing the integer code of each geo-blocking unit, added by `TargetGeometry.add_block_codes()`.
+        If set, used instead of `blockcols` to group, partition and block target geometry data. Set internally.
+
     """
 
     gis_field_to_clean: str = None
@@ -177,12 +213,34 @@ class TargetGeometry_vars(Geometry_vars):
 
     blockcols: str | list = None
 
+    geometry_store: bool = True
+
+    gis_tile_pattern: str = None
+    tile_halo: float = 0
+    tile: str = None
+
+    dtype_mode: str = "numpy"
+
+    block_code_field: str = None
+
 
 @dataclass
 class Boundary_vars(Geometry_vars):
-    """Class for storing boundary variables"""
+    """Class for storing boundary variables
 
-    pass
+    Attributes
+    ----------
+
+    simplify_tolerance: float
+        Tolerance (in units of `gis_projection`, e.g. metres) used to simplify boundaries in `Boundary.simplify()`.
+
+    precision_grid_size: float
+        Size of grid (in units of `gis_projection`, e.g. metres) that boundary vertices are snapped to in `Boundary.simplify()`.
+
+    """
+
+    simplify_tolerance: float = None
+    precision_grid_size: float = None
 
 
 class Geometry:
@@ -203,7 +261,9 @@ class Geometry:
 
     `process()`
         Processes geometry data by adding lookup if available and dissolving geometries on specified uid field.
-        
+
+    `read_processed_geom()`
+        Reads geometry data written by `process()`.
 
     Notes
     -----
@@ -241,17 +301,31 @@ class Geometry:
                 f"vars is {vars.__class__.__name__} must be {Geometry_vars.__name__}"
             )
 
+    @telemetry.stage()
     def get_geometry_data(
         self,
+        dtype_mode="numpy",
+        string_fields=None,
     ):
         """Reads geometry data into a gpd.GeoDataFrame, checks if geometries stored in 2 lat/long columns - creates a WKT geometry column if so;
         also sets geometry type (which determines boundary assignment method for target geometries).
 
+        Parameters
+        ----------
+
+        dtype_mode: str, optional
+            "numpy" or "arrow", passed to `utils.read_file()`.
+
+        string_fields: list, optional
+            Names of pd.Series containing text, read as "string[pyarrow]" if `dtype_mode` is "arrow".
+
         """
 
         self.data = utils.read_file(
             self.vars.gis_file,
             self.vars.gis_read_params,
+            dtype_mode,
+            string_fields,
         )
 
         if (
@@ -266,6 +340,7 @@ class Geometry:
 
         self._setgeomtype()
 
+    @telemetry.stage()
     def process(
         self,
     ):
@@ -286,12 +361,18 @@ class Geometry:
 
             self.vars.uid = self.vars.lkup_field_censuslink
 
-            self.data = self.data.dissolve(
-                by=self.vars.lkup_field_censuslink, as_index=False
+            self.data = utils.dissolve_geometries(
+                self.data,
+                by=self.vars.lkup_field_censuslink,
+                method=self.vars.dissolve_method,
             )
 
         else:
-            self.data = self.data.dissolve(by=self.vars.gis_uid_field, as_index=False)
+            self.data = utils.dissolve_geometries(
+                self.data,
+                by=self.vars.gis_uid_field,
+                method=self.vars.dissolve_method,
+            )
             self.vars.uid = self.vars.gis_uid_field
 
         self._write_geom_data(
@@ -299,10 +380,21 @@ class Geometry:
             self.vars.gis_write_params,
         )
 
-    def read_processed_geom(  # TO DEAL WITH
+    @telemetry.stage()
+    def read_processed_geom(
         self,
     ):
-        self.data = self._read_geometry_file()  # change to utils read file
+        """Reads geometry data written by `process()`, so that it can be used without re-processing (e.g. by a later stage of
+        `pipeline`). Sets `uid` and geometry type as `process()` and `get_geometry_data()` do."""
+
+        self.data = self._read_geom_data("processed", self.vars.gis_write_params)
+
+        if self.vars.lkup_file is not None:
+            self.vars.uid = self.vars.lkup_field_censuslink
+        else:
+            self.vars.uid = self.vars.gis_uid_field
+
+        self._setgeomtype()
 
     def _setgeomtype(
         self,
@@ -349,7 +441,45 @@ class Geometry:
 
         """
 
-        filename = f"{self.vars.census_country}_{self.vars.census_year}_{self.vars.geom_name}_{status}{self.vars.output_filetype}"
+        output_path_components = self._output_path_components(
+            status, self.vars.output_filetype
+        )
+
+        utils.write_df_to_file(self.data, output_path_components, params)
+
+    def _read_geom_data(self, status, params):
+        """Reads geometry data written by `_write_geom_data()`, returns `gpd.GeoDataFrame`.
+
+        Parameters
+        ----------
+
+        status: str
+            Description of output file, e.g. 'processed' indicating stage of geocoding process that file is from.
+
+        params: dict
+            Dictionary of parameters that were passed to `utils.write_df_to_file()` to write the file.
+
+        """
+        output_file_path = pathlib.Path(
+            *self._output_path_components(status, self.vars.output_filetype)
+        )
+
+        data = utils.read_output_file(output_file_path, params)
+
+        if type(data) is pd.DataFrame and "geometry" in data.columns:
+            crs = utils.read_crs(output_file_path)  # CRS of data written, which `gis_projection` may not set
+            data = gpd.GeoDataFrame(
+                data,
+                geometry=gpd.GeoSeries.from_wkt(data["geometry"]),
+                crs=crs if crs is not None else self.vars.gis_projection,
+            )
+
+        return data
+
+    def _output_path_components(self, status, suffix):
+        """Returns list of path components of output file for `status`, e.g. 'processed', with file suffix `suffix`."""
+
+        filename = f"{self.vars.census_country}_{self.vars.census_year}_{self.vars.geom_name}_{status}{suffix}"
         output_path_components = [
             str(x)
             for x in [
@@ -361,7 +491,7 @@ class Geometry:
             ]
         ]
 
-        utils.write_df_to_file(self.data, output_path_components, params)
+        return output_path_components
 
 
 class TargetGeometry(Geometry):
@@ -373,6 +503,9 @@ class TargetGeometry(Geometry):
     `assigntoboundary()`
         Assigns each entity in the target geometry dataset to a boundary in the boundary dataset
 
+    `add_block_codes()`
+        Adds the integer code of each geo-blocking unit from a block dictionary shared with census data.
+
     `dedup_addresses()`
         Deduplicates addresses in geometry dataset.
 
@@ -382,9 +515,27 @@ class TargetGeometry(Geometry):
     `create_tgforlinking()`
         Writes to output file slim version of target geometry dataset with only fields/values needed by `census.geocode()`
 
+    `read_tgforlinking()`
+        Reads slim version of target geometry dataset written by `create_tgforlinking()`.
+
+    `compare_boundary_assignment()`
+        Counts entities in the target geometry dataset assigned to different boundaries by two versions of the same boundaries.
+
     `clean_tg()`
         Cleans target geometry dataset.
 
+    `process_by_tile()`
+        Processes a target geometry dataset stored as tiles one tile at a time, from reading through to `create_tgforlinking()`.
+
+    `partition_by_block()`
+        Sorts target geometry data by geo-blocking unit and indexes the rows of each geo-blocking unit.
+
+    `get_blocks()`
+        Returns the rows of target geometry data in the geo-blocking units of another dataset (e.g. a census subset).
+
+    `without_data()`
+        Returns copy of `TargetGeometry` without data, e.g. to send to worker processes that attach to the data in shared memory.
+
     Notes
     -----
 
@@ -393,6 +544,9 @@ class TargetGeometry(Geometry):
     `_addvars()`
         Checks vars is type `TargetGeometry_vars`
 
+    `_block_fields()`
+        Returns list of fields identifying geo-blocking units, `[block_code_field]` if set otherwise `blockcols`.
+
     """
 
     def __init__(
@@ -421,6 +575,7 @@ class TargetGeometry(Geometry):
                 f"vars is {vars.__class__.__name__} must be {TargetGeometry_vars.__name__}"
             )
 
+    @telemetry.stage()
     def assigntoboundary(
         self,
         boundary,
@@ -440,16 +595,21 @@ class TargetGeometry(Geometry):
         Method of assigning target geometry to boundary depends on geometry type of target geometry. Point data is assigned by intersection with boundary,
         line data assigned by overlaying and segmenting line on boundary borders to create new geometries when lines cross boundaries. See Documentation for more information.
 
+        Points are assigned with `utils.assign_points_to_polygons()`, which only adds the boundary uid field(s) to the target geometry data; points on
+        a shared boundary edge are assigned to a single boundary.
+
         """
         self.vars.blockcols = boundary.vars.uid
 
         if self.vars.geom_type == point:
-            self.data = gpd.sjoin(
-                left_df=self.data,
-                right_df=boundary.data,
-                predicate="intersects",
-                how="inner",
-            ).drop(columns=["index_right"])
+            point_idx, boundary_idx = utils.assign_points_to_polygons(
+                self.data.geometry, boundary.data.geometry
+            )
+
+            boundary_cols = list(utils.flatten(self.vars.blockcols))
+            self.data = self.data.iloc[point_idx].copy()
+            for col in boundary_cols:
+                self.data[col] = boundary.data[col].to_numpy()[boundary_idx]
 
         elif self.vars.geom_type == line:
             self.data = gpd.overlay(
@@ -469,8 +629,100 @@ class TargetGeometry(Geometry):
 
             dissolve_cols.append(self.vars.gis_uid_field)
 
-            self.data = self.data.dissolve(by=dissolve_cols, as_index=False)
+            self.data = utils.dissolve_geometries(
+                self.data,
+                by=dissolve_cols,
+                method=self.vars.dissolve_method,
+            )
+
+    def get_geometry_data(
+        self,
+    ):
+        """Reads target geometry data, see `Geometry.get_geometry_data()`. Text fields (`gis_field_to_clean`, `gis_geocode_field`) are read as
+        "string[pyarrow]" if `vars.dtype_mode` is "arrow"."""
+
+        super().get_geometry_data(
+            self.vars.dtype_mode,
+            [
+                x
+                for x in [self.vars.gis_field_to_clean, self.vars.gis_geocode_field]
+                if x is not None
+            ],
+        )
+
+    def read_processed_geom(
+        self,
+    ):
+        """Reads target geometry data written by `process()`, see `Geometry.read_processed_geom()`. Sets `gis_geocode_field` to the
+        cleaned field if `gis_field_to_clean` is set, as `clean_tg()` does."""
+
+        super().read_processed_geom()
+
+        if self.vars.gis_field_to_clean is not None:
+            self.vars.gis_geocode_field = (
+                f"{self.vars.gis_field_to_clean}{self.vars.cleaned_field_suffix}"
+            )
+
+        self.data = utils.set_dtypes(
+            self.data,
+            self.vars.dtype_mode,
+            string_fields=[self.vars.gis_field_to_clean, self.vars.gis_geocode_field],
+        )
+
+    @telemetry.stage()
+    def add_block_codes(
+        self,
+        block_dictionary,
+        block_code_field,
+    ):
+        """Adds the integer code of each geo-blocking unit (`blockcols`) from `block_dictionary` to target geometry data as `block_code_field`.
+        Geo-blocking units not in `block_dictionary` (e.g. with no census addresses) are given new codes. Writes the extended block dictionary to file.
+
+        Parameters
+        ----------
+
+        block_dictionary: pd.DataFrame
+            pd.DataFrame mapping geo-blocking ids to integer codes, e.g. `census.Census.block_dictionary`.
+
+        block_code_field: str
+            Name of pd.Series of codes in `block_dictionary`.
+
+        Returns
+        -------
+
+        block_dictionary: pd.DataFrame
+            `block_dictionary` extended with the geo-blocking units of target geometry data.
+
+        """
+        blockcols = list(utils.flatten(self.vars.blockcols))
+
+        block_dictionary = utils.create_block_dictionary(
+            self.data, blockcols, block_code_field, block_dictionary
+        )
+        self.data = utils.add_block_codes(
+            self.data, blockcols, block_dictionary, block_code_field
+        )
+        self.vars.block_code_field = block_code_field
+
+        utils.write_df_to_file(
+            block_dictionary,
+            self._output_path_components("block_dictionary", self.vars.output_filetype),
+            self.vars.gis_write_params,
+        )
+
+        return block_dictionary
+
+    def _block_fields(
+        self,
+    ):
+        """Returns list of fields identifying geo-blocking units, `[block_code_field]` if set otherwise `blockcols`."""
+
+        if self.vars.block_code_field is not None:
+            return [self.vars.block_code_field]
+        else:
+            return list(utils.flatten(self.vars.blockcols))
 
+    @telemetry.stage()
     def dedup_addresses(
         self,
     ):
@@ -507,12 +759,13 @@ class TargetGeometry(Geometry):
                     self.vars.item_per_unit_uid
                 ).transform("size")
 
-                dist_grouped = (
-                    self.data[self.data["count"] <= self.vars.dedup_max_points]
-                    .groupby(by=self.vars.item_per_unit_uid)["geometry"]
-                    .apply(lambda x: utils.calc_dist(x))
-                    .reset_index(name="dist_calc")
-                )
+                within_max_points = self.data["count"] <= self.vars.dedup_max_points
+
+                dist_grouped = utils.calc_dist_by_group(
+                    self.data.loc[within_max_points, self.vars.item_per_unit_uid],
+                    self.data.geometry.x[within_max_points].to_numpy(),
+                    self.data.geometry.y[within_max_points].to_numpy(),
+                ).rename_axis(self.vars.item_per_unit_uid).reset_index(name="dist_calc")
 
                 gdf_final = pd.merge(
                     left=self.data,
@@ -534,10 +787,11 @@ class TargetGeometry(Geometry):
                 ]
 
                 gdf_multi_only = (
-                    gdf_multi_only.groupby(by=self.vars.item_per_unit_uid)[
-                        self.vars.gis_uid_field
-                    ]
-                    .apply(lambda x: str(x.to_list()))
+                    utils.list_by_group_as_str(
+                        gdf_multi_only[self.vars.item_per_unit_uid],
+                        gdf_multi_only[self.vars.gis_uid_field],
+                    )
+                    .rename_axis(self.vars.item_per_unit_uid)
                     .reset_index(name=f"{self.vars.gis_uid_field}_removed")
                 )
                 self.data = pd.merge(
@@ -557,18 +811,96 @@ class TargetGeometry(Geometry):
 
                 self._write_geom_data("deduped_distcount2", self.vars.gis_write_params)
 
+    @telemetry.stage()
+    def compare_boundary_assignment(
+        self,
+        boundary,
+        other_boundary,
+    ) -> pd.DataFrame:
+        """Counts entities in the target geometry dataset assigned to different boundaries by `boundary` and `other_boundary`,
+        e.g. full precision and simplified versions of the same boundaries. Writes counts to file and returns them.
+
+        Parameters
+        ----------
+
+        boundary: `Boundary`
+            An instance of `Boundary` class, e.g. full precision boundaries.
+
+        other_boundary: `Boundary`
+            An instance of `Boundary` class with the same uid field(s), e.g. boundaries returned by `Boundary.simplify()`.
+
+        Returns
+        -------
+
+        assignment_changes: `pd.DataFrame`
+            `pd.DataFrame` with the number of entities, number assigned to different boundaries, and percentage changed.
+
+        Notes
+        -----
+
+        Entities are assigned to boundaries with `utils.assign_to_polygons()`. Line entities count as changed if the set of boundaries
+        they intersect changes. Must be run before `assigntoboundary()`.
+
+        """
+        blockcols = list(utils.flatten(boundary.vars.uid))
+
+        assignments = []
+        for bndry in [boundary, other_boundary]:
+            geom_idx, boundary_idx = utils.assign_to_polygons(
+                self.data.geometry, bndry.data.geometry
+            )
+            assignment = bndry.data[blockcols].iloc[boundary_idx].reset_index(drop=True)
+            assignment["geom_idx"] = geom_idx
+            assignments.append(assignment)
+
+        compared = pd.merge(
+            left=assignments[0],
+            right=assignments[1],
+            on=["geom_idx"] + blockcols,
+            how="outer",
+            indicator=True,
+        )
+        n_changed = compared.loc[compared["_merge"] != "both", "geom_idx"].nunique()
+
+        assignment_changes = pd.DataFrame(
+            {
+                "boundary": [boundary.vars.geom_name],
+                "other_boundary": [other_boundary.vars.geom_name],
+                "entities": [len(self.data)],
+                "entities_changed": [n_changed],
+                "percent_changed": [
+                    100 * n_changed / len(self.data) if len(self.data) > 0 else 0.0
+                ],
+            }
+        )
+        print(
+            f"{n_changed} of {len(self.data)} {self.vars.geom_name} entities assigned to different boundaries by {other_boundary.vars.geom_name}"
+        )
+
+        utils.write_df_to_file(
+            assignment_changes,
+            self._output_path_components(
+                f"assignment_changes_{other_boundary.vars.geom_name}",
+                self.vars.output_filetype,
+            ),
+            self.vars.gis_write_params,
+        )
+
+        return assignment_changes
+
+    @telemetry.stage()
     def create_uid_of_geocode_field(
         self,
     ):
         """Assigns uid to each address by grouping field to geocode by boundary fields to create unique groups of addresses in each geo-blocking unit."""
 
-        groupby_cols = []
-        groupby_cols.extend([x for x in utils.flatten(self.vars.blockcols)])
+        groupby_cols = self._block_fields()
         groupby_cols.append(self.vars.gis_geocode_field)
         self.data[self.vars.item_per_unit_uid] = self.data.groupby(
             groupby_cols
         ).ngroup()
 
+    @telemetry.stage()
     def clean_tg(
         self,
     ):
@@ -590,13 +922,207 @@ class TargetGeometry(Geometry):
 
         self._write_geom_data("standardised", self.vars.gis_write_params)
 
+    @telemetry.stage()
+    def process_by_tile(
+        self,
+        boundary,
+        block_dictionary=None,
+        block_code_field=None,
+    ):
+        """Processes a target geometry dataset stored as tiles (files matching `vars.gis_tile_pattern` in the `vars.gis_file` directory),
+        e.g. OS Open Roads, one tile at a time. Equivalent to running `get_geometry_data()`, `clean_tg()`, `process()`, `assigntoboundary()`,
+        `create_uid_of_geocode_field()`, `dedup_addresses()`, and `create_tgforlinking()`, but only one tile's geometries are held in memory at once.
+
+        Parameters
+        ----------
+
+        boundary: `Boundary`
+            An instance of `Boundary` class.
+
+        block_dictionary: pd.DataFrame, optional
+            Block dictionary passed to `add_block_codes()`, e.g. `census.Census.block_dictionary`.
+
+        block_code_field: str, optional
+            Name of pd.Series of codes in `block_dictionary`.
+
+        Returns
+        -------
+
+        block_dictionary: pd.DataFrame | None
+            `block_dictionary` extended by `add_block_codes()`.
+
+        Notes
+        -----
+
+        Each tile is read, cleaned, dissolved and assigned to the boundaries within `vars.tile_halo` of the tile; geometry outputs are written
+        per tile to a `tiles` sub-directory. Only the attributes of each tile (no geometries) are kept, so uids and deduplication can be calculated
+        across tiles, e.g. for streets with segments in more than one tile. If `vars.geometry_store` is True, the tiles' geometries are then
+        read back one tile at a time to write the geometry store. Distance-based deduplication (`dedup: True`) needs all geometries at once, so
+        is not supported.
+
+        """
+        if self.vars.dedup is True:
+            raise ValueError(
+                f"{self.vars.geom_name}: dedup is not supported when processing by tile"
+            )
+
+        self.vars.blockcols = boundary.vars.uid
+        blockcols = list(utils.flatten(self.vars.blockcols))
+
+        tile_files = utils.get_tile_files(self.vars.gis_file, self.vars.gis_tile_pattern)
+
+        tile_data_list = []
+        processed_tiles = []
+        crs = None
+
+        for tile_id, tile_file in tile_files.items():
+            print(f"Processing {self.vars.geom_name} tile {tile_id}")
+
+            tile = TargetGeometry(
+                dataclasses.replace(self.vars, gis_file=tile_file, tile=tile_id)
+            )
+            tile.get_geometry_data()
+            if tile.data.empty:
+                continue
+            tile.clean_tg()
+            tile.process()
+
+            tile_boundary = copy.copy(boundary)
+            tile_boundary.data = boundary.data.iloc[
+                boundary.data.sindex.query(
+                    shapely.box(*tile.data.total_bounds).buffer(self.vars.tile_halo)
+                )
+            ]
+            tile.assigntoboundary(tile_boundary)
+            tile._write_geom_data("processed_assigned", self.vars.gis_write_params)
+
+            self.vars.geom_type = tile.vars.geom_type
+            self.vars.gis_geocode_field = tile.vars.gis_geocode_field
+            crs = tile.data.crs
+            tile_data_list.append(pd.DataFrame(tile.data.drop(columns="geometry")))
+            processed_tiles.append(
+                tile.without_data()
+            )  # geometries are read back from `processed_assigned` files, so only one tile's are held in memory at once
+
+        self.data = (
+            pd.concat(tile_data_list, ignore_index=True)
+            .drop_duplicates(subset=blockcols + [self.vars.gis_uid_field])
+            .copy()
+        )  # segments of the same entity in the same boundary may be in more than one tile
+        del tile_data_list
+
+        if block_dictionary is not None:
+            block_dictionary = self.add_block_codes(block_dictionary, block_code_field)
+
+        self.create_uid_of_geocode_field()
+        self.dedup_addresses()
+
+        if self.vars.geometry_store is True:
+            uid_lkup = self.data[blockcols + [self.vars.gis_uid_field, self.vars.item_per_unit_uid]]
+
+            def tile_geometries():
+                for tile in processed_tiles:
+                    tile_data = pd.merge(
+                        left=tile._read_geom_data(
+                            "processed_assigned", self.vars.gis_write_params
+                        ),
+                        right=uid_lkup,
+                        on=blockcols + [self.vars.gis_uid_field],
+                        how="inner",
+                    )
+                    yield (tile_data[self.vars.item_per_unit_uid], tile_data.geometry)
+
+            self.geometry_store = GeometryStore.write_chunks(
+                pathlib.Path(*self._output_path_components("geometry", "")),
+                tile_geometries(),
+                crs=crs,
+            )
+
+        self.create_tgforlinking()
+
+        return block_dictionary
+
+    def _output_path_components(self, status, suffix):
+        """Returns list of path components of output file for `status`, with file suffix `suffix`. Output files for a tile
+        (see `process_by_tile()`) have the tile id added to their name and are written to a `tiles` sub-directory."""
+
+        if self.vars.tile is None:
+            return super()._output_path_components(status, suffix)
+
+        output_path_components = super()._output_path_components(
+            f"{status}_{self.vars.tile}", suffix
+        )
+
+        return output_path_components[:-1] + ["tiles", output_path_components[-1]]
+
+    @telemetry.stage()
+    def read_tgforlinking(
+        self,
+        block_code_field=None,
+    ):
+        """Reads slim target geometry data written by `create_tgforlinking()`, so that census data can be geocoded without re-processing
+        the target geometry data. Sets `gis_geocode_field`, `blockcols` and `block_code_field` from the fields in the file.
+
+        Parameters
+        ----------
+
+        block_code_field: str, optional
+            Name of pd.Series of geo-blocking unit codes added by `add_block_codes()`, if any.
+
+        """
+
+        if self.vars.gis_field_to_clean is not None:
+            self.vars.gis_geocode_field = (
+                f"{self.vars.gis_field_to_clean}{self.vars.cleaned_field_suffix}"
+            )
+
+        self.data = utils.read_output_file(
+            pathlib.Path(*self._output_path_components("slim", self.vars.output_filetype)),
+            self.vars.gis_write_params,
+            self.vars.dtype_mode,
+            [self.vars.gis_geocode_field],
+        )
+
+        self.vars.block_code_field = (
+            block_code_field if block_code_field in self.data.columns else None
+        )
+
+        blockcols = [
+            col
+            for col in self.data.columns
+            if col
+            not in [
+                self.vars.gis_geocode_field,
+                self.vars.item_per_unit_uid,
+                self.vars.block_code_field,
+            ]
+        ]
+        self.vars.blockcols = blockcols if len(blockcols) > 1 else blockcols[0]
+
+        self.partition_by_block()
+
+    @telemetry.stage()
     def create_tgforlinking(
         self,
     ):
-        """Writes to output file slim version of target geometry dataset with only fields/values needed by `census.geocode()`"""
+        """Writes to output file slim version of target geometry dataset with only fields/values needed by `census.geocode()`.
+        If `vars.geometry_store` is True, first writes the geometries to a `geomstore.GeometryStore` keyed by `item_per_unit_uid`,
+        so that geometries of matched addresses can be looked up without re-reading geometry output files."""
+
+        if self.vars.geometry_store is True and isinstance(
+            self.data, gpd.GeoDataFrame
+        ):  # geometries already written by `process_by_tile()` if processed by tile
+            self.geometry_store = GeometryStore.write(
+                pathlib.Path(*self._output_path_components("geometry", "")),
+                self.data[self.vars.item_per_unit_uid],
+                self.data.geometry,
+                crs=self.data.crs,
+            )
 
         col_list = []
         col_list.extend(list(utils.flatten(self.vars.blockcols)))
+        if self.vars.block_code_field is not None:
+            col_list.append(self.vars.block_code_field)
         col_list.extend(
             [
                 self.vars.gis_geocode_field,
@@ -604,8 +1130,87 @@ class TargetGeometry(Geometry):
             ]
         )
         self.data = self.data[col_list].copy()
+        self.partition_by_block()
         self._write_geom_data("slim", self.vars.gis_write_params)
 
+    @telemetry.stage()
+    def partition_by_block(
+        self,
+    ):
+        """Sorts target geometry data by geo-blocking unit (`block_code_field` if set, otherwise `blockcols`) and creates `block_index`,
+        a pd.DataFrame of the ids of each geo-blocking unit and the start and stop positions of its rows in the sorted data.
+        Used by `get_blocks()` so that each census subset is only compared with the target geometry data in its geo-blocking units.
+        """
+
+        blockcols = self._block_fields()
+
+        self.data = self.data.sort_values(blockcols, kind="stable", ignore_index=True)
+
+        starts = np.flatnonzero(~self.data.duplicated(subset=blockcols).to_numpy())
+
+        self.block_index = self.data.loc[starts, blockcols].reset_index(drop=True)
+        self.block_index["start"] = starts
+        self.block_index["stop"] = np.append(starts[1:], len(self.data))
+
+    @telemetry.stage()
+    def get_blocks(
+        self,
+        block_data,
+        block_fields,
+    ):
+        """Returns the rows of target geometry data in the geo-blocking units present in `block_data`.
+
+        Parameters
+        ----------
+
+        block_data: pd.DataFrame
+            pd.DataFrame (e.g. a census subset) containing geo-blocking ids.
+
+        block_fields: str | list
+            Name or list of names of pd.Series in `block_data` containing the geo-blocking ids (or code), in the same order as `blockcols`.
+
+        Returns
+        -------
+
+        pd.DataFrame
+            Target geometry data in the geo-blocking units of `block_data`.
+
+        """
+
+        if getattr(self, "block_index", None) is None:
+            self.partition_by_block()
+
+        block_fields = list(utils.flatten(block_fields))
+        blockcols = self._block_fields()
+
+        blocks = (
+            block_data[block_fields]
+            .dropna()
+            .drop_duplicates()
+            .merge(self.block_index, left_on=block_fields, right_on=blockcols)
+            .sort_values("start")
+        )
+
+        lengths = (blocks["stop"] - blocks["start"]).to_numpy()
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) + np.repeat(
+            blocks["start"].to_numpy() - offsets, lengths
+        )
+
+        return self.data.iloc[positions]
+
+    def without_data(
+        self,
+    ):
+        """Returns shallow copy of `TargetGeometry` with `data` set to `None` and without `geometry_store`, keeping `vars` and `block_index`,
+        so that it can be pickled to worker processes cheaply (see `census.Census.geocode()`)."""
+
+        target_geometry = copy.copy(self)
+        target_geometry.data = None
+        target_geometry.__dict__.pop("geometry_store", None)
+
+        return target_geometry
+
 
 class Boundary(Geometry):
     """
@@ -617,6 +1222,9 @@ class Boundary(Geometry):
     `merge_boundaries()`
         Merges boundaries, returns `Boundary` class containing merged boundaries data.
 
+    `simplify()`
+        Simplifies boundaries, returns `Boundary` class containing simplified boundaries data.
+
     Notes
     -----
 
@@ -652,6 +1260,7 @@ class Boundary(Geometry):
 
         self.merge_method = "intersection"  # sets merge method used for combining more than one boundary dataset
 
+    @telemetry.stage()
     def merge_boundaries(
         self,
         boundary_list,
@@ -670,6 +1279,12 @@ class Boundary(Geometry):
         merged_boundaries: `Boundary`
             `Boundary` class containing merged boundaries data.
 
+        Notes
+        -----
+
+        Each boundary in `boundary_list` is merged in turn with the result of the previous merge, so any number of boundaries can be merged.
+        Intersections are computed by `utils.overlay_intersection()`, which only overlays pairs of polygons found by the spatial index.
+
         """
         boundary_uids = []
         boundary_uids.append(self.vars.uid)
@@ -688,14 +1303,23 @@ class Boundary(Geometry):
             )
         )
 
+        merged_boundaries.data = self.data
+
         for boundary in boundary_list:
             boundary_uids.append(boundary.vars.uid)
-            merged_boundaries.data = gpd.overlay(
-                self.data,
-                boundary.data,
-                how=self.merge_method,
-                keep_geom_type=True,
-            )
+
+            if self.merge_method == "intersection":
+                merged_boundaries.data = utils.overlay_intersection(
+                    merged_boundaries.data,
+                    boundary.data,
+                )
+            else:
+                merged_boundaries.data = gpd.overlay(
+                    merged_boundaries.data,
+                    boundary.data,
+                    how=self.merge_method,
+                    keep_geom_type=True,
+                )
 
         merged_boundaries._setgeomtype()
         merged_boundaries.vars.uid = boundary_uids
@@ -703,3 +1327,54 @@ class Boundary(Geometry):
         merged_boundaries._write_geom_data("processed", self.vars.gis_write_params)
 
         return merged_boundaries
+
+    @telemetry.stage()
+    def simplify(
+        self,
+    ):
+        """Simplifies boundaries, returns `Boundary` class containing simplified boundaries data.
+
+        Returns
+        -------
+
+        simplified_boundaries: `Boundary`
+            `Boundary` class containing boundaries simplified with `vars.simplify_tolerance` and snapped to a grid of
+            `vars.precision_grid_size` by `utils.simplify_polygons()`. Named `<geom_name>_simplified`.
+
+        Notes
+        -----
+
+        Fewer vertices make overlays in `merge_boundaries()` and `TargetGeometry.assigntoboundary()` faster, at the cost of some
+        entities being assigned to a different boundary. Use `TargetGeometry.compare_boundary_assignment()` to measure this.
+
+        """
+        simplified_boundaries = Boundary(
+            dataclasses.replace(
+                self.vars,
+                geom_name=f"{self.vars.geom_name}_simplified",
+            )
+        )
+        simplified_boundaries.vars.uid = self.vars.uid
+
+        simplified_boundaries.data = self.data.copy()
+        simplified_boundaries.data[self.data.geometry.name] = gpd.GeoSeries(
+            utils.simplify_polygons(
+                self.data.geometry,
+                tolerance=self.vars.simplify_tolerance,
+                grid_size=self.vars.precision_grid_size,
+            ),
+            index=self.data.index,
+            crs=self.data.crs,
+        )
+        simplified_boundaries.data = simplified_boundaries.data[
+            ~simplified_boundaries.data.geometry.is_empty
+        ]  # boundaries smaller than the grid size collapse to empty geometries
+
+        simplified_boundaries._setgeomtype()
+
+        simplified_boundaries._write_geom_data(
+            "processed", simplified_boundaries.vars.gis_write_params
+        )
+
+        return simplified_boundaries
+
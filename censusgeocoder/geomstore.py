@@ -0,0 +1,323 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+import shapely
+
+import utils
+
+
+class GeometryStore:
+    """A read-only store of geometries keyed by an integer uid (e.g. `street_uid`), backed by memory-mapped files.
+
+    Geometries are stored as WKB in one contiguous file (`<path>.wkb`), alongside an index (`<path>_index.npy`) of
+    uid, byte offset and byte length for each geometry, sorted by uid. Both files are memory-mapped when opened, so
+    only the geometries that are looked up are read from disk and any geometry can be found in O(log n). The CRS of
+    the geometries, if any, is written to `<path>.prj` (see `utils.write_crs()`).
+
+    Attributes
+    ----------
+
+    path: `pathlib.Path`
+        Path of store, without the `.wkb` / `_index.npy` suffixes.
+
+    uids: `np.ndarray`
+        Sorted uids of geometries in the store.
+
+    crs: str
+        CRS of geometries in the store (as WKT), or `None`.
+
+    Methods
+    -------
+
+    `write()`
+        Writes geometries to a new store, returns opened `GeometryStore`.
+
+    `get_wkb()`
+        Returns WKB of geometry with given uid as a `memoryview` of the memory-mapped file (no copy).
+
+    `get()`
+        Returns geometry with given uid.
+
+    `take()`
+        Returns array of geometries for an array of uids.
+
+    `join()`
+        Adds geometries to a `pd.DataFrame` containing a uid field, returns `gpd.GeoDataFrame`.
+
+    """
+
+    def __init__(
+        self,
+        path,
+    ):
+        self.path = pathlib.Path(path)
+
+        index = np.load(self._index_path(self.path), mmap_mode="r")
+        self.uids = index[:, 0]
+        self._offsets = index[:, 1]
+        self._lengths = index[:, 2]
+
+        if self._lengths.sum() > 0:
+            self._wkb = np.memmap(self._wkb_path(self.path), dtype=np.uint8, mode="r")
+        else:
+            self._wkb = np.empty(0, dtype=np.uint8)  # cannot memory-map an empty file
+
+        self.crs = utils.read_crs(self._wkb_path(self.path))
+
+    @staticmethod
+    def _wkb_path(path):
+        return pathlib.Path(f"{path}.wkb")
+
+    @staticmethod
+    def _index_path(path):
+        return pathlib.Path(f"{path}_index.npy")
+
+    @classmethod
+    def write(
+        cls,
+        path,
+        uids,
+        geometries,
+        crs=None,
+    ):
+        """Writes geometries to a new store at `path`, returns opened `GeometryStore`.
+
+        Parameters
+        ----------
+
+        path: str
+            Path of store, without suffix.
+
+        uids: array-like
+            Integer uids of geometries. Only the first geometry of duplicated uids is stored.
+
+        geometries: array-like
+            Geometries, e.g. a `gpd.GeoSeries`, aligned with `uids`.
+
+        crs: `pyproj.CRS`, optional
+            CRS of `geometries`.
+
+        Returns
+        -------
+
+        store: `GeometryStore`
+            Store opened from the files that were written.
+
+        """
+        path = pathlib.Path(path)
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True)
+
+        uids = np.asarray(uids, dtype=np.int64)
+        uids, first = np.unique(uids, return_index=True)
+        wkb = shapely.to_wkb(np.asarray(geometries, dtype=object)[first])
+
+        lengths = np.array([len(x) for x in wkb], dtype=np.int64)
+        offsets = np.cumsum(lengths) - lengths
+
+        with open(cls._wkb_path(path), "wb") as f:
+            for geom_wkb in wkb:
+                f.write(geom_wkb)
+
+        np.save(cls._index_path(path), np.column_stack([uids, offsets, lengths]))
+        utils.write_crs(cls._wkb_path(path), crs)
+
+        return cls(path)
+
+    @classmethod
+    def write_chunks(
+        cls,
+        path,
+        chunks,
+        crs=None,
+    ):
+        """Writes geometries to a new store at `path` one chunk at a time, returns opened `GeometryStore`.
+
+        Parameters
+        ----------
+
+        path: str
+            Path of store, without suffix.
+
+        chunks: iterable
+            Iterable of (uids, geometries) tuples, e.g. one for each tile of a tiled dataset.
+
+        crs: `pyproj.CRS`, optional
+            CRS of the geometries.
+
+        Returns
+        -------
+
+        store: `GeometryStore`
+            Store opened from the files that were written.
+
+        Notes
+        -----
+
+        Only one chunk is held in memory at a time. Geometries of uids that appear more than once (e.g. a street split across
+        two tiles) are collected into a single multi-part geometry once all chunks have been written.
+
+        """
+        path = pathlib.Path(path)
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True)
+
+        index_list = [np.empty((0, 3), dtype=np.int64)]
+        offset = 0
+
+        with open(cls._wkb_path(path), "wb") as f:
+            for uids, geometries in chunks:
+                wkb = shapely.to_wkb(np.asarray(geometries, dtype=object))
+                lengths = np.array([len(x) for x in wkb], dtype=np.int64)
+
+                for geom_wkb in wkb:
+                    f.write(geom_wkb)
+
+                index_list.append(
+                    np.column_stack(
+                        [
+                            np.asarray(uids, dtype=np.int64),
+                            offset + np.cumsum(lengths) - lengths,
+                            lengths,
+                        ]
+                    )
+                )
+                offset += lengths.sum()
+
+        index = np.concatenate(index_list)
+        index = index[np.argsort(index[:, 0], kind="stable")]
+
+        if (index[1:, 0] == index[:-1, 0]).any():
+            index = cls._collect_duplicates(path, index)
+
+        np.save(cls._index_path(path), index)
+        utils.write_crs(cls._wkb_path(path), crs)
+
+        return cls(path)
+
+    @classmethod
+    def _collect_duplicates(cls, path, index):
+        """Appends a multi-part geometry for each duplicated uid in `index` (sorted by uid) to the WKB file at `path`,
+        returns index with one entry per uid."""
+
+        is_first = np.r_[True, index[1:, 0] != index[:-1, 0]]
+        group = np.cumsum(is_first) - 1
+        is_dup = np.bincount(group)[group] > 1
+
+        wkb = np.memmap(cls._wkb_path(path), dtype=np.uint8, mode="r")
+        dup_geoms = shapely.from_wkb(
+            [wkb[start : start + length].tobytes() for _, start, length in index[is_dup]]
+        )
+        del wkb
+
+        dup_group_idx = np.unique(group[is_dup], return_inverse=True)[1]
+        collected_wkb = shapely.to_wkb(
+            utils.collect_parts(dup_geoms, dup_group_idx, dup_group_idx.max() + 1)
+        )
+        lengths = np.array([len(x) for x in collected_wkb], dtype=np.int64)
+
+        offset = cls._wkb_path(path).stat().st_size
+        with open(cls._wkb_path(path), "ab") as f:
+            for geom_wkb in collected_wkb:
+                f.write(geom_wkb)
+
+        index = index[is_first].copy()
+        dup_first = np.unique(group[is_dup])
+        index[dup_first, 1] = offset + np.cumsum(lengths) - lengths
+        index[dup_first, 2] = lengths
+
+        return index
+
+    def __len__(self):
+        return len(self.uids)
+
+    def __contains__(self, uid):
+        pos = np.searchsorted(self.uids, uid)
+        return pos < len(self.uids) and self.uids[pos] == uid
+
+    def _positions(self, uids) -> np.ndarray:
+        """Returns positions of `uids` in index, -1 where uid is not in the store."""
+
+        uids = np.asarray(uids, dtype=np.int64)
+        pos = np.searchsorted(self.uids, uids)
+        pos[pos == len(self.uids)] = 0
+        found = len(self.uids) > 0 and self.uids[pos] == uids
+
+        return np.where(found, pos, -1)
+
+    def get_wkb(
+        self,
+        uid: int,
+    ) -> memoryview | None:
+        """Returns WKB of geometry with `uid` as a `memoryview` of the memory-mapped file, or None if not in store."""
+
+        pos = self._positions([uid])[0]
+        if pos == -1:
+            return None
+
+        start = self._offsets[pos]
+        return memoryview(self._wkb[start : start + self._lengths[pos]])
+
+    def get(
+        self,
+        uid: int,
+    ):
+        """Returns geometry with `uid`, or None if not in store."""
+
+        geom_wkb = self.get_wkb(uid)
+        if geom_wkb is None:
+            return None
+
+        return shapely.from_wkb(geom_wkb.tobytes())
+
+    def take(
+        self,
+        uids,
+    ) -> np.ndarray:
+        """Returns array of geometries for `uids`, with None where a uid is not in the store."""
+
+        pos = self._positions(uids)
+
+        geoms_wkb = np.full(len(pos), None, dtype=object)
+        for i, p in enumerate(pos):
+            if p != -1:
+                start = self._offsets[p]
+                geoms_wkb[i] = self._wkb[start : start + self._lengths[p]].tobytes()
+
+        return shapely.from_wkb(geoms_wkb)
+
+    def join(
+        self,
+        data: pd.DataFrame,
+        uid_field: str,
+        crs=None,
+    ):
+        """Adds geometries to `data` by matching `uid_field` to store uids, returns `gpd.GeoDataFrame`.
+
+        Parameters
+        ----------
+
+        data: `pd.DataFrame`
+            `pd.DataFrame` containing `uid_field`, e.g. geocoded matches.
+
+        uid_field: str
+            Name of pd.Series in `data` containing uids, e.g. "street_uid".
+
+        crs: optional
+            CRS of the geometries, if not the CRS of the store.
+
+        Returns
+        -------
+
+        joined: `gpd.GeoDataFrame`
+            `data` with geometry column added.
+
+        """
+        import geopandas as gpd
+
+        return gpd.GeoDataFrame(
+            data,
+            geometry=self.take(data[uid_field].to_numpy()),
+            crs=crs if crs is not None else self.crs,
+        )
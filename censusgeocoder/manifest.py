@@ -0,0 +1,270 @@
+"""Run manifest recording a hash of the inputs of each completed pipeline stage, so that re-runs can skip stages that are up to date.
+
+An entry is recorded for each task of the pipeline (see `pipeline`) and each subset geocoded by `census.Census.geocode()` when it completes.
+The hash of an entry covers its configuration, the contents of any input files named in its configuration and the hashes of the
+stages it depends on, so changing an input file or configuration value invalidates the stages using it and every stage after them.
+A stage is up to date if its recorded hash matches and all of its recorded output files still exist.
+"""
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+import pathlib
+
+MANIFEST_DIR = "manifest"
+"""Name of directory in `output_path` containing the run manifest."""
+
+
+class RunManifest:
+    """A run manifest stored as a directory of JSON files, one for each completed stage, so that stages running in different
+    processes can record entries at the same time.
+
+    Attributes
+    ----------
+
+    path: `pathlib.Path`
+        Directory of manifest.
+
+    Methods
+    -------
+
+    `hash_inputs()`
+        Returns hash of a stage's configuration, the input files it names and the hashes of stages it depends on.
+
+    `is_current()`
+        Returns True if a stage has completed with the same input hash and its output files exist.
+
+    `record()`
+        Records that a stage has completed, with its input hash and output files.
+
+    `checkpoint()`
+        Returns `Checkpoint` of a stage.
+
+    """
+
+    def __init__(
+        self,
+        path,
+    ):
+        self.path = pathlib.Path(path)
+        self._file_hashes = None
+
+    def _entry_path(self, key):
+        return self.path / f"{key}.json"
+
+    def _file_hashes_path(self):
+        return self.path / "file_hashes.json"
+
+    def hash_file(
+        self,
+        file_path,
+    ):
+        """Returns hash of contents of file (or of all files in directory) at `file_path`.
+
+        Notes
+        -----
+
+        Hashes are cached in the manifest by path, size and modification time, so large input files (e.g. census files) are only
+        read again when they change.
+
+        """
+
+        file_path = pathlib.Path(file_path)
+
+        if file_path.is_dir():
+            digest = hashlib.blake2b(digest_size=16)
+            for f in sorted(x for x in file_path.rglob("*") if x.is_file()):
+                digest.update(str(f.relative_to(file_path)).encode())
+                digest.update(self.hash_file(f).encode())
+            return digest.hexdigest()
+
+        if self._file_hashes is None:
+            self._file_hashes = {}
+            if self._file_hashes_path().exists():
+                with open(self._file_hashes_path(), "r") as f:
+                    self._file_hashes = json.load(f)
+
+        stat = file_path.stat()
+        key = str(file_path.resolve())
+        cached = self._file_hashes.get(key)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024**2), b""):
+                digest.update(chunk)
+
+        self._file_hashes[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        _write_json(self._file_hashes_path(), self._file_hashes)
+
+        return digest.hexdigest()
+
+    def hash_inputs(
+        self,
+        config,
+        deps=(),
+    ):
+        """Returns hash of the inputs of a stage.
+
+        Parameters
+        ----------
+
+        config: dict
+            Configuration of stage. Any string value (including in nested dictionaries and lists) that is the path of an existing
+            file or directory is treated as an input file, and its contents are hashed.
+
+        deps: iterable, optional
+            Input hashes of stages the stage depends on.
+
+        Returns
+        -------
+
+        str
+            Hex digest of hash.
+
+        """
+
+        config_json = json.dumps(config, sort_keys=True, default=str)
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(config_json.encode())
+        for file_path in sorted(set(_config_paths(config))):
+            digest.update(file_path.encode())
+            digest.update(self.hash_file(file_path).encode())
+        for dep_hash in deps:
+            digest.update(dep_hash.encode())
+
+        return digest.hexdigest()
+
+    def is_current(
+        self,
+        key,
+        input_hash,
+    ):
+        """Returns True if stage `key` has completed with input hash `input_hash` and all of its output files exist."""
+
+        if not self._entry_path(key).exists():
+            return False
+
+        with open(self._entry_path(key), "r") as f:
+            entry = json.load(f)
+
+        return entry["input_hash"] == input_hash and all(
+            pathlib.Path(x).exists() for x in entry["outputs"]
+        )
+
+    def record(
+        self,
+        key,
+        input_hash,
+        outputs=(),
+    ):
+        """Records that stage `key` has completed with input hash `input_hash`.
+
+        Parameters
+        ----------
+
+        key: str
+            Name of stage, e.g. "EW_1901_census".
+
+        input_hash: str
+            Hash of inputs of stage, see `hash_inputs()`.
+
+        outputs: iterable, optional
+            Paths (or glob patterns) of output files of stage, which must exist for it to be up to date.
+
+        """
+
+        output_files = []
+        for pattern in outputs:
+            pattern = pathlib.Path(pattern)
+            if pattern.exists():
+                output_files.append(str(pattern))
+            else:
+                anchor = pathlib.Path(pattern.anchor or ".")
+                output_files.extend(
+                    str(x) for x in sorted(anchor.glob(str(pattern.relative_to(anchor))))
+                )
+
+        _write_json(
+            self._entry_path(key),
+            {"input_hash": input_hash, "outputs": output_files},
+        )
+
+    def checkpoint(
+        self,
+        key,
+        input_hash,
+    ):
+        """Returns `Checkpoint` of stage `key` with input hash `input_hash`."""
+
+        return Checkpoint(self, key, input_hash)
+
+
+@dataclass
+class Checkpoint:
+    """Class for storing the manifest entry of a stage, passed to the stage so that it can check and record parts of its work
+    (e.g. each subset geocoded by `census.Census.geocode()`).
+
+    Attributes
+    ----------
+
+    manifest: `RunManifest`
+        Run manifest.
+
+    key: str
+        Name of stage.
+
+    input_hash: str
+        Hash of inputs of stage.
+
+    """
+
+    manifest: RunManifest
+    key: str
+    input_hash: str
+
+    def is_current(self):
+        """Returns True if stage is up to date, see `RunManifest.is_current()`."""
+
+        return self.manifest.is_current(self.key, self.input_hash)
+
+    def record(self, outputs=()):
+        """Records that stage has completed, see `RunManifest.record()`."""
+
+        self.manifest.record(self.key, self.input_hash, outputs)
+
+    def subset(self, subset):
+        """Returns `Checkpoint` of `subset` of stage, whose input hash is that of the stage and `subset`."""
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.input_hash}_{subset}".encode())
+
+        return Checkpoint(self.manifest, f"{self.key}_{subset}", digest.hexdigest())
+
+
+def _config_paths(config):
+    """Yields string values in `config` (a dictionary, list or value) that are paths of existing files or directories."""
+
+    if isinstance(config, dict):
+        for value in config.values():
+            yield from _config_paths(value)
+    elif isinstance(config, (list, tuple)):
+        for value in config:
+            yield from _config_paths(value)
+    elif isinstance(config, str) and len(config) < 1024:
+        if pathlib.Path(config).exists() and pathlib.Path(config) != pathlib.Path("."):
+            yield config
+
+
+def _write_json(file_path, data):
+    """Writes `data` to JSON file `file_path`, replacing it at once so that it is never read half-written."""
+
+    file_path = pathlib.Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, file_path)
@@ -0,0 +1,17 @@
+"""Geocodes each census in gen_config.yaml against each target geometry, reading census and slim target geometry files written by
+`prepare_census.py` and `prepare_geometries.py`, e.g. to re-run matching with different thresholds or comparers."""
+import stages
+
+tg_config = stages.load_config("targetgeom_config")
+gen_config = stages.load_config("gen_config")
+
+with stages.telemetry_run(gen_config):
+    for cen_country, year_list in gen_config["census_years"].items():
+        for cen_year in year_list:
+            print(cen_country, cen_year)
+            census = stages.read_census(cen_country, cen_year, gen_config)
+
+            for geom, geom_details in tg_config.items():
+                print(geom_details["geom_name"])
+                target_geom = stages.read_target_geometry(geom_details, census, gen_config)
+                census.geocode(target_geom)
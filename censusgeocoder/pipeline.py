@@ -0,0 +1,688 @@
+"""Runs the stages in `stages` as a dependency graph of tasks on a pool of worker processes.
+
+For each census (country and year) and target geometry, the graph is:
+
+    census ─────────────────────────┬──────────────────────┐
+    boundaries ─────────────────────┤                      │
+    target_clean (per target geom) ─┴─► target_assign ────►┴─► geocode
+                                        (per target geom)      (per target geom)
+
+Tasks run as soon as the tasks they depend on have finished, so stages of different censuses and target geometries (and census
+preparation, boundary preparation and target geometry cleaning of the same census) run at the same time. At most `max_workers` tasks
+run at once. Tasks pass data to each other through the files they write (e.g. `census_for_linking`, target geometry `processed` and
+`slim` files); only the (merged) boundaries are returned by a task and passed on to the tasks that use them.
+
+If `max_memory` is set, a task only starts while the estimated peak memory of all running tasks stays within `max_memory`. A task's
+peak memory is estimated from its peak memory in previous runs (recorded in a memory history file), or from the size of its input files
+if it hasn't run before.
+
+Each task that completes is recorded in a run manifest (see `manifest`) with a hash of its inputs. If `resume` is True, tasks that are
+up to date are skipped (as are subsets already geocoded by an unfinished geocode task), so a re-run after a crash or a change of
+configuration only repeats the work affected.
+
+If `dry_run` is True, geocode tasks are replaced by plan tasks, which count the candidate pairs geocoding would compare and project its
+runtime and peak memory without comparing any strings (see `planner`).
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+import json
+import pathlib
+import sys
+
+from manifest import Checkpoint
+import planner
+import stages
+
+BASE_MEMORY = 500 * 1024**2
+"""Estimated memory (bytes) of a worker process before it reads any data (Python, pandas, geopandas etc.), used if a task has no
+memory history. Measured peaks in the memory history exclude the memory a worker starts with (see `_run_and_measure()`)."""
+
+CENSUS_MATCHING_FIELDS = [
+    "comparers",
+    "comparison_method",
+    "sim_comp_thresh",
+    "align_thresh",
+    "final_score_field",
+]
+"""Fields of census configuration only used for geocoding, which don't invalidate processed census data."""
+
+INPUT_MEMORY_FACTOR = 10
+"""Estimated peak memory of a task per byte of its input files, used if a task has no memory history. Text files take several times
+their size in memory once read, and processing makes copies."""
+
+
+@dataclass
+class Task:
+    """Class for storing a task in the pipeline dependency graph
+
+    Attributes
+    ----------
+
+    name: str
+        Unique name of task, e.g. "EW_1851_census".
+
+    func: callable
+        Function run by task. Must be importable by worker processes (i.e. defined at the top level of a module).
+
+    args: tuple
+        Positional arguments passed to `func`.
+
+    deps: list
+        Names of tasks that must finish before this task runs.
+
+    inputs: dict
+        Keyword arguments of `func` set to the return value of a task, as a dictionary of {keyword: task name}. Tasks in `inputs`
+        are added to `deps`.
+
+    input_files: list
+        Paths of files (or directories of files) read by the task, used to estimate its peak memory if it has no memory history.
+
+    checkpoint: `manifest.Checkpoint`
+        Run manifest entry of task, recorded when it completes. If `None`, task is always run.
+
+    outputs: list
+        Paths (or glob patterns) of output files of task, which must exist for it to be up to date.
+
+    """
+
+    name: str
+    func: callable
+    args: tuple = ()
+    deps: list = field(default_factory=list)
+    inputs: dict = field(default_factory=dict)
+    input_files: list = field(default_factory=list)
+    checkpoint: Checkpoint = None
+    outputs: list = field(default_factory=list)
+
+    def __post_init__(self):
+        self.deps = list(dict.fromkeys([*self.deps, *self.inputs.values()]))
+
+
+def census_task(
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Processes census data, see `stages.prepare_census()`."""
+
+    stages.prepare_census(cen_country, cen_year, gen_config)
+
+
+def boundaries_task(
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Processes and merges boundaries, see `stages.prepare_boundaries()`. Returns merged boundary and full precision merged boundary (or `None`)."""
+
+    return stages.prepare_boundaries(cen_country, cen_year, gen_config)
+
+
+def target_clean_task(
+    geom_details,
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Reads, cleans and dissolves target geometry data, see `stages.clean_target_geometry()`."""
+
+    stages.clean_target_geometry(geom_details, cen_country, cen_year, gen_config)
+
+
+def target_assign_task(
+    geom_details,
+    cen_country,
+    cen_year,
+    gen_config,
+    boundaries,
+):
+    """Reads target geometry data written by `target_clean_task()` and assigns it to boundaries, see `stages.assign_target_geometry()`.
+
+    Parameters
+    ----------
+
+    boundaries: tuple
+        Merged boundary and full precision merged boundary (or `None`), returned by `boundaries_task()`.
+
+    """
+
+    census = stages.read_census(cen_country, cen_year, gen_config)
+    target_geom = stages.get_target_geometry(
+        geom_details, cen_country, cen_year, gen_config
+    )
+
+    if target_geom.vars.gis_tile_pattern is None:
+        target_geom.read_processed_geom()
+
+    stages.assign_target_geometry(target_geom, census, *boundaries)
+
+
+def geocode_task(
+    geom_details,
+    cen_country,
+    cen_year,
+    gen_config,
+    checkpoint=None,
+):
+    """Geocodes census data written by `census_task()` against target geometry data written by `target_assign_task()`.
+    Each subset geocoded is recorded in the run manifest under `checkpoint` (and skipped if up to date and `resume` is True)."""
+
+    census = stages.read_census(cen_country, cen_year, gen_config)
+    target_geom = stages.read_target_geometry(geom_details, census, gen_config)
+    census.geocode(target_geom, checkpoint, resume=gen_config.get("resume", False))
+
+
+def plan_task(
+    geom_details,
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Plans geocoding of census data written by `census_task()` against target geometry data written by `target_assign_task()`
+    without running it, see `planner.plan_geocode()`."""
+
+    census = stages.read_census(cen_country, cen_year, gen_config)
+    target_geom = stages.read_target_geometry(geom_details, census, gen_config)
+    planner.plan_geocode(census, target_geom, gen_config)
+
+
+def _get_input_files(
+    config,
+    tg_config,
+):
+    """Returns list of input files of census with configuration `config`, list of input files of its boundaries and dictionary of
+    {geom_name: list of input files} of each target geometry in `tg_config`, used to estimate memory of tasks."""
+
+    census_files = [config["census"]["census_file"]]
+    census_files.extend(
+        lkup["lkup_file"] for lkup in (config["census"].get("lkups") or {}).values()
+    )
+
+    boundary_files = []
+    for bound_details in config["boundaries"].values():
+        boundary_files.append(bound_details["gis_file"])
+        if bound_details.get("lkup_file") is not None:
+            boundary_files.append(bound_details["lkup_file"])
+
+    target_files = {
+        geom_details["geom_name"]: [geom_details["gis_file"]]
+        for geom_details in tg_config.values()
+    }
+
+    return census_files, boundary_files, target_files
+
+
+def build_tasks(
+    gen_config,
+    tg_config,
+    manifest=None,
+):
+    """Creates the tasks to geocode each census in `gen_config` against each target geometry in `tg_config`.
+
+    Parameters
+    ----------
+
+    gen_config: dict
+        Contents of gen_config.yaml.
+
+    tg_config: dict
+        Contents of targetgeom_config.yaml.
+
+    manifest: `manifest.RunManifest`, optional
+        Run manifest to record completed tasks in. If given, each task's `checkpoint` is set with the hash of its inputs.
+
+    Returns
+    -------
+
+    tasks: list
+        List of `Task`.
+
+    Notes
+    -----
+
+    The inputs hashed for each task are the parts of the configuration it uses, the input files named in them and the hashes of the
+    tasks it depends on. Census processing doesn't use `CENSUS_MATCHING_FIELDS`, so changing e.g. `sim_comp_thresh` only invalidates geocoding.
+
+    """
+
+    tasks = []
+    output_path = gen_config["output_path"]
+    output_filetype = gen_config["output_filetype"]
+    gen_fields = {
+        key: gen_config.get(key) for key in ["output_filetype", "dtype_mode"]
+    }
+
+    def checkpoint(name, task_config, deps=()):
+        if manifest is None:
+            return None
+        dep_hashes = [task_dict[dep].checkpoint.input_hash for dep in deps]
+        return manifest.checkpoint(
+            name, manifest.hash_inputs({**task_config, **gen_fields}, dep_hashes)
+        )
+
+    task_dict = {}
+
+    def add_task(task):
+        tasks.append(task)
+        task_dict[task.name] = task
+
+    for cen_country, year_list in gen_config["census_years"].items():
+        for cen_year in year_list:
+            config = stages.load_config(f"{cen_country}_{cen_year}_config")
+            census_args = (cen_country, cen_year, gen_config)
+            prefix = f"{cen_country}_{cen_year}"
+            year_path = f"{output_path}/{cen_country}/{cen_year}"
+            census_files, boundary_files, target_files = _get_input_files(
+                config, tg_config
+            )
+
+            add_task(
+                Task(
+                    f"{prefix}_census",
+                    census_task,
+                    census_args,
+                    input_files=census_files,
+                    checkpoint=checkpoint(
+                        f"{prefix}_census",
+                        {
+                            "census": {
+                                key: value
+                                for key, value in config["census"].items()
+                                if key not in CENSUS_MATCHING_FIELDS
+                            }
+                        },
+                    ),
+                    outputs=[
+                        f"{year_path}/{prefix}_block_dictionary{output_filetype}",
+                        f"{year_path}/**/{prefix}_census_for_linking*{output_filetype}",
+                    ],
+                )
+            )
+            add_task(
+                Task(
+                    f"{prefix}_boundaries",
+                    boundaries_task,
+                    census_args,
+                    input_files=boundary_files,
+                    checkpoint=checkpoint(
+                        f"{prefix}_boundaries",
+                        {
+                            "boundaries": config["boundaries"],
+                            "compare_simplified_boundaries": gen_config.get(
+                                "compare_simplified_boundaries", False
+                            ),
+                        },
+                    ),
+                    outputs=[
+                        f"{year_path}/{bound_details['geom_name']}/{prefix}_{bound_details['geom_name']}_processed{output_filetype}"
+                        for bound_details in config["boundaries"].values()
+                    ],
+                )
+            )
+
+            for geom, geom_details in tg_config.items():
+                geom_args = (geom_details, *census_args)
+                geom_name = geom_details["geom_name"]
+                geom_prefix = f"{prefix}_{geom_name}"
+                geom_path = f"{year_path}/{geom_name}/{geom_prefix}"
+
+                add_task(
+                    Task(
+                        f"{geom_prefix}_target_clean",
+                        target_clean_task,
+                        geom_args,
+                        input_files=target_files[geom_name],
+                        checkpoint=checkpoint(
+                            f"{geom_prefix}_target_clean", {"target": geom_details}
+                        ),
+                        outputs=(
+                            [f"{geom_path}_processed{output_filetype}"]
+                            if geom_details.get("gis_tile_pattern") is None
+                            else []
+                        ),  # tiles are cleaned by target_assign_task()
+                    )
+                )
+                add_task(
+                    Task(
+                        f"{geom_prefix}_target_assign",
+                        target_assign_task,
+                        geom_args,
+                        deps=[f"{prefix}_census", f"{geom_prefix}_target_clean"],
+                        inputs={"boundaries": f"{prefix}_boundaries"},
+                        input_files=target_files[geom_name] + boundary_files,
+                        checkpoint=checkpoint(
+                            f"{geom_prefix}_target_assign",
+                            {"target": geom_details},
+                            deps=[
+                                f"{prefix}_census",
+                                f"{geom_prefix}_target_clean",
+                                f"{prefix}_boundaries",
+                            ],
+                        ),
+                        outputs=[f"{geom_path}_slim{output_filetype}"],
+                    )
+                )
+
+                if gen_config.get("dry_run", False) is True:
+                    add_task(
+                        Task(
+                            f"{geom_prefix}_plan",
+                            plan_task,
+                            geom_args,
+                            deps=[f"{prefix}_census", f"{geom_prefix}_target_assign"],
+                            input_files=census_files,
+                        )
+                    )  # not recorded in run manifest, as it doesn't write geocoded output files
+                    continue
+
+                geocode_checkpoint = checkpoint(
+                    f"{geom_prefix}_geocode",
+                    {
+                        "census": config["census"],
+                        "target": geom_details,
+                        "block_stats": gen_config.get("block_stats", False),
+                    },
+                    deps=[f"{prefix}_census", f"{geom_prefix}_target_assign"],
+                )
+                add_task(
+                    Task(
+                        f"{geom_prefix}_geocode",
+                        geocode_task,
+                        (*geom_args, geocode_checkpoint),
+                        deps=[f"{prefix}_census", f"{geom_prefix}_target_assign"],
+                        input_files=census_files,  # census for linking and slim target geometry files are smaller than this
+                        checkpoint=geocode_checkpoint,
+                        outputs=[
+                            f"{year_path}/**/{geom_prefix}_matches*{output_filetype}"
+                        ],
+                    )
+                )
+
+    return tasks
+
+
+def _check_tasks(
+    tasks,
+):
+    """Checks task names are unique, dependencies exist and there are no cycles. Raises ValueError if not."""
+
+    task_dict = {task.name: task for task in tasks}
+
+    if len(task_dict) != len(tasks):
+        raise ValueError("Task names must be unique")
+
+    for task in tasks:
+        missing = [dep for dep in task.deps if dep not in task_dict]
+        if missing:
+            raise ValueError(f"Task {task.name} depends on unknown task(s) {missing}")
+
+    done = set()
+    remaining = dict(task_dict)
+    while remaining:
+        ready = [name for name, task in remaining.items() if set(task.deps) <= done]
+        if not ready:
+            raise ValueError(f"Tasks have circular dependencies: {list(remaining)}")
+        for name in ready:
+            done.add(name)
+            del remaining[name]
+
+
+def _file_size(
+    file_path,
+):
+    """Returns size in bytes of file at `file_path`, or total size of files in directory `file_path`. Returns 0 if it doesn't exist."""
+
+    file_path = pathlib.Path(file_path)
+
+    if file_path.is_dir():
+        return sum(f.stat().st_size for f in file_path.rglob("*") if f.is_file())
+    elif file_path.exists():
+        if file_path.suffix == ".shp":  # attributes are stored in a separate .dbf file
+            return sum(f.stat().st_size for f in file_path.parent.glob(f"{file_path.stem}.*"))
+        return file_path.stat().st_size
+    else:
+        return 0
+
+
+def estimate_memory(
+    task,
+    memory_history,
+):
+    """Estimates peak memory (bytes) of `task`: its peak memory in the previous run if in `memory_history`,
+    otherwise `BASE_MEMORY` plus `INPUT_MEMORY_FACTOR` times the size of its input files.
+
+    Parameters
+    ----------
+
+    task: `Task`
+        Task to estimate memory of.
+
+    memory_history: dict
+        Dictionary of {task name: peak memory (bytes)} from previous runs.
+
+    Returns
+    -------
+
+    int
+        Estimated peak memory in bytes.
+
+    """
+
+    if task.name in memory_history:
+        return memory_history[task.name]
+
+    return BASE_MEMORY + INPUT_MEMORY_FACTOR * sum(
+        _file_size(f) for f in task.input_files
+    )
+
+
+def read_memory_history(
+    memory_history_file,
+):
+    """Reads memory history written by `run_tasks()`, returns dictionary of {task name: peak memory (bytes)} (empty if no file)."""
+
+    if memory_history_file is None or not pathlib.Path(memory_history_file).exists():
+        return {}
+
+    with open(memory_history_file, "r") as f:
+        return json.load(f)
+
+
+def _write_memory_history(
+    memory_history_file,
+    memory_history,
+):
+    """Writes dictionary of {task name: peak memory (bytes)} to `memory_history_file`."""
+
+    pathlib.Path(memory_history_file).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(memory_history_file, "w") as f:
+        json.dump(memory_history, f, indent=1, sort_keys=True)
+
+
+def _run_and_measure(
+    func,
+    *args,
+    **kwargs,
+):
+    """Runs `func` in a worker process, returns its return value and the peak memory (bytes) the task added to the worker process.
+    Worker processes run one task each (`max_tasks_per_child=1`), so the peak is the task's. The peak at the start of the task is
+    subtracted, as a forked worker's peak includes the memory of the parent process it was copied from. Peak memory is `None` where
+    the `resource` module is not available (Windows)."""
+
+    try:
+        import resource
+    except ImportError:
+        return func(*args, **kwargs), None
+
+    start_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    result = func(*args, **kwargs)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_peak
+    if sys.platform != "darwin":  # kilobytes on Linux, bytes on macOS
+        peak *= 1024
+
+    return result, peak
+
+
+def _get_skipped_tasks(
+    tasks,
+):
+    """Returns set of names of tasks that are up to date (see `manifest.RunManifest.is_current()`) and whose return value
+    isn't needed by a task that is run (e.g. boundaries are processed again if any target geometry assignment using them is out of date)."""
+
+    skipped = {
+        task.name
+        for task in tasks
+        if task.checkpoint is not None and task.checkpoint.is_current()
+    }
+
+    changed = True
+    while changed:
+        changed = False
+        for task in tasks:
+            if task.name in skipped:
+                continue
+            for dep in task.inputs.values():
+                if dep in skipped:
+                    skipped.discard(dep)
+                    changed = True
+
+    return skipped
+
+
+def run_tasks(
+    tasks,
+    max_workers=1,
+    max_memory=None,
+    memory_history_file=None,
+    resume=False,
+):
+    """Runs `tasks` in dependency order, running up to `max_workers` tasks at once in worker processes, within a memory budget of `max_memory`.
+
+    Parameters
+    ----------
+
+    tasks: list
+        List of `Task`.
+
+    max_workers: int
+        Maximum number of tasks run at once. If 1, tasks are run one at a time in the current process.
+
+    max_memory: int | float | None
+        Memory budget in GB. If set, a task is only started if the estimated peak memory (see `estimate_memory()`) of it and all
+        running tasks is within `max_memory`; a task estimated to need more than `max_memory` runs on its own.
+
+    memory_history_file: str | None
+        Path to JSON file of the peak memory of each task in previous runs, used by `estimate_memory()` and updated with the
+        peak memory of each task run in a worker process.
+
+    resume: bool
+        If True, tasks that are up to date in the run manifest (see `Task.checkpoint`) are skipped.
+
+    Returns
+    -------
+
+    results: dict
+        Dictionary of {task name: return value} of tasks whose return values are not used by other tasks.
+
+    Notes
+    -----
+
+    If a task raises an exception, tasks already running are allowed to finish, no further tasks are started and the exception is re-raised.
+    A task's return value is kept only until all tasks using it (see `Task.inputs`) have started. Each worker process runs one task,
+    so that its peak memory can be measured and its memory is released when the task finishes. Each task with a `checkpoint`
+    is recorded in the run manifest when it finishes.
+
+    """
+
+    _check_tasks(tasks)
+
+    skipped = _get_skipped_tasks(tasks) if resume is True else set()
+
+    memory_history = read_memory_history(memory_history_file)
+    memory_budget = None if max_memory is None else max_memory * 1024**3
+
+    pending = {task.name: task for task in tasks if task.name not in skipped}
+    done = set(skipped)
+    results = {}
+    consumers = {}
+    for task in pending.values():
+        for dep in task.inputs.values():
+            consumers.setdefault(dep, set()).add(task.name)
+
+    for task in tasks:
+        if task.name in skipped:
+            print(f"Skipping {task.name} (up to date)")
+
+    def record(task):
+        if task.checkpoint is not None:
+            task.checkpoint.record(task.outputs)
+
+    def ready_tasks():
+        return [task for task in pending.values() if set(task.deps) <= done]
+
+    def task_kwargs(task):
+        kwargs = {key: results[dep] for key, dep in task.inputs.items()}
+        for dep in task.inputs.values():
+            consumers[dep].discard(task.name)
+            if not consumers[dep]:
+                del results[dep]  # free e.g. boundaries once every task using them has started
+        return kwargs
+
+    if max_workers == 1:
+        while pending:
+            task = ready_tasks()[0]
+            print(f"Running {task.name}")
+            del pending[task.name]
+            results[task.name] = task.func(*task.args, **task_kwargs(task))
+            done.add(task.name)
+            record(task)
+        return results
+
+    def admit(task, running_memory):
+        if memory_budget is None or not running:
+            return True
+        return running_memory + estimate_memory(task, memory_history) <= memory_budget
+
+    task_dict = {task.name: task for task in tasks}
+    running = {}
+    running_memory = {}
+    with ProcessPoolExecutor(
+        max_workers=max_workers, max_tasks_per_child=1
+    ) as executor:
+        while pending or running:
+            for task in ready_tasks():
+                if len(running) == max_workers:
+                    break
+                if not admit(task, sum(running_memory.values())):
+                    continue
+
+                print(f"Running {task.name}")
+                del pending[task.name]
+                future = executor.submit(
+                    _run_and_measure, task.func, *task.args, **task_kwargs(task)
+                )
+                running[future] = task.name
+                running_memory[future] = estimate_memory(task, memory_history)
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                name = running.pop(future)
+                del running_memory[future]
+                if future.exception() is not None:
+                    pending.clear()
+                    wait(running)
+                    raise future.exception()
+                results[name], peak = future.result()
+                done.add(name)
+                record(task_dict[name])
+                print(f"Finished {name}")
+
+                if peak is not None and memory_history_file is not None:
+                    memory_history[name] = peak
+                    _write_memory_history(memory_history_file, memory_history)
+
+    return results
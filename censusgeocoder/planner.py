@@ -0,0 +1,282 @@
+"""Plans geocoding without running it: counts the candidate pairs `census.Census.geocode()` would compare and projects its runtime and
+peak memory, so the size of a run is known before committing to it.
+
+Candidate pairs are found by geo-blocking (see `geocode.GeoCode._create_candidate_links()`), so the number of pairs in a geo-blocking
+unit is exactly the number of census records in it multiplied by the number of target geometry records in it. These are counted from the
+processed census and slim target geometry data; no strings are compared.
+
+Runtime and memory are projected from a cost per pair. The time per pair is calibrated from the `GeoCode` stages in the run logs of
+previous runs (see `telemetry`), or set with `plan_pair_seconds`. The memory per pair (`plan_pair_memory_bytes`) covers the candidate
+links, the strings compared and their scores, which `GeoCode` holds for all pairs of a subset at once.
+"""
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+import telemetry
+
+PAIR_SECONDS = 1e-5
+"""Default time (s) to compare one candidate pair, used if there are no `GeoCode` stages in previous run logs to calibrate it from."""
+
+PAIR_MEMORY_BYTES = 200
+"""Default peak memory (bytes) per candidate pair of a subset being geocoded."""
+
+GEOCODE_STAGES = [
+    "TargetGeometry.get_blocks",
+    "GeoCode._create_candidate_links",
+    "GeoCode._compare",
+    "GeoCode._process_results",
+]
+"""Stages of geocoding a subset whose time is counted in the calibrated time per pair."""
+
+
+def count_pairs(
+    census,
+    target_geometry,
+):
+    """Counts the candidate pairs of each geo-blocking unit of each subset of `census` with `target_geometry`.
+
+    Parameters
+    ----------
+
+    census: `census.Census`
+        Processed census data (e.g. from `stages.read_census()`).
+
+    target_geometry: `geometry.TargetGeometry`
+        Slim target geometry data (e.g. from `stages.read_target_geometry()`).
+
+    Returns
+    -------
+
+    pairs: `pd.DataFrame`
+        One row per subset and geo-blocking unit (census block fields), with the number of census records (`census_addresses`),
+        target geometry records (`target_names`) and candidate pairs (`candidate_pairs`). Subset is `None` if `census` has no subsets.
+
+    """
+
+    census_block, target_geom_block, census_data = census._get_geocode_blocks(
+        target_geometry
+    )
+
+    subset_field = (
+        census.vars.subset_field
+        if type(census.vars.subsetlist) is np.ndarray
+        else None
+    )
+    group_fields = ([subset_field] if subset_field else []) + census_block
+
+    census_counts = census_data.groupby(group_fields, observed=True).size()
+    if census.vars.execution_mode == "dask":
+        census_counts = census_counts.compute()
+    census_counts = census_counts.rename("census_addresses").reset_index()
+    if subset_field is None:
+        census_counts.insert(0, "subset", None)
+    else:
+        census_counts = census_counts.rename(columns={subset_field: "subset"})
+
+    target_counts = (
+        target_geometry.data.groupby(target_geom_block, observed=True)
+        .size()
+        .rename("target_names")
+        .rename_axis(census_block)
+        .reset_index()
+    )
+
+    pairs = census_counts.merge(target_counts, on=census_block, how="left")
+    pairs["target_names"] = pairs["target_names"].fillna(0).astype(int)
+    pairs["candidate_pairs"] = pairs["census_addresses"] * pairs["target_names"]
+
+    return pairs
+
+
+def calibrate_pair_seconds(
+    output_path,
+):
+    """Returns the time (s) per candidate pair of geocoding subsets in previous runs, from the run logs in `output_path`, or `None`
+    if they contain no geocoding.
+
+    The time of the stages in `GEOCODE_STAGES` is divided by the number of pairs compared by `GeoCode._compare` (its rows in).
+    """
+
+    log_files = sorted(pathlib.Path(output_path, "telemetry").glob("run_*.jsonl"))
+    logs = [telemetry.read_log(x) for x in log_files]
+    logs = [x for x in logs if not x.empty]
+    if not logs:
+        return None
+
+    log = pd.concat(logs, ignore_index=True)
+    log = log[log["stage"].isin(GEOCODE_STAGES)]
+
+    pairs = log.loc[log["stage"] == "GeoCode._compare", "rows_in"].sum()
+    if pairs == 0:
+        return None
+
+    return log["wall_s"].sum() / pairs
+
+
+def plan_geocode(
+    census,
+    target_geometry,
+    gen_config,
+):
+    """Counts the candidate pairs of geocoding `census` with `target_geometry`, projects runtime and peak memory of `Census.geocode()`,
+    and flags subsets and geo-blocking units with more pairs than the limits in `gen_config`. Prints a summary and writes the pairs of each
+    geo-blocking unit and subset to `<output_path>/plan/`. Returns dictionary of summary.
+
+    Parameters
+    ----------
+
+    census: `census.Census`
+        Processed census data.
+
+    target_geometry: `geometry.TargetGeometry`
+        Slim target geometry data.
+
+    gen_config: dict
+        General configuration. Uses `plan_pair_seconds` (if `None`, calibrated from previous runs, see `calibrate_pair_seconds()`),
+        `plan_pair_memory_bytes`, `plan_max_block_pairs` and `plan_max_subset_pairs` (limits, `None` for no limit), and `geocode_workers`.
+
+    Returns
+    -------
+
+    summary: dict
+        Total census records, candidate pairs, subsets and geo-blocking units, largest subset, projected runtime (serial and with
+        `geocode_workers`) and peak memory, and numbers of subsets and geo-blocking units over the limits.
+
+    Notes
+    -----
+
+    Projected peak memory is the memory of the census and target geometry data plus the candidate pairs of the largest subsets being
+    geocoded at once (one per `geocode_workers`). Projected runtime with `geocode_workers` assumes subsets are spread evenly over workers,
+    so it is at least the runtime of the largest subset.
+
+    """
+
+    pairs = count_pairs(census, target_geometry)
+
+    pair_seconds = gen_config.get("plan_pair_seconds")
+    calibrated = pair_seconds is None
+    if calibrated:
+        pair_seconds = calibrate_pair_seconds(gen_config["output_path"])
+    if pair_seconds is None:
+        pair_seconds = PAIR_SECONDS
+        calibrated = False
+    pair_memory = gen_config.get("plan_pair_memory_bytes") or PAIR_MEMORY_BYTES
+    max_block_pairs = gen_config.get("plan_max_block_pairs")
+    max_subset_pairs = gen_config.get("plan_max_subset_pairs")
+    workers = max(gen_config.get("geocode_workers", 1), 1)
+
+    pairs["est_seconds"] = (pairs["candidate_pairs"] * pair_seconds).round(3)
+    pairs["over_limit"] = (
+        pairs["candidate_pairs"] > max_block_pairs
+        if max_block_pairs is not None
+        else False
+    )
+
+    subsets = (
+        pairs.groupby("subset", dropna=False)
+        .agg(
+            blocks=("candidate_pairs", "size"),
+            census_addresses=("census_addresses", "sum"),
+            candidate_pairs=("candidate_pairs", "sum"),
+            largest_block_pairs=("candidate_pairs", "max"),
+            blocks_over_limit=("over_limit", "sum"),
+        )
+        .sort_values("candidate_pairs", ascending=False)
+        .reset_index()
+    )
+    subsets["est_seconds"] = (subsets["candidate_pairs"] * pair_seconds).round(3)
+    subsets["est_peak_pair_memory_mb"] = (
+        subsets["candidate_pairs"] * pair_memory / 1024**2
+    ).round(1)
+    subsets["over_limit"] = (
+        subsets["candidate_pairs"] > max_subset_pairs
+        if max_subset_pairs is not None
+        else False
+    )
+
+    total_pairs = int(subsets["candidate_pairs"].sum())
+    largest_subset_pairs = int(subsets["candidate_pairs"].max()) if len(subsets) else 0
+
+    data_memory = None
+    if census.vars.execution_mode != "dask":
+        data_memory = census.data.memory_usage(deep=True).sum() + (
+            target_geometry.data.memory_usage(deep=True).sum()
+        )
+
+    summary = {
+        "country": census.vars.country,
+        "year": census.vars.year,
+        "geom_name": target_geometry.vars.geom_name,
+        "census_addresses": int(subsets["census_addresses"].sum()),
+        "subsets": len(subsets),
+        "blocks": len(pairs),
+        "candidate_pairs": total_pairs,
+        "largest_subset_pairs": largest_subset_pairs,
+        "largest_block_pairs": int(pairs["candidate_pairs"].max()) if len(pairs) else 0,
+        "geocode_workers": workers,
+        "pair_seconds": pair_seconds,
+        "pair_seconds_calibrated": calibrated,
+        "est_seconds": round(total_pairs * pair_seconds, 1),
+        "est_seconds_with_workers": round(
+            max(total_pairs / workers, largest_subset_pairs) * pair_seconds, 1
+        ),
+        "est_peak_memory_mb": (
+            None
+            if data_memory is None
+            else round(
+                (data_memory + subsets["candidate_pairs"].head(workers).sum() * pair_memory)
+                / 1024**2,
+                1,
+            )
+        ),
+        "subsets_over_limit": int(subsets["over_limit"].sum()),
+        "blocks_over_limit": int(pairs["over_limit"].sum()),
+    }
+
+    plan_path = pathlib.Path(gen_config["output_path"], "plan")
+    plan_path.mkdir(parents=True, exist_ok=True)
+    prefix = f"{census.vars.country}_{census.vars.year}_{target_geometry.vars.geom_name}"
+    pairs.sort_values("candidate_pairs", ascending=False).to_csv(
+        plan_path / f"{prefix}_plan_blocks.tsv", sep="\t", index=False
+    )
+    subsets.to_csv(plan_path / f"{prefix}_plan_subsets.tsv", sep="\t", index=False)
+
+    _print_summary(summary, subsets, pairs)
+
+    return summary
+
+
+def _print_summary(
+    summary,
+    subsets,
+    pairs,
+):
+    """Prints summary of plan returned by `plan_geocode()`, and the subsets and geo-blocking units over the limits."""
+
+    print(
+        f"Plan {summary['country']} {summary['year']} {summary['geom_name']}: "
+        f"{summary['candidate_pairs']:,} candidate pairs of {summary['census_addresses']:,} census records in "
+        f"{summary['subsets']:,} subsets and {summary['blocks']:,} geo-blocking units "
+        f"(largest subset {summary['largest_subset_pairs']:,}, largest unit {summary['largest_block_pairs']:,})"
+    )
+    print(
+        f"  estimated runtime {summary['est_seconds']:,} s "
+        f"({summary['est_seconds_with_workers']:,} s with {summary['geocode_workers']} geocode_workers), "
+        f"peak memory {summary['est_peak_memory_mb']} MB, "
+        f"at {summary['pair_seconds']:.2e} s per pair "
+        f"({'calibrated from previous runs' if summary['pair_seconds_calibrated'] else 'not calibrated'})"
+    )
+
+    if summary["subsets_over_limit"] > 0:
+        print(f"  {summary['subsets_over_limit']} subset(s) over plan_max_subset_pairs:")
+        print(subsets[subsets["over_limit"]].head(10).to_string(index=False))
+    if summary["blocks_over_limit"] > 0:
+        print(f"  {summary['blocks_over_limit']} geo-blocking unit(s) over plan_max_block_pairs:")
+        print(
+            pairs[pairs["over_limit"]]
+            .sort_values("candidate_pairs", ascending=False)
+            .head(10)
+            .to_string(index=False)
+        )
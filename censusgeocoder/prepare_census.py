@@ -0,0 +1,11 @@
+"""Processes census data for each census in gen_config.yaml, writing processed census files for `prepare_geometries.py` and `match.py`.
+Doesn't import geopandas or recordlinkage."""
+import stages
+
+gen_config = stages.load_config("gen_config")
+
+with stages.telemetry_run(gen_config):
+    for cen_country, year_list in gen_config["census_years"].items():
+        for cen_year in year_list:
+            print(cen_country, cen_year)
+            stages.prepare_census(cen_country, cen_year, gen_config)
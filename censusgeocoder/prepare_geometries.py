@@ -0,0 +1,20 @@
+"""Processes boundaries and target geometries for each census in gen_config.yaml, writing slim target geometry files for `match.py`.
+Run after `prepare_census.py`, which writes the block dictionary shared by census and target geometry data. Doesn't import recordlinkage."""
+import stages
+
+tg_config = stages.load_config("targetgeom_config")
+gen_config = stages.load_config("gen_config")
+
+with stages.telemetry_run(gen_config):
+    for cen_country, year_list in gen_config["census_years"].items():
+        for cen_year in year_list:
+            print(cen_country, cen_year)
+            census = stages.read_census(cen_country, cen_year, gen_config)
+
+            boundary, full_boundary = stages.prepare_boundaries(cen_country, cen_year, gen_config)
+
+            for geom, geom_details in tg_config.items():
+                print(geom_details["geom_name"])
+                stages.prepare_target_geometry(
+                    geom_details, census, boundary, full_boundary, gen_config
+                )
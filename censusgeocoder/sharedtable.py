@@ -0,0 +1,155 @@
+from multiprocessing import shared_memory
+
+import pandas as pd
+import pyarrow as pa
+
+
+class SharedTable:
+    """A `pd.DataFrame` published to shared memory as an Arrow IPC stream, which other processes attach to by name without copying.
+
+    The process that publishes a table owns its shared memory block and must `unlink()` it when the table is no longer needed.
+    A `SharedTable` pickles to the name and size of its block only, so it can be passed to worker processes (e.g. in the
+    `initargs` of a `concurrent.futures.ProcessPoolExecutor`) or returned by them: unpickling it attaches to the block.
+
+    Attributes
+    ----------
+
+    name: str
+        Name of shared memory block.
+
+    size: int
+        Size in bytes of the Arrow IPC stream in the block (the block may be larger).
+
+    Methods
+    -------
+
+    `publish()`
+        Writes a `pd.DataFrame` to a new shared memory block, returns `SharedTable`.
+
+    `attach()`
+        Attaches to an existing shared memory block, returns `SharedTable`.
+
+    `to_pandas()`
+        Returns the table as a `pd.DataFrame` backed by the shared memory block.
+
+    `close()`
+        Detaches from the shared memory block.
+
+    `unlink()`
+        Frees the shared memory block once all processes have detached from it.
+
+    """
+
+    def __init__(
+        self,
+        shm,
+        size,
+    ):
+        self._shm = shm
+        self.name = shm.name
+        self.size = size
+
+    def __reduce__(self):
+        return (SharedTable.attach, (self.name, self.size))
+
+    @classmethod
+    def publish(
+        cls,
+        data,
+    ):
+        """Writes `data` to a new shared memory block as an Arrow IPC stream, returns `SharedTable`.
+
+        Parameters
+        ----------
+
+        data: `pd.DataFrame`
+            `pd.DataFrame` to publish. The index is not kept.
+
+        Returns
+        -------
+
+        shared_table: `SharedTable`
+            `SharedTable` owning the new shared memory block.
+
+        Notes
+        -----
+
+        The stream is written directly to the shared memory block (its size is found by writing it to a `pa.MockOutputStream` first),
+        so `data` is only copied once.
+
+        """
+
+        table = pa.Table.from_pandas(data, preserve_index=False)
+
+        mock_sink = pa.MockOutputStream()
+        with pa.ipc.new_stream(mock_sink, table.schema) as writer:
+            writer.write_table(table)
+        size = mock_sink.size()
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+        buffer = pa.py_buffer(shm.buf)
+        with pa.ipc.new_stream(pa.FixedSizeBufferWriter(buffer), table.schema) as writer:
+            writer.write_table(table)
+        del buffer  # releases export of shm.buf, so that the block can be closed
+
+        return cls(shm, size)
+
+    @classmethod
+    def attach(
+        cls,
+        name,
+        size,
+    ):
+        """Attaches to shared memory block `name` written by `publish()`, returns `SharedTable`.
+
+        Notes
+        -----
+
+        Worker processes started by `multiprocessing` share the resource tracker of the process that started them, so a block
+        published by one and attached to by the other is unlinked once, by the process that published it.
+
+        """
+
+        return cls(shared_memory.SharedMemory(name=name), size)
+
+    def to_pandas(
+        self,
+    ):
+        """Returns the table as a `pd.DataFrame` backed by the shared memory block.
+
+        Returns
+        -------
+
+        data: `pd.DataFrame`
+            Table data. Text is returned as "string[pyarrow]" and numeric columns without missing values as read-only numpy
+            arrays, both without copying. The shared memory block must stay attached while `data` is in use.
+
+        """
+
+        table = pa.ipc.open_stream(
+            pa.py_buffer(self._shm.buf).slice(0, self.size)
+        ).read_all()
+
+        return table.to_pandas(
+            types_mapper=lambda t: (
+                pd.StringDtype("pyarrow")
+                if pa.types.is_string(t) or pa.types.is_large_string(t)
+                else None
+            ),
+            split_blocks=True,
+        )
+
+    def close(
+        self,
+    ):
+        """Detaches from the shared memory block. Raises `BufferError` if data returned by `to_pandas()` is still in use."""
+
+        self._shm.close()
+
+    def unlink(
+        self,
+    ):
+        """Frees the shared memory block once all processes have detached from it. Only called by the process that published it."""
+
+        self._shm.unlink()
@@ -0,0 +1,256 @@
+"""Stages of the CensusGeocoder pipeline: preparing census data, preparing boundaries and target geometries, and geocoding (matching).
+
+`censusgeocoder.py` runs all stages as a dependency graph of tasks (see `pipeline`). `prepare_census.py`, `prepare_geometries.py`
+and `match.py` run them separately, reading the outputs of earlier stages from `output_path`, e.g. to re-run matching with different thresholds
+without re-processing the census or target geometry data.
+
+Only `census` is imported here. `geometry` (which imports geopandas) and `geocode` (which imports recordlinkage) are imported
+by the stages that use them, so each entry point only loads the libraries it needs.
+"""
+from contextlib import contextmanager
+
+import yaml
+
+from census import Census, Census_vars
+import telemetry
+
+
+def load_config(config_name):
+    """Reads configuration file `config_name` (e.g. "gen_config") from the configuration directory, returns dictionary of its contents."""
+
+    with open(f"../configuration/{config_name}.yaml", "r") as f:
+        return yaml.load(f, Loader=yaml.FullLoader)
+
+
+@contextmanager
+def telemetry_run(
+    gen_config,
+):
+    """Context manager recording stages run inside it to a run log in `output_path` (see `telemetry`), unless `telemetry` is False
+    in `gen_config`. Prints summary table of stages when it exits, and writes it next to the run log."""
+
+    if gen_config.get("telemetry", True) is False:
+        yield
+        return
+
+    log_file = telemetry.start_run(gen_config["output_path"])
+    try:
+        yield
+    finally:
+        summary = telemetry.summarise(log_file)
+        if not summary.empty:
+            print(f"Stage summary (run log {log_file}):")
+            print(summary.to_string(index=False))
+
+
+def get_census_vars(
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Returns `Census_vars` for census `cen_country` `cen_year` from its configuration file and `gen_config`."""
+
+    census_config = load_config(f"{cen_country}_{cen_year}_config")["census"]
+
+    return Census_vars(
+        output_path=gen_config["output_path"],
+        output_filetype=gen_config["output_filetype"],
+        dtype_mode=gen_config.get("dtype_mode", "numpy"),
+        execution_mode=gen_config.get("execution_mode", "pandas"),
+        dask_cluster_params=gen_config.get("dask_cluster_params"),
+        dask_blocksize=gen_config.get("dask_blocksize", "64MB"),
+        geocode_workers=gen_config.get("geocode_workers", 1),
+        work_units=gen_config.get("work_units"),
+        block_stats=gen_config.get("block_stats", False),
+        **census_config,
+    )
+
+
+def prepare_census(
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Reads and processes census data, writing processed census files (including `census_for_linking`). Returns `Census`."""
+
+    return Census(get_census_vars(cen_country, cen_year, gen_config))
+
+
+def read_census(
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Reads census data written by `prepare_census()`. Returns `Census`."""
+
+    return Census(
+        get_census_vars(cen_country, cen_year, gen_config),
+        from_census_for_linking=True,
+    )
+
+
+def prepare_boundaries(
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Reads and processes the boundaries of census `cen_country` `cen_year` and merges them. Returns merged `Boundary` used for geo-blocking and,
+    if `compare_simplified_boundaries` is True in `gen_config` and any boundaries are simplified, merged `Boundary` at full precision
+    (otherwise `None`).
+    """
+    from geometry import Boundary, Boundary_vars
+
+    boundary_config = load_config(f"{cen_country}_{cen_year}_config")["boundaries"]
+
+    list_of_boundaries = []
+    list_of_full_boundaries = []
+
+    for bound, bound_details in boundary_config.items():
+
+        tmp_boundary = Boundary(
+            Boundary_vars(
+                census_year=cen_year,
+                census_country=cen_country,
+                output_path=gen_config["output_path"],
+                output_filetype=gen_config["output_filetype"],
+                **bound_details,
+            )
+        )
+
+        tmp_boundary.get_geometry_data()
+        tmp_boundary.process()
+
+        list_of_full_boundaries.append(tmp_boundary)
+
+        if (
+            tmp_boundary.vars.simplify_tolerance is not None
+            or tmp_boundary.vars.precision_grid_size is not None
+        ):
+            tmp_boundary = tmp_boundary.simplify()
+
+        list_of_boundaries.append(tmp_boundary)
+
+    if len(list_of_boundaries) > 1:
+
+        boundary = list_of_boundaries[0].merge_boundaries(list_of_boundaries[1:])
+
+    else:
+        boundary = list_of_boundaries[0]
+
+    full_boundary = None
+    if gen_config.get("compare_simplified_boundaries", False) is True and any(
+        x is not y for x, y in zip(list_of_boundaries, list_of_full_boundaries)
+    ):
+        if len(list_of_full_boundaries) > 1:
+            full_boundary = list_of_full_boundaries[0].merge_boundaries(
+                list_of_full_boundaries[1:]
+            )
+        else:
+            full_boundary = list_of_full_boundaries[0]
+
+    return boundary, full_boundary
+
+
+def get_target_geometry(
+    geom_details,
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Returns `TargetGeometry` (without data) for target geometry configuration `geom_details` and census `cen_country` `cen_year`."""
+    from geometry import TargetGeometry, TargetGeometry_vars
+
+    return TargetGeometry(
+        TargetGeometry_vars(
+            census_year=cen_year,
+            census_country=cen_country,
+            output_path=gen_config["output_path"],
+            output_filetype=gen_config["output_filetype"],
+            dtype_mode=gen_config.get("dtype_mode", "numpy"),
+            **geom_details,
+        )
+    )
+
+
+def clean_target_geometry(
+    geom_details,
+    cen_country,
+    cen_year,
+    gen_config,
+):
+    """Reads, cleans and dissolves target geometry data, writing `standardised` and `processed` target geometry files. Returns `TargetGeometry`.
+    Target geometries processed by tile (`gis_tile_pattern`) are read and cleaned one tile at a time by `assign_target_geometry()` instead.
+    """
+
+    target_geom = get_target_geometry(geom_details, cen_country, cen_year, gen_config)
+
+    if target_geom.vars.gis_tile_pattern is None:
+        target_geom.get_geometry_data()
+        target_geom.clean_tg()
+        target_geom.process()
+
+    return target_geom
+
+
+def assign_target_geometry(
+    target_geom,
+    census,
+    boundary,
+    full_boundary,
+):
+    """Assigns cleaned target geometry data to `boundary`, adds block codes and uids, deduplicates addresses and writes the `slim`
+    target geometry file used for geocoding. Returns `TargetGeometry`.
+    """
+
+    if target_geom.vars.gis_tile_pattern is not None:
+        target_geom.process_by_tile(
+            boundary, census.block_dictionary, census.vars.block_code_field
+        )
+    else:
+        if full_boundary is not None:
+            target_geom.compare_boundary_assignment(full_boundary, boundary)
+        target_geom.assigntoboundary(
+            boundary,
+        )
+        if census.block_dictionary is not None:
+            target_geom.add_block_codes(
+                census.block_dictionary, census.vars.block_code_field
+            )
+        target_geom.create_uid_of_geocode_field()
+        target_geom.dedup_addresses()
+        target_geom.create_tgforlinking()
+
+    return target_geom
+
+
+def prepare_target_geometry(
+    geom_details,
+    census,
+    boundary,
+    full_boundary,
+    gen_config,
+):
+    """Reads and processes target geometry data, assigning it to `boundary` and writing processed target geometry files
+    (including `slim`), see `clean_target_geometry()` and `assign_target_geometry()`. Returns `TargetGeometry`.
+    """
+
+    target_geom = clean_target_geometry(
+        geom_details, census.vars.country, census.vars.year, gen_config
+    )
+
+    return assign_target_geometry(target_geom, census, boundary, full_boundary)
+
+
+def read_target_geometry(
+    geom_details,
+    census,
+    gen_config,
+):
+    """Reads slim target geometry data written by `prepare_target_geometry()`. Returns `TargetGeometry`."""
+
+    target_geom = get_target_geometry(
+        geom_details, census.vars.country, census.vars.year, gen_config
+    )
+    target_geom.read_tgforlinking(census.vars.block_code_field)
+
+    return target_geom
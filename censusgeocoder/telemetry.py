@@ -0,0 +1,247 @@
+"""Records the wall time, CPU time, peak memory and row counts of each stage of CensusGeocoder to a JSON-lines run log.
+
+Stages are methods of `census.Census`, `geometry.Geometry` (and its subclasses) and `geocode.GeoCode` decorated with `stage()`.
+Stages are only recorded once `start_run()` has been called, which sets the run log in an environment variable so that worker processes
+(see `pipeline` and `census.Census.geocode()`) write to the same log. Each line of the log is one call of a stage:
+
+    {"run_id": "20240101T120000", "stage": "Census._add_lkup", "country": "EW", "year": 1901, "subset": null, "wall_s": 1.2,
+     "cpu_s": 1.1, "peak_rss_delta_mb": 150.0, "rows_in": 100000, "rows_out": 99500, "pid": 1234, ...}
+
+`summarise()` aggregates the log by stage into a summary table. Stages are nested (e.g. `GeoCode` stages run inside `Census.geocode`),
+so times of nested stages are included in the times of the stages that call them.
+"""
+from contextlib import contextmanager
+import contextvars
+from datetime import datetime
+import functools
+import json
+import os
+import pathlib
+import sys
+import time
+
+import pandas as pd
+
+LOG_ENV_VAR = "CENSUSGEOCODER_TELEMETRY_LOG"
+"""Name of environment variable containing path of run log."""
+
+_labels = contextvars.ContextVar("telemetry_labels", default={})
+
+
+def start_run(
+    output_path,
+):
+    """Starts recording stages to a new run log `output_path/telemetry/run_<timestamp>.jsonl`, returns path of run log.
+
+    Parameters
+    ----------
+
+    output_path: str
+        Directory path outputs are written to.
+
+    Returns
+    -------
+
+    log_file: `pathlib.Path`
+        Path of run log.
+
+    """
+
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+    log_file = pathlib.Path(output_path, "telemetry", f"run_{run_id}.jsonl")
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    log_file.touch()
+
+    os.environ[LOG_ENV_VAR] = str(log_file)  # inherited by worker processes
+
+    return log_file
+
+
+@contextmanager
+def context(
+    **labels,
+):
+    """Context manager adding `labels` (e.g. `subset=1`) to records of stages run inside it."""
+
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def _peak_rss():
+    """Returns peak resident memory (bytes) of current process, or `None` where the `resource` module is not available (Windows)."""
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":  # kilobytes on Linux, bytes on macOS
+        peak *= 1024
+
+    return peak
+
+
+def _rows(obj):
+    """Returns number of rows of `obj` if it is a pandas object (or dictionary of them), otherwise `None`. dask objects return
+    `None`, as counting their rows would compute them."""
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        return len(obj)
+    elif isinstance(obj, dict) and obj:
+        rows = [_rows(x) for x in obj.values()]
+        return None if None in rows else sum(rows)
+    else:
+        return None
+
+
+def _vars_labels(obj):
+    """Returns labels of census, year, geometry and tile of `obj` from its `vars`."""
+
+    labels = {}
+    obj_vars = getattr(obj, "vars", None)
+    for label, attr in [
+        ("country", "country"),
+        ("country", "census_country"),
+        ("year", "year"),
+        ("year", "census_year"),
+        ("geom_name", "geom_name"),
+        ("tile", "tile"),
+    ]:
+        value = getattr(obj_vars, attr, None)
+        if value is not None:
+            labels[label] = value
+
+    return labels
+
+
+def stage(
+    data_attr="data",
+):
+    """Decorator recording each call of a method as a stage in the run log (if a run has been started, see `start_run()`).
+
+    Parameters
+    ----------
+
+    data_attr: str or None
+        Name of attribute holding the data the method works on. Rows in and out are the rows of `data_attr` before and after the
+        call. Where the attribute isn't a `pd.DataFrame` (e.g. it isn't set yet, or is a dask DataFrame), rows in are the rows of the method's
+        first argument and rows out the rows of its return value, if they are `pd.DataFrame`s (or dictionaries of them). `None` to
+        always count the first argument and return value, e.g. candidate pairs in `geocode.GeoCode`.
+
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+
+            log_file = os.environ.get(LOG_ENV_VAR)
+            if log_file is None:
+                return method(self, *args, **kwargs)
+
+            rows_in = _rows(getattr(self, data_attr, None)) if data_attr else None
+            if rows_in is None and args:
+                rows_in = _rows(args[0])
+
+            peak_before = _peak_rss()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+
+            result = method(self, *args, **kwargs)
+
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak_after = _peak_rss()
+
+            rows_out = _rows(getattr(self, data_attr, None)) if data_attr else None
+            if rows_out is None:
+                rows_out = _rows(result)
+
+            record = {
+                "run_id": pathlib.Path(log_file).stem.removeprefix("run_"),
+                "stage": f"{type(self).__name__}.{method.__name__}",
+                **_vars_labels(self),
+                **_labels.get(),
+                "wall_s": round(wall, 6),  # microseconds, so short stages can be timed (e.g. by benchmarks)
+                "cpu_s": round(cpu, 6),
+                "peak_rss_delta_mb": (
+                    None
+                    if peak_before is None
+                    else round((peak_after - peak_before) / 1024**2, 1)
+                ),
+                "rows_in": rows_in,
+                "rows_out": rows_out,
+                "pid": os.getpid(),
+                "time": datetime.now().isoformat(timespec="seconds"),
+            }
+
+            with open(log_file, "a") as f:
+                f.write(
+                    json.dumps(record, default=str) + "\n"
+                )  # one write per record, so records from different processes don't interleave
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def read_log(
+    log_file,
+):
+    """Reads run log `log_file`, returns `pd.DataFrame` of one row per stage call."""
+
+    with open(log_file, "r") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def summarise(
+    log_file,
+):
+    """Aggregates run log `log_file` by stage, writes summary table to `<log_file>_summary.tsv` and returns it.
+
+    Parameters
+    ----------
+
+    log_file: str
+        Path of run log.
+
+    Returns
+    -------
+
+    summary: `pd.DataFrame`
+        For each stage: number of calls, total wall and CPU time (s), largest increase of peak memory (MB) and total rows in and out,
+        sorted by total wall time.
+
+    """
+
+    log = read_log(log_file)
+    if log.empty:
+        return log
+
+    summary = (
+        log.groupby("stage")
+        .agg(
+            calls=("stage", "size"),
+            wall_s=("wall_s", "sum"),
+            cpu_s=("cpu_s", "sum"),
+            max_peak_rss_delta_mb=("peak_rss_delta_mb", "max"),
+            rows_in=("rows_in", lambda x: x.sum(min_count=1)),
+            rows_out=("rows_out", lambda x: x.sum(min_count=1)),
+        )
+        .sort_values("wall_s", ascending=False)
+        .reset_index()
+        .round({"wall_s": 3, "cpu_s": 3})
+        .astype({"rows_in": "Int64", "rows_out": "Int64"})
+    )
+
+    log_file = pathlib.Path(log_file)
+    summary.to_csv(
+        log_file.with_name(f"{log_file.stem}_summary.tsv"), sep="\t", index=False
+    )
+
+    return summary
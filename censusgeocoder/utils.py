@@ -1,20 +1,27 @@
+from __future__ import annotations  # type hints refer to gpd and dd, which are imported by the functions that use them
+
+from contextlib import contextmanager
+import heapq
 import pathlib
 
 import numpy as np
 import pandas as pd
 
-from rapidfuzz import fuzz
-from recordlinkage.base import BaseCompareFeature
-from recordlinkage.utils import fillna as _fillna
-
-import geopandas as gpd
 import json
 
 from inspect import signature
 
-from scipy import spatial
 
-from unidecode import unidecode
+def __getattr__(name):
+    """Imports `rapidfuzzy_wratio_comparer` from `comparer` on first use, so that importing utils doesn't import recordlinkage
+    (which imports scikit-learn)."""
+
+    if name == "rapidfuzzy_wratio_comparer":
+        from comparer import rapidfuzzy_wratio_comparer
+
+        return rapidfuzzy_wratio_comparer
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def clean_address_data(
@@ -60,6 +67,8 @@ def clean_address_data(
 
     """
 
+    from unidecode import unidecode
+
     field_to_clean_new = f"{field_to_clean}{suffix}"
 
     df[field_to_clean_new] = df[field_to_clean]
@@ -91,9 +100,104 @@ def clean_address_data(
             np.nan,
         )
 
+    if isinstance(df[field_to_clean].dtype, pd.StringDtype):
+        df[field_to_clean_new] = df[field_to_clean_new].astype(
+            df[field_to_clean].dtype
+        )  # keep string dtype (e.g. "string[pyarrow]") of field_to_clean, see `set_dtypes()`
+
     return (df, field_to_clean_new)
 
 
+def set_dtypes(
+    data: pd.DataFrame,
+    dtype_mode: str,
+    string_fields: list = None,
+    category_fields: list = None,
+) -> pd.DataFrame:
+    """Sets dtypes of text and low-cardinality fields in `data` according to `dtype_mode`. Returns `data` with dtypes set.
+
+    Parameters
+    ----------
+
+    data: `pd.DataFrame`
+        `pd.DataFrame` (or `gpd.GeoDataFrame`).
+
+    dtype_mode: str
+        "numpy" leaves dtypes unchanged (text is stored as object dtype). "arrow" converts `string_fields` to "string[pyarrow]",
+        numeric `category_fields` to the smallest integer dtype and other `category_fields` to "category".
+
+    string_fields: list, optional
+        Names of `pd.Series` containing text, e.g. addresses.
+
+    category_fields: list, optional
+        Names of `pd.Series` with few unique values, e.g. `subset_id`.
+
+    Returns
+    -------
+
+    data: `pd.DataFrame`
+        `data` with dtypes set.
+
+    """
+
+    if dtype_mode == "numpy":
+        return data
+
+    elif dtype_mode == "arrow":
+        for col in [x for x in flatten(string_fields or []) if x in data.columns]:
+            data[col] = data[col].astype("string[pyarrow]")
+
+        for col in [x for x in flatten(category_fields or []) if x in data.columns]:
+            if pd.api.types.is_integer_dtype(data[col]):
+                data[col] = pd.to_numeric(data[col], downcast="integer")
+            else:
+                data[col] = data[col].astype("category")
+
+        return data
+
+    else:
+        raise ValueError(f"dtype_mode is {dtype_mode} must be 'numpy' or 'arrow'")
+
+
+def get_read_dtypes(
+    dtype_mode: str,
+    string_fields: list,
+    read_params: dict,
+) -> dict:
+    """Returns copy of `read_params` with `dtype` set so that `string_fields` are read as "string[pyarrow]" if `dtype_mode` is "arrow".
+    Only used for `pd.read_csv`, other readers ignore `dtype`.
+
+    Parameters
+    ----------
+
+    dtype_mode: str
+        "numpy" or "arrow", see `set_dtypes()`.
+
+    string_fields: list
+        Names of `pd.Series` containing text, e.g. addresses.
+
+    read_params: dict
+        Dictionary of keyword arguments passed to `pd.read_csv`.
+
+    Returns
+    -------
+
+    read_params: dict
+        Dictionary of keyword arguments passed to `pd.read_csv`.
+
+    """
+
+    if dtype_mode != "arrow" or (
+        "dtype" in read_params and not isinstance(read_params["dtype"], dict)
+    ):
+        return read_params
+
+    dtype = {col: "string[pyarrow]" for col in flatten(string_fields) if col is not None}
+    dtype.update(read_params.get("dtype", {}))  # dtypes set in config take priority
+
+    return {**read_params, "dtype": dtype}
+
+
 def process_coords(
     target_df: pd.DataFrame,
     long_field: str,
@@ -124,6 +228,8 @@ def process_coords(
         `gpd.GeoDataFrame` containing original data (minus the original lat and long fields) with geometry column in WKT.
 
     """
+    import geopandas as gpd
+
     target_gdf = gpd.GeoDataFrame(
         target_df,
         geometry=gpd.points_from_xy(
@@ -140,53 +246,366 @@ def process_coords(
     return target_gdf
 
 
-class rapidfuzzy_wratio_comparer(BaseCompareFeature):
-    """Provides funtionality for recordlinkage BaseCompareFeature to use
-    algorithm from rapidfuzz rather than fuzzywuzzy.
+def assign_points_to_polygons(
+    points: gpd.GeoSeries,
+    polygons: gpd.GeoSeries,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Assigns each point in `points` to the polygon in `polygons` it intersects. Returns positional indices of
+    matched points and the polygon each is assigned to.
+
+    Parameters
+    ----------
+
+    points: `gpd.GeoSeries`
+        `gpd.GeoSeries` containing point geometries.
+
+    polygons: `gpd.GeoSeries`
+        `gpd.GeoSeries` containing polygon geometries, e.g. boundary data.
+
+    Returns
+    -------
+
+    point_idx: `np.ndarray`
+        Positional indices of points that intersect a polygon, in ascending order.
+
+    polygon_idx: `np.ndarray`
+        Positional index of the polygon each point in `point_idx` is assigned to.
+
+    Notes
+    -----
+
+    Candidate pairs are found with a single bulk query of the spatial index on polygon bounding boxes, then tested
+    against prepared polygons. Points that fall on a shared edge intersect more than one polygon; these are assigned
+    to the polygon with the lowest position in `polygons` so that each point is only assigned once.
+
     """
 
-    def __init__(
-        self,
-        left_on,
-        right_on,
-        method="rapidfuzzy_wratio",
-        threshold=None,
-        missing_value=0.0,
-        label=None,
-    ):
-        super(rapidfuzzy_wratio_comparer, self).__init__(left_on, right_on, label=label)
-
-        self.method = method
-        self.threshold = threshold
-        self.missing_value = missing_value
-
-    def _compute_vectorized(self, s_left, s_right):
-
-        if self.method == "rapidfuzzy_wratio":
-            str_sim_alg = rapidfuzzy_wratio
-        elif self.method == "rapidfuzzy_partial_ratio":
-            str_sim_alg = rapidfuzzy_partialratio
-        elif self.method == "rapidfuzzy_partial_ratio_alignment":
-            str_sim_alg = rapidfuzzy_partialratioalignment
-        elif self.method == "rapidfuzzy_get_src_start_pos":
-            str_sim_alg = rapidfuzzy_get_src_start_pos
+    import shapely
+
+    point_idx, polygon_idx = polygons.sindex.query(points.values)
+
+    polygon_geoms = polygons.values.to_numpy()
+    shapely.prepare(polygon_geoms)
+
+    hits = shapely.intersects(
+        polygon_geoms[polygon_idx], points.values.to_numpy()[point_idx]
+    )
+    point_idx = point_idx[hits]
+    polygon_idx = polygon_idx[hits]
+
+    order = np.lexsort((polygon_idx, point_idx))
+    point_idx = point_idx[order]
+    polygon_idx = polygon_idx[order]
+
+    first = np.ones(len(point_idx), dtype=bool)
+    first[1:] = point_idx[1:] != point_idx[:-1]
+
+    return (point_idx[first], polygon_idx[first])
+
+
+def overlay_intersection(
+    df1: gpd.GeoDataFrame,
+    df2: gpd.GeoDataFrame,
+) -> gpd.GeoDataFrame:
+    """Intersects polygons in `df1` with polygons in `df2`, returns `gpd.GeoDataFrame` of the polygonal intersections
+    with the attributes of both. Equivalent to `gpd.overlay(df1, df2, how="intersection", keep_geom_type=True)`.
+
+    Parameters
+    ----------
+
+    df1: `gpd.GeoDataFrame`
+        `gpd.GeoDataFrame` containing polygon geometries.
+
+    df2: `gpd.GeoDataFrame`
+        `gpd.GeoDataFrame` containing polygon geometries.
+
+    Returns
+    -------
+
+    overlaid: `gpd.GeoDataFrame`
+        `gpd.GeoDataFrame` containing one row for each intersecting pair of polygons in `df1` and `df2`.
+
+    Notes
+    -----
+
+    Only pairs of polygons returned by a bulk query of the spatial index of `df2` are intersected, so the cost of the
+    overlay grows with the number of intersecting pairs rather than the product of the sizes of `df1` and `df2`. Line and
+    point fragments (e.g. where polygons only share an edge) are discarded.
+
+    """
+
+    import geopandas as gpd
+    import shapely
+
+    idx1, idx2 = df2.sindex.query(df1.geometry.values, predicate="intersects")
+
+    geoms = shapely.intersection(
+        df1.geometry.values.to_numpy()[idx1], df2.geometry.values.to_numpy()[idx2]
+    )
+    geoms = _polygonal_parts(geoms)
+
+    keep = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+    idx1, idx2, geoms = idx1[keep], idx2[keep], geoms[keep]
+
+    attrs1 = df1.drop(columns=df1.geometry.name).iloc[idx1].reset_index(drop=True)
+    attrs2 = df2.drop(columns=df2.geometry.name).iloc[idx2].reset_index(drop=True)
+
+    shared_cols = attrs1.columns.intersection(attrs2.columns)
+    attrs1 = attrs1.rename(columns={col: f"{col}_1" for col in shared_cols})
+    attrs2 = attrs2.rename(columns={col: f"{col}_2" for col in shared_cols})
+
+    overlaid = gpd.GeoDataFrame(
+        pd.concat([attrs1, attrs2], axis="columns"),
+        geometry=geoms,
+        crs=df1.crs,
+    )
+
+    return overlaid
+
+
+def _polygonal_parts(geoms: np.ndarray) -> np.ndarray:
+    """Reduces each geometry in `geoms` to its polygonal parts; geometry collections become (multi)polygons and
+    non-polygonal geometries become `None`."""
+
+    import shapely
+
+    geoms = geoms.copy()
+    type_ids = shapely.get_type_id(geoms)
+
+    geoms[~np.isin(type_ids, [3, 6, 7])] = None  # 3: Polygon, 6: MultiPolygon, 7: GeometryCollection
+
+    collections = np.flatnonzero(type_ids == 7)
+    if len(collections) > 0:
+        parts, part_idx = shapely.get_parts(geoms[collections], return_index=True)
+        parts, sub_idx = shapely.get_parts(parts, return_index=True)
+        part_idx = part_idx[sub_idx]
+
+        is_polygon = shapely.get_type_id(parts) == 3
+        parts, part_idx = parts[is_polygon], part_idx[is_polygon]
+
+        geoms[collections] = None
+        if len(parts) > 0:
+            coll_pos, part_codes = np.unique(part_idx, return_inverse=True)
+            geoms[collections[coll_pos]] = shapely.multipolygons(
+                parts, indices=part_codes
+            )
+
+    return geoms
+
+
+def dissolve_geometries(
+    data: gpd.GeoDataFrame,
+    by: str | list,
+    method: str = "unary_union",
+) -> gpd.GeoDataFrame:
+    """Dissolves geometries in `data` by `by`, returns `gpd.GeoDataFrame` with one row per group.
+
+    Parameters
+    ----------
+
+    data: `gpd.GeoDataFrame`
+        `gpd.GeoDataFrame` containing geometries to dissolve.
+
+    by: str | list
+        Name or list of names of pd.Series to group geometries by.
+
+    method: str, optional
+        Dissolve method: "unary_union" uses `gpd.GeoDataFrame.dissolve()`; "coverage" is intended for
+        polygons that form a clean coverage (i.e. adjacent but non-overlapping); "collect" gathers the geometries
+        of each group into a multi-part geometry without merging them. See Notes.
+
+    Returns
+    -------
+
+    dissolved: `gpd.GeoDataFrame`
+        `gpd.GeoDataFrame` with one row per group, as returned by `gpd.GeoDataFrame.dissolve(by=by, as_index=False)`.
+
+    Notes
+    -----
+
+    With "coverage", groups containing a single geometry are passed through untouched and groups of several geometries are
+    merged with `shapely.coverage_union_all()`, which only removes shared edges. If a group's geometries are not a valid
+    coverage, or the result is not a valid geometry, that group falls back to `shapely.union_all()`.
+
+    With "collect", the parts of each group's geometries are collected into a multi-part geometry (e.g. a MultiLineString)
+    without noding or merging them, which avoids the topology work of a union where only the combined geometry is needed.
+
+    """
+
+    import geopandas as gpd
+
+    if method == "unary_union":
+        return data.dissolve(by=by, as_index=False)
+    elif method not in ["coverage", "collect"]:
+        raise ValueError("The dissolve method '{}' is not known.".format(method))
+
+    by = list(flatten(by))
+    geom_col = data.geometry.name
+
+    data = data.dropna(subset=by)
+    if data.empty:
+        return data.dissolve(by=by, as_index=False)
+
+    codes = data.groupby(by, sort=True).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    geoms = data.geometry.values.to_numpy()[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+
+    if method == "coverage":
+        dissolved_geoms = geoms[starts]
+
+        for pos in np.flatnonzero(ends - starts > 1):
+            dissolved_geoms[pos] = _coverage_union(geoms[starts[pos] : ends[pos]])
+
+    else:
+        dissolved_geoms = collect_parts(
+            geoms, np.cumsum(np.r_[False, codes[1:] != codes[:-1]]), len(starts)
+        )
+
+    dissolved = pd.DataFrame(data.iloc[order[starts]]).reset_index(drop=True)
+    dissolved[geom_col] = dissolved_geoms
+    dissolved = gpd.GeoDataFrame(dissolved, geometry=geom_col, crs=data.crs)
+
+    col_order = by + [geom_col] + [col for col in dissolved.columns if col not in by and col != geom_col]
+
+    return dissolved[col_order]
+
+
+def _coverage_union(geoms: np.ndarray):
+    """Unions `geoms` as a polygon coverage, falling back to a full union if `geoms` are not a valid coverage."""
+
+    import shapely
+
+    if shapely.coverage_is_valid(geoms):
+        union = shapely.coverage_union_all(geoms)
+        if shapely.is_valid(union):
+            return union
+
+    return shapely.union_all(geoms)
+
+
+def collect_parts(geoms: np.ndarray, group_idx: np.ndarray, n_groups: int) -> np.ndarray:
+    """Collects the parts of `geoms` into one multi-part geometry per group in `group_idx` (dense group numbers, 0 to `n_groups` - 1),
+    without merging them. Returns array of multi-part geometries, e.g. MultiLineStrings."""
+
+    import shapely
+
+    parts, part_idx = shapely.get_parts(geoms, return_index=True)
+    part_types = np.unique(shapely.get_type_id(parts))
+
+    if np.array_equal(part_types, [1]):  # 1: LineString
+        collect_func = shapely.multilinestrings
+    elif np.array_equal(part_types, [0]):  # 0: Point
+        collect_func = shapely.multipoints
+    elif np.array_equal(part_types, [3]):  # 3: Polygon
+        collect_func = shapely.multipolygons
+    else:
+        collect_func = shapely.geometrycollections
+
+    return collect_func(
+        parts,
+        indices=group_idx[part_idx],
+        out=np.full(n_groups, None, dtype=object),
+    )
+
+
+def simplify_polygons(
+    geoms: gpd.GeoSeries,
+    tolerance: float | None = None,
+    grid_size: float | None = None,
+) -> np.ndarray:
+    """Simplifies polygons and snaps their vertices to a grid, returns array of simplified polygons.
+
+    Parameters
+    ----------
+
+    geoms: `gpd.GeoSeries`
+        `gpd.GeoSeries` containing polygon geometries, e.g. boundary data.
+
+    tolerance: float | None, optional
+        Simplification tolerance in units of the CRS (metres for EPSG:27700). No simplification if None.
+
+    grid_size: float | None, optional
+        Size of the precision grid vertices are snapped to, in units of the CRS. No snapping if None.
+
+    Returns
+    -------
+
+    simplified: `np.ndarray`
+        Array of simplified polygons.
+
+    Notes
+    -----
+
+    Polygons that form a valid coverage (adjacent, non-overlapping) are simplified with `shapely.coverage_simplify()`,
+    which simplifies shared edges once so no gaps or overlaps are introduced between neighbouring polygons. Otherwise each
+    polygon is simplified separately with `shapely.simplify(preserve_topology=True)`.
+
+    """
+
+    import shapely
+
+    simplified = geoms.values.to_numpy()
+
+    if tolerance is not None:
+        if shapely.coverage_is_valid(simplified):
+            simplified = shapely.coverage_simplify(simplified, tolerance)
         else:
-            raise ValueError("The algorithm '{}' is not known.".format(self.method))
+            simplified = shapely.simplify(simplified, tolerance, preserve_topology=True)
+
+    if grid_size is not None:
+        simplified = shapely.set_precision(simplified, grid_size)
+
+    return simplified
+
+
+def assign_to_polygons(
+    geoms: gpd.GeoSeries,
+    polygons: gpd.GeoSeries,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Finds the polygon(s) in `polygons` each geometry in `geoms` is assigned to. Returns positional indices of
+    geometries and polygons for each assignment.
+
+    Parameters
+    ----------
 
-        c = str_sim_alg(s_left, s_right)
+    geoms: `gpd.GeoSeries`
+        `gpd.GeoSeries` of point, line or polygon geometries, e.g. target geometry data.
 
-        if self.threshold is not None:
-            c = c.where((c < self.threshold) | (pd.isnull(c)), other=1.0)
-            c = c.where((c >= self.threshold) | (pd.isnull(c)), other=0.0)
+    polygons: `gpd.GeoSeries`
+        `gpd.GeoSeries` containing polygon geometries, e.g. boundary data.
 
-        c = _fillna(c, self.missing_value)
+    Returns
+    -------
+
+    geom_idx: `np.ndarray`
+        Positional indices of geometries in `geoms`.
+
+    polygon_idx: `np.ndarray`
+        Positional indices of the polygons each geometry in `geom_idx` is assigned to.
+
+    Notes
+    -----
+
+    Points are assigned to one polygon with `assign_points_to_polygons()`. Other geometries are assigned to every polygon
+    they intersect, as lines are when overlaid on boundaries in `TargetGeometry.assigntoboundary()`.
+
+    """
 
-        return c
+    if (geoms.geom_type == "Point").all():
+        return assign_points_to_polygons(geoms, polygons)
+
+    return polygons.sindex.query(geoms.values, predicate="intersects", sort=True)
 
 
 def rapidfuzzy_wratio(s1, s2):
     """Apply rapidfuzz wratio to compare two pandas series"""
 
+    from rapidfuzz import fuzz
+
     conc = pd.Series(list(zip(s1, s2)))
 
     def fuzzy_apply(x):
@@ -206,6 +625,8 @@ def rapidfuzzy_wratio(s1, s2):
 def rapidfuzzy_partialratio(s1, s2):
     """Apply rapidfuzz partial_ratio to compare two pandas series"""
 
+    from rapidfuzz import fuzz
+
     conc = pd.Series(list(zip(s1, s2)))
 
     def fuzzy_apply(x):
@@ -225,6 +646,8 @@ def rapidfuzzy_partialratio(s1, s2):
 def rapidfuzzy_partialratioalignment(s1, s2):
     """Apply rapidfuzz partial_ratio_alignment to compare two pandas series"""
 
+    from rapidfuzz import fuzz
+
     conc = pd.Series(list(zip(s1, s2)))
 
     def fuzzy_apply(x):
@@ -246,6 +669,8 @@ def rapidfuzzy_partialratioalignment(s1, s2):
 def rapidfuzzy_get_src_start_pos(s1, s2):
     """Apply rapidfuzz partial_ratio_alignment to compare two pandas series"""
 
+    from rapidfuzz import fuzz
+
     conc = pd.Series(list(zip(s1, s2)))
 
     def fuzzy_apply(x):
@@ -262,27 +687,154 @@ def rapidfuzzy_get_src_start_pos(s1, s2):
     return conc.apply(fuzzy_apply)
 
 
-def calc_dist(coords: gpd.GeoSeries):
-    """Calculate distance between coordinates. Returns distance.
+def calc_dist_by_group(
+    group_ids: pd.Series,
+    x: np.ndarray,
+    y: np.ndarray,
+) -> pd.Series:
+    """Calculate mean distance between the points in each group. Returns mean distance for each group.
+
+    Parameters
+    ----------
+
+    group_ids: `pd.Series`
+        `pd.Series` of group ids, one for each point.
+
+    x: `np.ndarray`
+        x coordinates of points.
+
+    y: `np.ndarray`
+        y coordinates of points.
+
+    Returns
+    -------
+
+    mean_dist: `pd.Series`
+        Mean pairwise distance between points in each group, indexed by group id. NaN for groups of 1 point.
+
+    Notes
+    -----
+
+    Points are sorted by group into a padded array with one row per group, so pairwise distances for all groups are
+    calculated at once. Memory use grows with the square of the largest group, so groups should be small
+    (e.g. capped by `dedup_max_points`).
+
+    """
+
+    codes, uniques = pd.factorize(group_ids, sort=True)
+
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    sizes = np.bincount(codes, minlength=len(uniques))
+    starts = np.cumsum(sizes) - sizes
+    pos_in_group = np.arange(len(codes)) - starts[codes]
+
+    max_size = sizes.max() if len(sizes) > 0 else 0
+    grouped_x = np.full((len(uniques), max_size), np.nan)
+    grouped_y = np.full((len(uniques), max_size), np.nan)
+    grouped_x[codes, pos_in_group] = np.asarray(x)[order]
+    grouped_y[codes, pos_in_group] = np.asarray(y)[order]
+
+    dists = np.hypot(
+        grouped_x[:, :, None] - grouped_x[:, None, :],
+        grouped_y[:, :, None] - grouped_y[:, None, :],
+    )
+    pairs = np.triu(np.ones((max_size, max_size), dtype=bool), k=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_dist = np.nansum(dists[:, pairs], axis=1) / (sizes * (sizes - 1) / 2)
+
+    return pd.Series(mean_dist, index=uniques, name="dist_calc")
+
+
+def list_by_group_as_str(
+    group_ids: pd.Series,
+    values: pd.Series,
+) -> pd.Series:
+    """Lists the values in each group as a string. Returns `pd.Series` of strings indexed by group id.
+
+    Parameters
+    ----------
+
+    group_ids: `pd.Series`
+        `pd.Series` of group ids.
+
+    values: `pd.Series`
+        `pd.Series` of values to list, aligned with `group_ids`.
+
+    Returns
+    -------
+
+    value_lists: `pd.Series`
+        String of a list of values in each group, in original order, e.g. "['a', 'b']", indexed by group id.
+
+    """
+
+    codes, uniques = pd.factorize(group_ids, sort=True)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+
+    if pd.api.types.is_numeric_dtype(values):
+        value_strs = values.astype(str)
+    else:
+        value_strs = values.map(repr)
+    value_strs = value_strs.to_numpy(dtype=object)[order]
+
+    is_first = np.r_[True, codes[1:] != codes[:-1]]
+    is_last = np.r_[codes[1:] != codes[:-1], True]
+
+    tokens = (
+        np.where(is_first, "[", ", ").astype(object)
+        + value_strs
+        + np.where(is_last, "]", "").astype(object)
+    )
+
+    if len(tokens) == 0:
+        return pd.Series([], index=uniques, dtype=object)
+
+    return pd.Series(np.add.reduceat(tokens, np.flatnonzero(is_first)), index=uniques)
+
+
+def get_tile_files(
+    tile_dir: str,
+    tile_pattern: str,
+) -> dict:
+    """Finds tile files matching `tile_pattern` in `tile_dir` (including sub-directories). Returns dictionary of tile ids and file paths.
 
     Parameters
     ----------
 
-    coords: `gpd.GeoSeries`
-        `gpd.GeoSeries` containing geometry data
+    tile_dir: str
+        Path to directory containing tile files.
+
+    tile_pattern: str
+        Glob pattern of tile files, e.g. "*RoadLink.shp".
 
     Returns
     -------
 
-    mean_dist: int
-        Mean distance between 2 or more points in `coords`.
+    tile_files: dict
+        Dictionary of tile ids (file name without suffix, or value of a partitioned dataset directory such as `tile=SU`) and file paths,
+        sorted by tile id.
 
     """
 
-    np.seterr(all="ignore")
-    mean_dist = spatial.distance.pdist(np.array(list(zip(coords.x, coords.y)))).mean()
+    tile_files = {}
+    for tile_file in sorted(pathlib.Path(tile_dir).rglob(tile_pattern)):
+        if "=" in tile_file.parent.name:
+            tile_id = tile_file.parent.name.split("=", 1)[1]
+        else:
+            tile_id = tile_file.stem
+
+        if tile_id in tile_files:
+            tile_id = f"{tile_id}_{tile_file.stem}"
 
-    return mean_dist
+        tile_files[tile_id] = str(tile_file)
+
+    if len(tile_files) == 0:
+        raise ValueError(f"No files matching '{tile_pattern}' in {tile_dir}")
+
+    return tile_files
 
 
 def flatten(arg: str | int | list):
@@ -363,10 +915,66 @@ def validate_geopandas_read_file_kwargs(file_path, params):
 
     """
 
+    import geopandas as gpd
+
     sig = signature(gpd.read_file)
     sig.bind(file_path, **params)
 
 
+def validate_parquet_kwargs(file_path, read_library, params):
+    """Validate keyword arguments for `gpd.read_parquet()`, `pd.read_parquet()` or their feather equivalents
+
+    Parameters
+    ----------
+
+    file_path: str
+        Path to parquet or feather file.
+
+    read_library: `gpd.read_parquet` | `pd.read_parquet` | `gpd.read_feather` | `pd.read_feather`
+        Read library that `params` will be passed to.
+
+    params: dict
+        Dictionary of keyword arguments to pass to `read_library`.
+
+    """
+
+    sig = signature(read_library)
+    sig.bind(file_path, **params)
+
+
+def get_geoarrow_geometry_column(file_path) -> str | None:
+    """Gets name of primary geometry column of a GeoParquet (or geopandas feather) file at `file_path`.
+
+    Parameters
+    ----------
+
+    file_path: str
+        Path to parquet or feather file.
+
+    Returns
+    -------
+
+    geometry_column: str | None
+        Name of primary geometry column, or None if the file contains no geometry metadata (i.e. not written by geopandas).
+
+    """
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if pathlib.Path(file_path).is_dir():  # partitioned dataset, check metadata of first file
+        file_path = next(pathlib.Path(file_path).rglob("*.parquet"))
+
+    if pathlib.Path(file_path).suffix == ".parquet":
+        metadata = pyarrow.parquet.read_schema(file_path).metadata
+    else:
+        metadata = pyarrow.ipc.open_file(file_path).schema.metadata
+
+    if metadata is None or b"geo" not in metadata:
+        return None
+
+    return json.loads(metadata[b"geo"])["primary_column"]
+
+
 def get_readlibrary(
     file_path,
     read_params,
@@ -385,12 +993,23 @@ def get_readlibrary(
     Returns
     -------
 
-    read_library: `pd.read_csv` | `pd.read_excel` | `gpd.read_file`
+    read_library: `pd.read_csv` | `pd.read_excel` | `gpd.read_file` | `gpd.read_parquet` | `pd.read_parquet` | `gpd.read_feather` | `pd.read_feather`
         Appropriate read library to read file at `file_path`
 
+    Notes
+    -----
+
+    Parquet and feather files are read with geopandas if they contain geometry (i.e. GeoParquet), otherwise with pandas. A directory is read
+    as a parquet dataset, e.g. partitioned by tile (`tile=<tile_id>/part-0.parquet`).
+    Keyword arguments such as `columns` and `bbox` (geopandas >= 1.0) are passed to the read library, so only the
+    required columns and features are read. Keyword arguments for `gpd.read_file()` can include `engine: "pyogrio"` and
+    `use_arrow: True` to read via Arrow, as well as `columns` and `bbox`.
+
     """
 
     ext = pathlib.Path(file_path).suffix
+    if pathlib.Path(file_path).is_dir():
+        ext = ".parquet"  # directories are read as (partitioned) parquet datasets
 
     if ext in [
         ".txt",
@@ -410,16 +1029,48 @@ def get_readlibrary(
     elif ext in [
         ".geojson",
         ".shp",
+        ".gpkg",
     ]:
+        import geopandas as gpd
 
         read_library = gpd.read_file
 
+    elif ext in [
+        ".parquet",
+    ]:
+        if get_geoarrow_geometry_column(file_path) is not None:
+            import geopandas as gpd
+
+            read_library = gpd.read_parquet
+        else:
+            read_library = pd.read_parquet
+
+        validate_parquet_kwargs(file_path, read_library, read_params)
+
+    elif ext in [
+        ".feather",
+        ".arrow",
+    ]:
+        if get_geoarrow_geometry_column(file_path) is not None:
+            import geopandas as gpd
+
+            read_library = gpd.read_feather
+        else:
+            read_library = pd.read_feather
+
+        validate_parquet_kwargs(file_path, read_library, read_params)
+
+    else:
+        raise ValueError(f"File type '{ext}' of {file_path} is not supported.")
+
     return read_library
 
 
 def read_file(
     file_path,
     read_params,
+    dtype_mode: str = "numpy",
+    string_fields: list = None,
 ) -> pd.DataFrame | gpd.GeoDataFrame:
     """Reads file at `file_path`, returns data in `pd.DataFrame` or `gpd.DataFrame`
 
@@ -432,6 +1083,12 @@ def read_file(
     read_params: dict
         Dictionary of keyword arguments for reading file.
 
+    dtype_mode: str, optional
+        "numpy" or "arrow", see `set_dtypes()`.
+
+    string_fields: list, optional
+        Names of `pd.Series` containing text, read as "string[pyarrow]" if `dtype_mode` is "arrow".
+
 
     Returns
     -------
@@ -446,10 +1103,286 @@ def read_file(
         read_params,
     )
 
+    if (
+        read_library.__name__.lstrip("_") in ["read_parquet", "read_feather"]
+        and "columns" in read_params
+    ):  # geopandas names these _read_parquet and _read_feather
+        geometry_column = get_geoarrow_geometry_column(file_path)
+        if geometry_column is not None and geometry_column not in read_params["columns"]:
+            read_params = {
+                **read_params,
+                "columns": [*read_params["columns"], geometry_column],
+            }  # as with gpd.read_file(), `columns` need not include the geometry column
+
+    if read_library is pd.read_csv:
+        read_params = get_read_dtypes(dtype_mode, string_fields or [], read_params)
+
     data = read_library(file_path, **read_params)
 
+    data = set_dtypes(data, dtype_mode, string_fields=string_fields)
+
     return data
 
+
+def read_output_file(
+    file_path,
+    write_params,
+    dtype_mode: str = "numpy",
+    string_fields: list = None,
+) -> pd.DataFrame | gpd.GeoDataFrame:
+    """Reads file written by `write_df_to_file()`, returns data in `pd.DataFrame` or `gpd.GeoDataFrame`.
+
+    Parameters
+    ----------
+
+    file_path: str
+        Path to file to read.
+
+    write_params: dict
+        Dictionary of keyword arguments that were passed to `write_df_to_file()` to write the file; only `sep` and `encoding`
+        are used to read delimited text files.
+
+    dtype_mode: str, optional
+        "numpy" or "arrow", see `set_dtypes()`.
+
+    string_fields: list, optional
+        Names of `pd.Series` containing text, read as "string[pyarrow]" if `dtype_mode` is "arrow".
+
+    Returns
+    -------
+
+    data: `pd.DataFrame` | `gpd.GeoDataFrame`
+        `pd.DataFrame` or `gpd.GeoDataFrame` containing data read from `file_path`.
+
+    """
+
+    read_params = {}
+    if pathlib.Path(file_path).suffix not in [".parquet", ".feather"]:
+        read_params = {k: v for k, v in write_params.items() if k in ["sep", "encoding"]}
+
+    return read_file(file_path, read_params, dtype_mode, string_fields)
+
+
+@contextmanager
+def dask_client(
+    execution_mode: str,
+    cluster_params: dict = None,
+):
+    """Context manager that starts a `dask.distributed.LocalCluster` and `Client` if `execution_mode` is "dask", so that dask
+    computations inside it run on the cluster. Yields the `Client` (or `None` if `execution_mode` is "pandas").
+
+    Parameters
+    ----------
+
+    execution_mode: str
+        "pandas" or "dask".
+
+    cluster_params: dict, optional
+        Dictionary of keyword arguments passed to `dask.distributed.LocalCluster`, e.g. `n_workers`, `threads_per_worker`, `memory_limit`.
+
+    Notes
+    -----
+
+    dask is only imported if `execution_mode` is "dask". Workers spill data to disk when they approach `memory_limit`.
+    Data persisted on the cluster is released when the cluster is closed.
+
+    """
+
+    if execution_mode == "pandas":
+        yield None
+
+    elif execution_mode == "dask":
+        from dask.distributed import Client, LocalCluster
+
+        with LocalCluster(**(cluster_params or {})) as cluster, Client(cluster) as client:
+            yield client
+
+    else:
+        raise ValueError(
+            f"execution_mode is {execution_mode} must be 'pandas' or 'dask'"
+        )
+
+
+def read_file_dask(
+    file_path,
+    read_params: dict,
+    blocksize: str = "64MB",
+) -> dd.DataFrame:
+    """Reads file at `file_path` to a partitioned `dask.dataframe.DataFrame`.
+
+    Parameters
+    ----------
+
+    file_path: str
+        Path to file to read.
+
+    read_params: dict
+        Dictionary of keyword arguments for reading file, see `read_file()`.
+
+    blocksize: str
+        Approximate size of each partition, e.g. "64MB".
+
+    Returns
+    -------
+
+    data: `dask.dataframe.DataFrame`
+        `dask.dataframe.DataFrame` containing data read from `file_path`.
+
+    Notes
+    -----
+
+    Delimited text files are read in partitions of `blocksize` and parquet files in partitions of their row groups, so they needn't
+    fit in memory. Other file types (e.g. .xlsx) are read with pandas and then partitioned.
+
+    """
+    import dask.dataframe as dd
+    from dask.utils import parse_bytes
+
+    read_library = get_readlibrary(file_path, read_params)
+
+    if read_library is pd.read_csv:
+        return dd.read_csv(file_path, blocksize=blocksize, **read_params)
+
+    elif read_library is pd.read_parquet:
+        return dd.read_parquet(file_path, **read_params)
+
+    else:
+        data = read_library(file_path, **read_params)
+        return dd.from_pandas(
+            data,
+            npartitions=max(
+                1, int(data.memory_usage(deep=True).sum() // parse_bytes(blocksize))
+            ),
+        )
+
+
+def read_output_files_dask(
+    file_paths: list,
+    write_params: dict,
+    dtype_mode: str = "numpy",
+    string_fields: list = None,
+) -> dd.DataFrame:
+    """Reads files written by `write_df_to_file()` to a `dask.dataframe.DataFrame` with one partition per file (see `read_output_file()`).
+
+    Parameters
+    ----------
+
+    file_paths: list
+        Paths of files to read, e.g. one file per subset.
+
+    write_params: dict
+        Dictionary of keyword arguments that were passed to `write_df_to_file()` to write the files.
+
+    dtype_mode: str, optional
+        "numpy" or "arrow", see `set_dtypes()`.
+
+    string_fields: list, optional
+        Names of `pd.Series` containing text, read as "string[pyarrow]" if `dtype_mode` is "arrow".
+
+    Returns
+    -------
+
+    data: `dask.dataframe.DataFrame`
+        `dask.dataframe.DataFrame` containing data read from `file_paths`, partition i containing the data of `file_paths[i]`.
+
+    """
+    import dask
+    import dask.dataframe as dd
+
+    return dd.from_delayed(
+        [
+            dask.delayed(read_output_file)(
+                file_path, write_params, dtype_mode, string_fields
+            )
+            for file_path in file_paths
+        ]
+    )
+
+
+def drop_duplicates_dask(
+    data: dd.DataFrame,
+    subset: list,
+) -> dd.DataFrame:
+    """Drops rows of `data` with duplicate values of `subset` fields, keeping the first row of each, as `pd.DataFrame.drop_duplicates()` does.
+
+    Parameters
+    ----------
+
+    data: `dask.dataframe.DataFrame`
+        `dask.dataframe.DataFrame` to deduplicate.
+
+    subset: list
+        Names of fields that identify duplicate rows.
+
+    Returns
+    -------
+
+    data: `dask.dataframe.DataFrame`
+        `data` with only the first row of each combination of `subset` values, in the order of `data` (with a new index).
+
+    Notes
+    -----
+
+    `dask.dataframe.DataFrame.drop_duplicates()` shuffles rows between partitions when there is more than one output partition,
+    after which the row kept is not necessarily the first. Instead, each row is numbered with its position in `data`, and the
+    row with the lowest position in each group of `subset` values is kept, so the result is the same whatever the partitions.
+
+    """
+    position_field = "_position"
+
+    data = data.assign(**{position_field: 1})
+    data[position_field] = data[position_field].cumsum()
+
+    first_positions = (
+        data.groupby(subset, dropna=False)[position_field]
+        .min()
+        .reset_index(drop=True)
+        .to_frame()
+    )
+
+    return (
+        data.merge(first_positions, on=position_field, how="inner")
+        .sort_values(position_field)
+        .drop(columns=position_field)
+    )
+
+
+def convert_to_geoparquet(
+    data: gpd.GeoDataFrame,
+    output_file: str,
+):
+    """Writes `data` to a GeoParquet file that can be read in place of the original input file, e.g. a shapefile or csv.
+
+    Parameters
+    ----------
+
+    data: `gpd.GeoDataFrame`
+        `gpd.GeoDataFrame` read from an input file.
+
+    output_file: str
+        Path to write GeoParquet file to.
+
+    Notes
+    -----
+
+    Data is compressed with zstd and written with a bbox covering column so that reads can be filtered with `bbox`
+    in `gis_read_params`.
+
+    """
+
+    output_file_path = pathlib.Path(output_file)
+
+    if not output_file_path.parent.exists():
+        output_file_path.parent.mkdir(parents=True)
+
+    data.to_parquet(
+        output_file_path,
+        compression="zstd",
+        index=False,
+        write_covering_bbox=True,
+    )
+
+
 def write_df_to_file(
     output_df: pd.DataFrame,
     output_path_components: list,
@@ -469,6 +1402,15 @@ def write_df_to_file(
     pandas_write_params: dict
         Dictionary of keyword arguments passed to `pd.to_csv`.
 
+    Notes
+    -----
+
+    The output format is set by the suffix of the last path component (i.e. `output_filetype`). ".parquet" writes
+    `gpd.GeoDataFrame` as GeoParquet (geometries as WKB) and `pd.DataFrame` as Parquet, ".feather" writes (Geo)Feather,
+    both zstd compressed. For these formats only the `columns` and `index` keyword arguments in `pandas_write_params`
+    are used. Any other suffix (e.g. ".tsv") writes text with `pd.to_csv`, and the CRS of a `gpd.GeoDataFrame` to a ".prj"
+    file (see `write_crs()`).
+
     """
 
     output_file_path = pathlib.Path(*output_path_components)
@@ -476,7 +1418,63 @@ def write_df_to_file(
     if not output_file_path.parent.exists():
         output_file_path.parent.mkdir(parents=True)
 
-    output_df.to_csv(output_file_path, **pandas_write_params)
+    if output_file_path.suffix in [".parquet", ".feather"]:
+        columns = pandas_write_params.get("columns")
+        if columns is not None:
+            output_df = output_df[columns]
+
+        if pandas_write_params.get("index", True) is True:
+            output_df = output_df.reset_index()
+        else:
+            output_df = output_df.reset_index(drop=True)
+
+        if output_file_path.suffix == ".parquet":
+            output_df.to_parquet(output_file_path, compression="zstd", index=False)
+        else:
+            output_df.to_feather(output_file_path, compression="zstd")
+
+    else:
+        output_df.to_csv(output_file_path, **pandas_write_params)
+
+        if type(output_df).__name__ == "GeoDataFrame":  # without importing geopandas to write census data
+            write_crs(output_file_path, output_df.crs)
+
+
+def write_crs(
+    file_path,
+    crs,
+):
+    """Writes `crs` as WKT to a ".prj" file alongside `file_path` (e.g. "boundaries.tsv" -> "boundaries.prj"), so that it can be
+    restored by `read_crs()` when data is read from a format that doesn't store it (e.g. geometries written as WKT to ".tsv").
+    If `crs` is `None`, any ".prj" file from a previous run is removed.
+
+    Parameters
+    ----------
+
+    file_path: str
+        Path of file the CRS belongs to.
+
+    crs: `pyproj.CRS`
+        CRS of geometries in `file_path`, e.g. `gpd.GeoDataFrame.crs`.
+
+    """
+
+    prj_path = pathlib.Path(file_path).with_suffix(".prj")
+
+    if crs is None:
+        prj_path.unlink(missing_ok=True)
+    else:
+        prj_path.write_text(crs.to_wkt())
+
+
+def read_crs(
+    file_path,
+):
+    """Returns CRS (as WKT) written by `write_crs()` for `file_path`, or `None` if there isn't one."""
+
+    prj_path = pathlib.Path(file_path).with_suffix(".prj")
+
+    return prj_path.read_text() if prj_path.exists() else None
 
 
 def add_lkup(
@@ -494,8 +1492,8 @@ def add_lkup(
     Parameters
     ----------
 
-    data: `pd.DataFrame` | `gpd.GeoDataFrame`
-        `pd.DataFrame` or `gpd.GeoDataFrame` containing data to add lookup to.
+    data: `pd.DataFrame` | `gpd.GeoDataFrame` | `dask.dataframe.DataFrame`
+        `pd.DataFrame` or `gpd.GeoDataFrame` (or `dask.dataframe.DataFrame`) containing data to add lookup to.
 
     lkup_file: str
         File path of lookup data
@@ -529,13 +1527,12 @@ def add_lkup(
 
     lkup_data = read_library(lkup_file, **lkup_params)
 
-    new_data = pd.merge(
-        left=data,
-        right=lkup_data,
+    new_data = data.merge(
+        lkup_data,
         left_on=left_on,
         right_on=right_on,
         how=how,
-    )
+    )  # if `data` is a dask DataFrame, `lkup_data` is joined to each partition
 
     lkup_cols_added = [col for col in lkup_data.columns if col != right_on]
 
@@ -543,9 +1540,161 @@ def add_lkup(
 
     if lkup_val in ["integer", "float"]:
         for col in lkup_cols_added:
-            new_data[col] = pd.to_numeric(new_data[col], downcast=lkup_val)
+            if isinstance(new_data, pd.DataFrame):
+                new_data[col] = pd.to_numeric(new_data[col], downcast=lkup_val)
+            else:  # dtype must be the same in every partition of a dask DataFrame
+                new_data[col] = new_data[col].astype(
+                    pd.to_numeric(lkup_data[col], downcast=lkup_val).dtype
+                )
 
     if fields_to_drop is not None:
         new_data = new_data.drop(columns=fields_to_drop)
 
     return new_data
+
+
+def create_block_dictionary(
+    data: pd.DataFrame,
+    block_fields: list,
+    block_code_field: str,
+    block_dictionary: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """Creates a dictionary mapping each combination of geo-blocking ids (e.g. ConParID and CEN_1851) in `data` to a dense
+    int32 code. If `block_dictionary` is given, it is extended with the combinations in `data` it doesn't already contain.
+
+    Parameters
+    ----------
+
+    data: `pd.DataFrame`
+        `pd.DataFrame` containing geo-blocking ids.
+
+    block_fields: list
+        List of names of `pd.Series` in `data` containing geo-blocking ids. Must be in the same order as the columns of `block_dictionary`.
+
+    block_code_field: str
+        Name of `pd.Series` of codes in the block dictionary.
+
+    block_dictionary: `pd.DataFrame`, optional
+        Existing block dictionary to extend.
+
+    Returns
+    -------
+
+    block_dictionary: `pd.DataFrame`
+        `pd.DataFrame` of unique combinations of geo-blocking ids and their code in `block_code_field`.
+
+    Notes
+    -----
+
+    Codes are assigned in sorted order of the geo-blocking ids, so grouping by code gives the same order as grouping by the ids
+    themselves. Codes in an existing `block_dictionary` are unchanged; new combinations are given codes after its last code.
+
+    """
+
+    blocks = data[block_fields].drop_duplicates()
+
+    if block_dictionary is None:
+        start = 0
+    else:
+        dictionary_fields = [col for col in block_dictionary.columns if col != block_code_field]
+        blocks = blocks.set_axis(dictionary_fields, axis="columns")
+        blocks = blocks.merge(
+            block_dictionary[dictionary_fields], how="left", indicator=True
+        )
+        blocks = blocks.loc[blocks["_merge"] == "left_only", dictionary_fields]
+        start = len(block_dictionary)
+
+    blocks = blocks.sort_values(list(blocks.columns), ignore_index=True)
+    blocks[block_code_field] = np.arange(start, start + len(blocks), dtype=np.int32)
+
+    if block_dictionary is not None:
+        blocks = pd.concat([block_dictionary, blocks], ignore_index=True)
+
+    return blocks
+
+
+def add_block_codes(
+    data: pd.DataFrame,
+    block_fields: list,
+    block_dictionary: pd.DataFrame,
+    block_code_field: str,
+) -> pd.DataFrame:
+    """Adds the code of each row's combination of geo-blocking ids from `block_dictionary` (see `create_block_dictionary()`) to `data`.
+
+    Parameters
+    ----------
+
+    data: `pd.DataFrame`
+        `pd.DataFrame` containing geo-blocking ids.
+
+    block_fields: list
+        List of names of `pd.Series` in `data` containing geo-blocking ids, in the same order as the columns of `block_dictionary`.
+
+    block_dictionary: `pd.DataFrame`
+        Block dictionary containing every combination of geo-blocking ids in `data`.
+
+    block_code_field: str
+        Name of `pd.Series` of codes in `block_dictionary`, added to `data`.
+
+    Returns
+    -------
+
+    data: `pd.DataFrame`
+        `data` with `block_code_field` added.
+
+    """
+
+    dictionary_fields = [col for col in block_dictionary.columns if col != block_code_field]
+
+    block_index = pd.MultiIndex.from_frame(block_dictionary[dictionary_fields])
+    positions = block_index.get_indexer(pd.MultiIndex.from_frame(data[block_fields]))
+
+    if (positions == -1).any():
+        raise ValueError(
+            f"{(positions == -1).sum()} rows have geo-blocking ids not in block dictionary"
+        )
+
+    data[block_code_field] = block_dictionary[block_code_field].to_numpy()[positions]
+
+    return data
+
+
+def balance_work_units(
+    costs: np.ndarray,
+    n_units: int,
+) -> np.ndarray:
+    """Assigns items (e.g. geo-blocking units) with `costs` to `n_units` work units of roughly equal total cost, keeping each item whole.
+
+    Parameters
+    ----------
+
+    costs: `np.ndarray`
+        Cost of each item, e.g. its number of candidate pairs.
+
+    n_units: int
+        Number of work units. Fewer are used if there are fewer items.
+
+    Returns
+    -------
+
+    work_units: `np.ndarray`
+        Work unit (0 to `n_units` - 1) of each item.
+
+    Notes
+    -----
+
+    Items are assigned in descending order of cost, each to the work unit with the lowest total cost so far (longest processing time
+    first), so no work unit costs more than 4/3 of the best possible assignment. An item costing more than the average of a work unit
+    (e.g. one very large geo-blocking unit) is a work unit on its own.
+
+    """
+
+    work_units = np.zeros(len(costs), dtype=np.int64)
+    totals = [(0, unit) for unit in range(min(n_units, len(costs)))]
+
+    for item in np.argsort(-np.asarray(costs), kind="stable"):
+        total, unit = heapq.heappop(totals)
+        work_units[item] = unit
+        heapq.heappush(totals, (total + costs[item], unit))
+
+    return work_units
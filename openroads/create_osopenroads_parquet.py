@@ -0,0 +1,121 @@
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+
+
+def get_file_or_filelist(file_path, 
+                         file_type: str = ".shp"):
+    """Accepts a directory or single filepath and creates a list of file(s).
+
+    Parameters
+    -------
+
+    file_path: str
+        Either path to file or directory
+
+    file_type: str
+        File type to search for if `file_path` is directory.
+
+    Returns
+    -------
+    file_list: list
+        List of file(s).
+    """
+
+    file_list = []
+    p = pathlib.Path(file_path)
+    if p.is_file():
+        file_list.append(str(p))
+    else:
+        for file_p in p.iterdir():
+            if file_type == file_p.suffix:
+                file_list.append(str(file_p))
+    print(file_list)
+    return file_list
+
+
+def convert_tile(file_, output_dir, read_params):
+    """Reads one OS Open Roads tile and writes it to its own partition of a GeoParquet dataset.
+
+    Parameters
+    -------
+
+    file_: str
+        Path to tile, e.g. `SU_RoadLink.shp`.
+
+    output_dir: str
+        Directory of GeoParquet dataset.
+
+    read_params: dict
+        Keyword arguments passed to `gpd.read_file`.
+
+    Returns
+    -------
+    tile_id: str
+        Id of tile (the grid square, e.g. `SU`).
+
+    n_features: int
+        Number of features written.
+    """
+
+    tile_id = pathlib.Path(file_).stem.split("_")[0]
+
+    tile_gdf = gpd.read_file(file_, **read_params, )
+
+    tile_dir = pathlib.Path(output_dir, f"tile={tile_id}")
+    tile_dir.mkdir(parents=True, exist_ok=True)
+
+    tile_gdf.to_parquet(tile_dir / "part-0.parquet",
+                        compression="zstd",
+                        index=False,
+                        write_covering_bbox=True, )
+
+    return tile_id, len(tile_gdf)
+
+
+def convert_roadlinks(file_path, output_dir, read_params, max_workers=None, *args, **kwargs):
+    """Converts OS Open Roads `RoadLink` tiles into a single GeoParquet dataset partitioned by tile,
+    reading and writing tiles in parallel.
+
+    Parameters
+    -------
+
+    file_path: str
+        Either path to a tile or directory of tiles.
+
+    output_dir: str
+        Directory to write GeoParquet dataset to.
+
+    read_params: dict
+        Keyword arguments passed to `gpd.read_file`.
+
+    max_workers: int | None
+        Maximum number of tiles converted at once; defaults to number of CPUs.
+    """
+
+    filelist = [
+        file_
+        for file_ in get_file_or_filelist(file_path, *args, **kwargs)
+        if pathlib.Path(file_).suffix == ".shp" and "RoadLink" in file_
+    ]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(convert_tile, file_, output_dir, read_params)
+            for file_ in filelist
+        ]
+        for future in futures:
+            tile_id, n_features = future.result()
+            print(f"Converted tile {tile_id} ({n_features} features)")
+
+
+if __name__ == "__main__":
+
+    params = {"engine":"pyogrio",
+                "use_arrow": True,
+                "columns": ["nameTOID", "name1", ], }
+
+    convert_roadlinks("../data/input/target_geoms/oproad_essh_gb-2/data",
+                      "../data/input/target_geoms/osopenroads/osopenroads_parquet",
+                      params, )
@@ -16,19 +16,19 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     include_package_data=True,
     platforms="",
-    python_requires=">=3.8",
+    python_requires=">=3.11",
     install_requires=[
         "numpy>=1.21.5",
         "pandas>=1.3.4",
-        "Shapely>=1.8.0",
+        "Shapely>=2.1",
         "scikit-learn>=1.0.1",
-        "geopandas>=0.9.0",
-        "pygeos>=0.10.2",
+        "geopandas>=1.0",
         "recordlinkage>=0.14",
         "rapidfuzz>=1.5.0",
         "pyYAML>=6.0",
         "dask>=2022.5.0",
+        "distributed>=2022.5.0",
         "openpyxl>=3.0.9",
-        "pyarrow>=4.0.1",
+        "pyarrow>=8.0.0",
     ],
 )
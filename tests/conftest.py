@@ -0,0 +1,6 @@
+import pathlib
+import sys
+
+sys.path.insert(
+    0, str(pathlib.Path(__file__).parents[1] / "censusgeocoder")
+)  # modules import each other by name, as when run from censusgeocoder/
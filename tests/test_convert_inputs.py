@@ -0,0 +1,60 @@
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+import convert_inputs
+import utils
+
+
+def _roads():
+    return gpd.GeoDataFrame(
+        {"nameTOID": [1, 2], "name1": ["HIGH STREET", "MILL LANE"]},
+        geometry=[
+            shapely.LineString([(0, 0), (1, 1)]),
+            shapely.LineString([(2, 2), (3, 3)]),
+        ],
+        crs="EPSG:27700",
+    )
+
+
+def test_skips_partitioned_dataset(tmp_path):
+    dataset = tmp_path / "osopenroads_parquet"
+    (dataset / "tile=SU").mkdir(parents=True)
+    utils.convert_to_geoparquet(_roads(), dataset / "tile=SU" / "part-0.parquet")
+
+    converted = convert_inputs.convert_inputs([{"gis_file": str(dataset)}])
+
+    assert converted == []
+    assert not (tmp_path / "osopenroads_parquet.parquet").exists()
+
+
+def test_skips_parquet_file(tmp_path):
+    gis_file = tmp_path / "roads.parquet"
+    utils.convert_to_geoparquet(_roads(), gis_file)
+    modified = gis_file.stat().st_mtime_ns
+
+    assert convert_inputs.convert_inputs([{"gis_file": str(gis_file)}]) == []
+    assert gis_file.stat().st_mtime_ns == modified
+
+
+def test_converts_csv_once(tmp_path):
+    gis_file = tmp_path / "gb1900.csv"
+    pd.DataFrame(
+        {"pin_id": [1, 2], "final_text": ["HIGH ST", "MILL LN"], "east": [0, 1], "north": [0, 1]}
+    ).to_csv(gis_file, index=False)
+    geom_details = {
+        "gis_file": str(gis_file),
+        "gis_read_params": {"sep": ",", "usecols": ["pin_id", "final_text", "east", "north"]},
+        "gis_lat_long": True,
+        "gis_long_field": "east",
+        "gis_lat_field": "north",
+        "gis_projection": "EPSG:27700",
+    }
+
+    converted = convert_inputs.convert_inputs([geom_details, geom_details])
+
+    assert converted == [str(gis_file)]
+    data = utils.read_file(str(gis_file.with_suffix(".parquet")), {})
+    assert isinstance(data, gpd.GeoDataFrame)
+    assert data.crs == "EPSG:27700"
+    assert data["pin_id"].tolist() == [1, 2]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+
+dd = pytest.importorskip("dask.dataframe")
+
+
+def _census():
+    rng = np.random.default_rng(0)
+    n = 1000
+    return pd.DataFrame(
+        {
+            "address_uid": rng.integers(0, 50, n),
+            "RecID": np.arange(n),
+            "address": rng.choice(["HIGH ST", "MILL LN", "CHURCH RD"], n),
+        }
+    )
+
+
+@pytest.mark.parametrize("npartitions", [1, 4, 17])
+def test_same_as_pandas(npartitions):
+    census = _census()
+
+    expected = census.drop_duplicates(subset=["address_uid"]).reset_index(drop=True)
+    result = (
+        utils.drop_duplicates_dask(
+            dd.from_pandas(census, npartitions=npartitions), ["address_uid"]
+        )
+        .compute()
+        .reset_index(drop=True)
+    )
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_same_as_pandas_after_shuffle():
+    census = _census()
+
+    data = (
+        dd.from_pandas(census, npartitions=8).shuffle("address", npartitions=5).persist()
+    )  # rows of each uid spread over partitions out of census order (persisted, as shuffle order varies between computes)
+    expected = (
+        data.compute().drop_duplicates(subset=["address_uid"]).reset_index(drop=True)
+    )
+    result = (
+        utils.drop_duplicates_dask(data, ["address_uid"])
+        .compute()
+        .reset_index(drop=True)
+    )
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)